@@ -10,6 +10,7 @@ CREATE TABLE `model`  (
   `rmse` float NULL DEFAULT NULL,
   `uid` int(11) NOT NULL,
   `date` datetime NOT NULL,
+  `station` int(11) NULL DEFAULT NULL,
   PRIMARY KEY (`id`) USING BTREE,
   INDEX `model_user_id_fk`(`uid`) USING BTREE
 ) ENGINE = MyISAM AUTO_INCREMENT = 1 CHARACTER SET = utf8 COLLATE = utf8_unicode_ci ROW_FORMAT = DYNAMIC;
@@ -46,7 +47,8 @@ CREATE TABLE `waterquality`  (
   `date` datetime NOT NULL,
   `station` int(11) NULL DEFAULT NULL,
   PRIMARY KEY (`id`) USING BTREE,
-  UNIQUE INDEX `waterquality_id_uindex`(`id`) USING BTREE
+  INDEX `waterquality_date_index`(`date`) USING BTREE,
+  UNIQUE INDEX `waterquality_station_date_uindex`(`station`, `date`) USING BTREE
 ) ENGINE = MyISAM AUTO_INCREMENT = 1 CHARACTER SET = utf8 COLLATE = utf8_unicode_ci ROW_FORMAT = FIXED;
 
 SET FOREIGN_KEY_CHECKS = 1;
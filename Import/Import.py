@@ -1,10 +1,19 @@
+import argparse
+import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import numpy as np
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
 
+from Parser import (
+    DEFAULT_CHUNK_SIZE, SUPPORTED_SUFFIXES, drop_duplicates, filter_after_watermarks, iter_chunks,
+    station_from_filename, to_columns, to_records
+)
 from db.Model import WaterQuality
+from db.Snapshot import export as export_snapshot
 
 ########################### 数据库 ###########################
 # 数据库连接配置
@@ -15,62 +24,201 @@ DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "water")
 ##############################################################
 
-# 创建数据库连接和模型基类
+# 创建数据库连接
 engine = create_engine(
     f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-# 创建会话
-Session = sessionmaker(bind=engine)
-session = Session()
-
-def import_excel_to_db(file_path):
-    """从Excel导入数据到数据库"""
-    try:
-        # 读取Excel文件
-        df = pd.read_excel(file_path)
-
-        # 确保必要的列存在
-        required_columns = ['监测时间', 'pH', '溶解氧(mg/L)', '氨氮(mg/L)']
-        for col in required_columns:
-            if col not in df.columns:
-                raise ValueError(f"Excel文件中缺少必要的列: {col}")
-
-        # 遍历数据行并添加到数据库
-        for index, row in df.iterrows():
-            # 转换日期格式
-            date_str = row['监测时间']
-            db_date = pd.to_datetime(date_str).strftime('%Y-%m-%d %H:%M:%S')
-            if not db_date:
-                continue
-
-            # 创建数据记录
-            record = WaterQuality(
-                PH=row['pH'] if pd.notna(row['pH']) else None,
-                DO=row['溶解氧(mg/L)'] if pd.notna(row['溶解氧(mg/L)']) else None,
-                NH3N=row['氨氮(mg/L)'] if pd.notna(row['氨氮(mg/L)']) else None,
-                date=db_date,
-                station=0
-            )
-
-            # 添加到会话
-            session.add(record)
-
-            # 每1000条记录提交一次
-            if (index + 1) % 1000 == 0:
-                session.commit()
-                print(f"已导入 {index + 1} 条记录")
-
-        # 提交剩余的记录
-        session.commit()
-        print(f"成功导入 {len(df)} 条记录")
-
-    except Exception as e:
-        print(f"导入过程中发生错误: {e}")
-        session.rollback()
-    finally:
-        session.close()
+# 每批写入的行数
+DEFAULT_BATCH_SIZE = 20000
+
+
+def upsert_statement(dialect_name):
+    """
+    构建按(station, date)唯一键覆盖写入的INSERT语句，依赖waterquality_station_date_uindex唯一索引
+    """
+    table = WaterQuality.__table__
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(PH=stmt.inserted.PH, DO=stmt.inserted.DO, NH3N=stmt.inserted.NH3N)
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.station, table.c.date],
+            set_={'PH': stmt.excluded.PH, 'DO': stmt.excluded.DO, 'NH3N': stmt.excluded.NH3N}
+        )
+    raise ValueError(f"不支持upsert的数据库: {dialect_name}")
+
+
+def bulk_insert(connection, records, batch_size=DEFAULT_BATCH_SIZE, upsert=True):
+    """
+    批量写入记录（executemany，驱动将其合并为多行INSERT）
+    :param connection: 数据库连接
+    :param records: to_records的结果
+    :param batch_size: 每批写入的行数
+    :param upsert: 是否按(station, date)覆盖已存在的记录；默认覆盖，重复导入同一文件不会因唯一索引冲突而中途失败
+                   （MyISAM表无法回滚已写入的批次），为False时使用普通INSERT
+    :return: 写入的行数
+    """
+    stmt = upsert_statement(connection.dialect.name) if upsert else WaterQuality.__table__.insert()
+    for batch_start in range(0, len(records), batch_size):
+        connection.execute(stmt, records[batch_start:batch_start + batch_size])
+    return len(records)
+
+
+def load_watermarks():
+    """
+    查询各站点已导入的最大日期
+    :return: {站点: datetime64}
+    """
+    table = WaterQuality.__table__
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(table.c.station, func.max(table.c.date)).group_by(table.c.station)
+        ).all()
+    return {station: np.datetime64(date, 'us') for station, date in rows if station is not None and date is not None}
+
+
+def collect_files(source):
+    """
+    解析导入源
+    :param source: 文件、目录或glob模式
+    :return: 排序后的文件列表
+    """
+    if os.path.isdir(source):
+        files = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        files = glob.glob(source)
+    return sorted(path for path in files if path.lower().endswith(SUPPORTED_SUFFIXES))
+
+
+def import_file(file_path, station=None, batch_size=DEFAULT_BATCH_SIZE, single_transaction=False,
+                chunk_size=DEFAULT_CHUNK_SIZE, encoding=None, watermarks=None):
+    """
+    流式解析单个文件并写入数据库
+    :param station: 站点编号，None时从文件名解析；数据中包含站点列时以站点列为准；都无法确定时抛出ValueError
+    :param single_transaction: 是否在同一个事务中写入该文件的全部数据（失败时整体回滚）
+    :param watermarks: 增量导入时各站点的高水位，不为None时跳过高水位之前的数据
+    :return: 写入的行数（每块按(station, date)去重后）
+    """
+    if station is None:
+        station = station_from_filename(file_path)
+
+    start_time = time.perf_counter()
+    count = 0
+
+    def write(connection, df):
+        nonlocal count
+        columns = to_columns(df, station)
+        if watermarks is not None:
+            columns = filter_after_watermarks(columns, watermarks)
+        # 块内按(station, date)去重，与已存在记录的冲突由upsert覆盖
+        columns = drop_duplicates(columns)
+        count += bulk_insert(connection, to_records(columns), batch_size)
+        elapsed = time.perf_counter() - start_time
+        print(f"[{os.path.basename(file_path)}] 已导入 {count} 条记录, {count / elapsed:,.0f} 行/秒")
+
+    if single_transaction:
+        with engine.begin() as connection:
+            for df in iter_chunks(file_path, chunk_size, encoding):
+                write(connection, df)
+    else:
+        for df in iter_chunks(file_path, chunk_size, encoding):
+            with engine.begin() as connection:
+                write(connection, df)
+    return count
+
+
+def refresh_snapshot():
+    """
+    配置了SNAPSHOT_DIR时全量导出列式快照
+    导入按(station, date)覆盖已有记录，被修改的行id不变，快照的增量刷新无法感知，因此导入后重新导出
+    """
+    snapshot_dir = os.getenv("SNAPSHOT_DIR")
+    if not snapshot_dir:
+        return
+    start_time = time.perf_counter()
+    with Session(engine) as session:
+        rows = export_snapshot(session, snapshot_dir)
+    print(f"已重新导出快照 {snapshot_dir}: {rows} 行, 耗时 {time.perf_counter() - start_time:.2f}s")
+
+
+def _init_worker():
+    """ 工作进程不复用父进程的连接 """
+    engine.dispose(close=False)
+
+
+def import_to_db(source, station=None, workers=1, incremental=False, **options):
+    """
+    从文件、目录或glob模式导入数据到数据库，多个文件在工作进程中并行解析和写入
+    :param source: 文件、目录或glob模式
+    :param station: 站点编号，None时从文件名或站点列解析
+    :param workers: 并行的工作进程数
+    :param incremental: 增量导入，只写入各站点高水位及之后的数据（全量与增量导入均按(station, date)覆盖写入，重复导入不会产生重复行）
+    :param options: 传给import_file的其他参数
+    :return: 写入的总行数
+    """
+    files = collect_files(source)
+    if not files:
+        print(f"未找到可导入的文件: {source}")
+        return 0
+
+    if incremental:
+        options['watermarks'] = load_watermarks()
+        print(f"增量导入, 已有 {len(options['watermarks'])} 个站点的高水位")
+
+    start_time = time.perf_counter()
+    total = 0
+    failed = []
+
+    if workers <= 1 or len(files) == 1:
+        for file_path in files:
+            try:
+                total += import_file(file_path, station, **options)
+            except Exception as e:
+                print(f"导入 {file_path} 时发生错误: {e}")
+                failed.append(file_path)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files)), initializer=_init_worker) as pool:
+            futures = {pool.submit(import_file, file_path, station, **options): file_path for file_path in files}
+            for future in as_completed(futures):
+                try:
+                    total += future.result()
+                except Exception as e:
+                    print(f"导入 {futures[future]} 时发生错误: {e}")
+                    failed.append(futures[future])
+
+    elapsed = time.perf_counter() - start_time
+    print(f"成功导入 {len(files) - len(failed)}/{len(files)} 个文件, 共 {total} 条记录, "
+          f"耗时 {elapsed:.2f}s, {total / max(elapsed, 1e-9):,.0f} 行/秒")
+    if total:
+        refresh_snapshot()
+    return total
 
 if __name__ == "__main__":
-    excel_file_path = '水质.xlsx'
-    import_excel_to_db(excel_file_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="导入水质数据（支持xlsx/xls/csv/parquet）")
+    parser.add_argument('source', nargs='?', default='水质.xlsx', help="文件、目录或glob模式")
+    parser.add_argument('--station', type=int, default=None,
+                        help="站点编号，默认从站点列或文件名（station_12、站点12、12-某断面）解析，无法解析时导入失败")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行的工作进程数")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="每批写入的行数")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="流式读取时每块的行数")
+    parser.add_argument('--encoding', default=None, help="CSV文件编码")
+    parser.add_argument('--single-transaction', action='store_true', help="每个文件在同一个事务中写入")
+    parser.add_argument('--incremental', action='store_true', help="增量导入，跳过各站点高水位之前的数据")
+    args = parser.parse_args()
+
+    import_to_db(
+        args.source,
+        station=args.station,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        encoding=args.encoding,
+        single_transaction=args.single_transaction,
+        incremental=args.incremental
+    )
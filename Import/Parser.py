@@ -0,0 +1,178 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Excel列名 -> 数据库列名
+COLUMN_MAPPING = {
+    'pH': 'PH',
+    '溶解氧(mg/L)': 'DO',
+    '氨氮(mg/L)': 'NH3N',
+}
+DATE_COLUMN = '监测时间'
+# 可作为站点编号的列名
+STATION_COLUMNS = ['station', '站点', '站点编号']
+# 支持的文件类型
+SUPPORTED_SUFFIXES = ('.xlsx', '.xls', '.csv', '.parquet')
+# 流式读取时每块的行数
+DEFAULT_CHUNK_SIZE = 100000
+# 文件名中的站点编号：`station_12`、`站点12`，或文件名开头的数字（`12-某断面`）
+STATION_PATTERN = re.compile(r'(?:station|站点)[_\-\s]*(\d+)', re.IGNORECASE)
+LEADING_STATION_PATTERN = re.compile(r'^(\d+)(?!\d)')
+# 文件名开头的日期（`2024-03`、`2024年3月`、`20240301`），不作为站点编号
+LEADING_DATE_PATTERN = re.compile(r'^(?:\d{4}[-_./年]\d{1,2}|\d{8})(?!\d)')
+
+
+def station_from_filename(file_path):
+    """
+    从文件名中解析站点编号，只识别明确的写法：`station_12.csv`、`站点12.xlsx`、`12-某断面.xlsx`
+    文件名中的其他数字（如`水质_2023-01.xlsx`、`2024-03.csv`中的日期）不作为站点编号
+    :return: 站点编号，无法识别时返回None
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    match = STATION_PATTERN.search(name)
+    if match:
+        return int(match.group(1))
+    if LEADING_DATE_PATTERN.match(name):
+        return None
+    match = LEADING_STATION_PATTERN.match(name)
+    return int(match.group(1)) if match else None
+
+
+def iter_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    分块读取文件，大文件不会一次性载入内存
+    :return: DataFrame迭代器
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+
+    if suffix == '.csv':
+        yield from pd.read_csv(file_path, chunksize=chunk_size, encoding=encoding)
+
+    elif suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    elif suffix == '.xlsx':
+        # 只读模式逐行流式解析工作簿
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+
+    elif suffix == '.xls':
+        yield pd.read_excel(file_path)
+
+    else:
+        raise ValueError(f"不支持的文件类型: {file_path}")
+
+
+def to_columns(df, station=None):
+    """
+    按列转换并校验数据
+    :param df: 原始数据
+    :param station: 站点编号，数据中包含站点列时以站点列为准
+    :return: {数据库列名: 数组}，数值列的空值为NaN，日期无法解析的行被丢弃
+    :raise ValueError: 缺少必要的列，或未指定站点编号且数据中缺少站点
+    """
+    # 确保必要的列存在
+    for col in [DATE_COLUMN, *COLUMN_MAPPING]:
+        if col not in df.columns:
+            raise ValueError(f"文件中缺少必要的列: {col}")
+
+    # 整列转换日期格式（按第一行推断格式）；与之格式不同的行再逐个按各自的格式解析
+    raw_dates = df[DATE_COLUMN]
+    dates = pd.to_datetime(raw_dates, errors='coerce')
+    retry = (dates.isna() & raw_dates.notna()).to_numpy()
+    if retry.any():
+        dates = dates.astype('datetime64[us]')
+        dates[retry] = pd.to_datetime(raw_dates[retry], errors='coerce', format='mixed').astype('datetime64[us]')
+    valid = dates.notna().to_numpy()
+    if not valid.all():
+        invalid = raw_dates[~valid]
+        samples = ", ".join(repr(value) for value in invalid.head(5).tolist())
+        print(f"跳过 {int((~valid).sum())} 条日期无效的记录, 例如: {samples}")
+
+    columns = {'date': dates.to_numpy(dtype='datetime64[us]')[valid]}
+    for source, target in COLUMN_MAPPING.items():
+        columns[target] = pd.to_numeric(df[source], errors='coerce').to_numpy(dtype=np.float64)[valid]
+
+    station_column = next((col for col in STATION_COLUMNS if col in df.columns), None)
+    if station_column is not None:
+        stations = pd.to_numeric(df[station_column], errors='coerce')[valid]
+        if station is not None:
+            stations = stations.fillna(station)
+        elif stations.isna().any():
+            raise ValueError(f"{int(stations.isna().sum())} 条记录缺少站点编号，请使用--station指定")
+        columns['station'] = stations.to_numpy(dtype=np.int64)
+    elif station is not None:
+        columns['station'] = np.full(int(valid.sum()), station, dtype=np.int64)
+    else:
+        raise ValueError("无法确定站点编号: 数据中没有站点列，文件名中也没有站点编号，请使用--station指定")
+    return columns
+
+
+def to_records(columns):
+    """
+    将按列存储的数据转换为待写入的记录
+    :return: [{列名: 值}]，NaN转换为None
+    """
+    values = {'date': columns['date'].astype('datetime64[us]').tolist()}
+    for target in COLUMN_MAPPING.values():
+        column = columns[target]
+        values[target] = np.where(np.isnan(column), None, column).tolist()
+    values['station'] = columns['station'].tolist()
+
+    keys = list(values)
+    return [dict(zip(keys, row)) for row in zip(*values.values())]
+
+
+def drop_duplicates(columns):
+    """
+    按(站点, 日期)去重，重复时保留最后出现的一条
+    """
+    size = columns['date'].size
+    if size == 0:
+        return columns
+    # 逆序后稳定排序，每组的第一条即原数据中最后出现的一条
+    reversed_index = np.arange(size - 1, -1, -1)
+    order = reversed_index[np.lexsort((columns['date'][::-1], columns['station'][::-1]))]
+    stations, dates = columns['station'][order], columns['date'][order]
+    first = np.ones(size, dtype=bool)
+    first[1:] = (stations[1:] != stations[:-1]) | (dates[1:] != dates[:-1])
+    keep = np.sort(order[first])
+    return {name: column[keep] for name, column in columns.items()}
+
+
+def filter_after_watermarks(columns, watermarks):
+    """
+    丢弃各站点高水位之前的数据（等于高水位的行保留，交由upsert处理）
+    :param watermarks: {站点: 该站点已导入的最大日期(datetime64)}
+    """
+    if not watermarks or columns['date'].size == 0:
+        return columns
+    limits = np.full(columns['date'].size, np.datetime64('NaT'), dtype='datetime64[us]')
+    for station in np.unique(columns['station']):
+        watermark = watermarks.get(int(station))
+        if watermark is not None:
+            limits[columns['station'] == station] = watermark
+    # 没有高水位的站点（NaT）全部保留
+    keep = np.isnat(limits) | (columns['date'] >= limits)
+    return {name: column[keep] for name, column in columns.items()}
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 导入脚本以本目录为导入起点，数据表定义来自后端模块（db.Model）
+IMPORT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(IMPORT_DIR), "Module-BackEnd-FastAPI"))
+sys.path.insert(0, IMPORT_DIR)
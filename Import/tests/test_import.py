@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import Import
+from db.Model import Base, WaterQuality
+from db.Snapshot import Snapshot
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    """ 带(station, date)唯一索引的SQLite替身数据库 """
+    engine = create_engine(f"sqlite:///{tmp_path / 'water.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(Import, "engine", engine)
+    return engine
+
+
+def count_rows(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(WaterQuality.__table__)).scalar()
+
+
+def write_csv(path, ph):
+    pd.DataFrame({
+        '监测时间': ['2024-01-01 00:00', '2024-01-01 04:00', '2024-01-01 04:00', '2024-01-01 08:00'],
+        'pH': ph,
+        '溶解氧(mg/L)': [8.0, 8.1, 8.2, 8.3],
+        '氨氮(mg/L)': [0.5, 0.6, 0.7, 0.8],
+    }).to_csv(path, index=False)
+
+
+def test_import_same_file_twice(standin, tmp_path, monkeypatch):
+    monkeypatch.delenv("SNAPSHOT_DIR", raising=False)
+    csv_path = tmp_path / "station_3.csv"
+    write_csv(csv_path, [7.1, 7.2, 7.3, 7.4])
+
+    Import.import_to_db(str(csv_path), chunk_size=2)
+    assert count_rows(standin) == 3
+
+    # 默认模式下重复导入不报错、不产生重复行（整个文件一块，块内的重复行先去重）
+    Import.import_to_db(str(csv_path))
+    assert count_rows(standin) == 3
+    with standin.connect() as connection:
+        ph = connection.execute(
+            select(WaterQuality.__table__.c.PH).where(WaterQuality.__table__.c.station == 3).order_by("date")
+        ).scalars().all()
+    assert ph == [7.1, 7.3, 7.4]
+
+
+def test_import_reexports_snapshot(standin, tmp_path, monkeypatch):
+    snapshot_dir = str(tmp_path / "snapshot")
+    monkeypatch.setenv("SNAPSHOT_DIR", snapshot_dir)
+    csv_path = tmp_path / "station_3.csv"
+    write_csv(csv_path, [7.1, 7.2, 7.3, 7.4])
+    Import.import_to_db(str(csv_path))
+
+    # 修正后的数据覆盖已有记录，id不变，快照仍然包含修正后的值
+    write_csv(csv_path, [6.1, 6.2, 6.3, 6.4])
+    Import.import_to_db(str(csv_path))
+    snapshot = Snapshot.open(snapshot_dir)
+    assert snapshot.rows == 3
+    assert snapshot.columns['PH'].tolist() == [6.1, 6.3, 6.4]
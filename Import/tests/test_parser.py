@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Parser import station_from_filename, to_columns
+
+
+def make_frame(dates):
+    return pd.DataFrame({
+        '监测时间': dates,
+        'pH': [7.0] * len(dates),
+        '溶解氧(mg/L)': [8.0] * len(dates),
+        '氨氮(mg/L)': [0.5] * len(dates),
+    })
+
+
+def test_mixed_date_formats():
+    df = make_frame(['2024-01-01 00:00', '2024-01-02', '2024/01/03 04:00', pd.Timestamp('2024-01-04 08:00')])
+    columns = to_columns(df, station=1)
+    expected = np.array(
+        ['2024-01-01T00:00', '2024-01-02T00:00', '2024-01-03T04:00', '2024-01-04T08:00'], dtype='datetime64[us]'
+    )
+    np.testing.assert_array_equal(columns['date'], expected)
+    assert columns['PH'].size == 4
+
+
+def test_unparseable_dates_are_reported(capsys):
+    columns = to_columns(make_frame(['2024-01-01 00:00', '无效日期', None]), station=1)
+    assert columns['date'].size == 1
+    assert "跳过 2 条日期无效的记录" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("name, station", [
+    ("station_12.csv", 12),
+    ("Station-7.xlsx", 7),
+    ("站点3.xlsx", 3),
+    ("12-某断面.xlsx", 12),
+    ("5.csv", 5),
+    ("2024-03_station5.csv", 5),
+    ("水质_2023-01.xlsx", None),
+    ("2024-03.csv", None),
+    ("20240301.csv", None),
+    ("水质.xlsx", None),
+])
+def test_station_from_filename(name, station):
+    assert station_from_filename(f"data/{name}") == station
+
+
+def test_missing_station_fails():
+    with pytest.raises(ValueError, match="--station"):
+        to_columns(make_frame(['2024-01-01']), station=None)
+    df = make_frame(['2024-01-01', '2024-01-02'])
+    df['站点'] = [4, None]
+    with pytest.raises(ValueError, match="--station"):
+        to_columns(df, station=None)
+    assert to_columns(df, station=9)['station'].tolist() == [4, 9]
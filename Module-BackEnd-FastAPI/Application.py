@@ -1,269 +1,427 @@
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-import pandas as pd
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from sklearn.preprocessing import StandardScaler
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from db.Model import Model, WaterQuality
-from trainers.AdaBoostTrainer import AdaBoostTrainer
-from trainers.BiRNNTrainer import BiRNNTrainer
-from trainers.GRUTrainer import GRUTrainer
-from trainers.LSTMTrainer import LSTMTrainer
-from trainers.SVMTrainer import SVMTrainer
-from tuners.Bayesian.BiRNNBayesianTuner import BiRNNBayesianTuner
-from tuners.Bayesian.GRUBayesianTuner import GRUBayesianOptimizationTuner
-from tuners.Bayesian.LSTMBayesianTuner import LSTMBayesianOptimizationTuner
-from tuners.Random.BiRNNRandomTuner import BiRNNSearchTuner
-from tuners.Random.GRURandomTuner import GRURandomSearchTuner
-from tuners.Random.LSTMRandomTuner import LSTMRandomSearchTuner
-
-########################### 数据库 ###########################
-# 数据库连接配置
-DB_USER = os.getenv("DB_USER", "root")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_NAME = os.getenv("DB_NAME", "water")
-##############################################################
-
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from db.Database import SessionLocal
+from db.Model import Model
+from features.Resample import RESOLUTIONS
+from features.TimeFeatures import build_horizon_dates, build_time_features, calculate_next_month
+from jobs.JobExecutor import JobExecutor
+from jobs.Tasks import batch_training_job, joint_training_job, training_job, tuning_job
+from monitoring.Metrics import (
+    HTTP_REQUEST_SECONDS, JOBS_IN_FLIGHT, MODEL_CACHE_BYTES, MODEL_CACHE_ENTRIES, MODEL_CACHE_HIT_RATIO, REGISTRY,
+    REQUEST_STAGE_SECONDS
+)
+from monitoring.Profiling import PROFILERS, ProfilerBusy, StageTimer, profiled
+from services.ModelRegistry import ModelRegistry
+from services.TrainingService import create_trainer
 
 ########################### 初始化 ###########################
-# 加载环境变量
-load_dotenv()
-# 创建FastAPI应用
-app = FastAPI()
-# 创建数据库引擎
-engine = create_engine(
-    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
-    pool_pre_ping = True,
-    pool_recycle = 300,  # 5分钟回收一次连接
-    pool_size = 10
-)
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-##############################################################
+# 后台任务执行器（工作进程数由环境变量JOB_MAX_WORKERS配置）
+job_executor = JobExecutor()
+# 已加载模型的LRU缓存（容量由环境变量MODEL_CACHE_SIZE / MODEL_CACHE_MAX_MB配置）
+model_registry = ModelRegistry(create_trainer)
+# 可选的性能分析器参数
+PROFILER_PATTERN = f"^({'|'.join(PROFILERS)})$"
+# 训练数据的时间分辨率参数
+RESOLUTION_PATTERN = f"^({'|'.join(RESOLUTIONS)})$"
+
+def get_preload_models():
+    """
+    获取需要预加载的模型
+    环境变量MODEL_PRELOAD_IDS指定逗号分隔的模型ID，未指定时预加载每个指标RMSE最低的模型
+    :return: [(model_id, method, target)]
+    """
+    db = SessionLocal()
+    try:
+        preload_ids = os.getenv("MODEL_PRELOAD_IDS")
+        if preload_ids:
+            ids = [int(model_id) for model_id in preload_ids.split(",") if model_id.strip()]
+            # noinspection PyTypeChecker
+            models = db.query(Model).filter(Model.id.in_(ids)).all()
+        else:
+            models = []
+            for target in ["PH", "DO", "NH3N"]:
+                # noinspection PyTypeChecker
+                best = (
+                    db.query(Model)
+                    .filter(Model.target == target, Model.rmse.isnot(None))
+                    .order_by(Model.rmse)
+                    .first()
+                )
+                if best:
+                    models.append(best)
+        return [(model.id, model.method, model.target) for model in models]
+    finally:
+        db.close()
 
-########################### 工具函数 ###########################
-# 统一基准时间：Unix时间戳起始点 - 1970年1月1日 00:00:00
-UNIX_EPOCH = datetime(1970, 1, 1)
+def preload_models():
+    """ 预加载常用模型 """
+    try:
+        loaded = model_registry.preload(get_preload_models())
+        print(f"已预加载 {loaded} 个模型")
+    except Exception as e:
+        print(f"预加载模型失败: {str(e)}")
 
-def get_extract_time_features(date: datetime) -> dict:
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
     """
-    从datetime中提取时间特征
+    应用生命周期：启动后在后台线程预加载常用模型（不推迟就绪），关闭时回收工作进程
     """
-    return {
-        'year': date.year,
-        'month': date.month,
-        'day': date.day,
-        'day_of_week': date.weekday(),  # 0=周一，6=周日
-        'hour': date.hour,
-        'day_of_year': date.timetuple().tm_yday
-    }
+    preload_task = asyncio.create_task(asyncio.to_thread(preload_models))
+    yield
+    await preload_task
+    job_executor.shutdown()
+
+# 创建FastAPI应用
+app = FastAPI(lifespan=lifespan)
 
-def calculate_next_month(start_year: int, start_month: int) -> datetime:
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """ 按路由模板记录接口耗时 """
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start_time,
+            endpoint=route.path if route is not None else "unmatched",
+            method=request.method,
+            status=status
+        )
+##############################################################
+
+########################### 工具函数 ###########################
+async def run_job(job, wait: bool):
     """
-    计算下一个月的日期
+    等待任务完成或直接返回任务ID
+    :param job: 已提交的任务
+    :param wait: 是否等待任务完成（等待期间不阻塞事件循环）
     """
-    month = start_month + 1
-    year = start_year
+    if not wait:
+        return {
+            "status": "success",
+            "data": {"job_id": job.id, "state": job.state}
+        }
 
-    if month > 12:
-        month = 1
-        year += 1
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except Exception as e:
+        print(f"任务 {job.id} 失败: {str(e)}")
+        return { "status": "failure", "job_id": job.id }
 
-    return datetime(year, month, 1)  # 每月第一天
+    return {
+        "status": "success",
+        "job_id": job.id,
+        "data": result
+    }
+
+def invalidate_trained_models(future):
+    """ 批量/联合训练完成后使涉及的模型缓存失效 """
+    if future.exception() is None:
+        for result in future.result()["models"]:
+            model_registry.invalidate(result["model_id"])
 ##############################################################
 
 ########################### 网络IO ###########################
 @app.get("/api/training")
-async def train_model(model_id: int):
+async def train_model(
+        model_id: int,
+        wait: bool = True,
+        epochs: int = 100,
+        batch_size: int = 32,
+        early_stopping: bool = False,
+        patience: int = 10,
+        resolution: str | None = Query(None, pattern=RESOLUTION_PATTERN),
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
+):
     """
     模型训练接口
     :param model_id: 模型ID DB获得
-    :return: 训练结果（包含模型RMSE和各样本点的原始值/预测值）
+    :param wait: 是否等待训练完成，为false时立即返回任务ID，通过/api/jobs/{job_id}查询
+    :param epochs: 神经网络最大迭代轮数
+    :param batch_size: 神经网络小批量的样本数量
+    :param early_stopping: 是否启用基于验证集的早停
+    :param patience: 早停容忍轮数
+    :param resolution: 训练数据的时间分辨率（raw / hourly / daily / weekly），按时间桶取均值，默认读取环境变量TRAINING_RESOLUTION
+    :param stages: 是否返回各阶段耗时（fetch / featurize / scale / fit / evaluate / save）
+    :param profile: 性能分析器（cprofile / torch），在工作进程中分析本次训练，结果写入PROFILE_DIR
+    :return: 训练结果（包含模型RMSE、各样本点的原始值/预测值以及训练轮数/最佳轮次/耗时）
     """
     print(f"收到来自SpringBoot的模型训练请求, 模型ID: {model_id}")
-    db = SessionLocal()
-
-    try:
-        # 查询模型信息
+    job = job_executor.submit(
+        "training", training_job,
+        model_id=model_id,
+        epochs=epochs,
+        batch_size=batch_size,
+        early_stopping=early_stopping,
+        patience=patience,
+        resolution=resolution,
+        stages=stages,
+        profile=profile
+    )
+    # 训练完成后旧模型随即失效
+    job.future.add_done_callback(lambda _: model_registry.invalidate(model_id))
+    return await run_job(job, wait)
+
+
+@app.get("/api/training/joint")
+async def train_joint(
+        model_ids: list[int] = Query(...),
+        wait: bool = True,
+        epochs: int = 100,
+        batch_size: int = 32,
+        early_stopping: bool = False,
+        patience: int = 10,
+        resolution: str | None = Query(None, pattern=RESOLUTION_PATTERN),
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
+):
+    """
+    多指标联合训练接口：同一训练方法、同一站点、不同指标的多个模型一次训练完成
+    :param model_ids: 模型ID（可重复传入多个）
+    :param wait: 是否等待训练完成，为false时立即返回任务ID，通过/api/jobs/{job_id}查询
+    :param epochs / batch_size / early_stopping / patience: 神经网络训练参数，同/api/training
+    :param resolution: 训练数据的时间分辨率，同/api/training
+    :param stages: 是否返回各阶段耗时（fetch / featurize / scale / fit / evaluate / save）
+    :param profile: 性能分析器（cprofile / torch），在工作进程中分析本次训练，结果写入PROFILE_DIR
+    :return: 各模型的RMSE与原始值/预测值，以及训练轮数/最佳轮次/耗时
+    """
+    print(f"收到联合训练请求, 模型ID: {model_ids}")
+    job = job_executor.submit(
+        "joint_training", joint_training_job,
+        model_ids=model_ids,
+        epochs=epochs,
+        batch_size=batch_size,
+        early_stopping=early_stopping,
+        patience=patience,
+        resolution=resolution,
+        stages=stages,
+        profile=profile
+    )
+    job.future.add_done_callback(invalidate_trained_models)
+    return await run_job(job, wait)
+
+
+@app.get("/api/training/batch")
+async def train_batch(
+        uid: int,
+        methods: list[str] = Query(...),
+        targets: list[str] = Query(["PH", "DO", "NH3N"]),
+        stations: list[int] | None = Query(None),
+        n_jobs: int | None = Query(None, ge=1),
+        joint: bool = False,
+        wait: bool = True,
+        epochs: int = 100,
+        batch_size: int = 32,
+        early_stopping: bool = False,
+        patience: int = 10,
+        resolution: str | None = Query(None, pattern=RESOLUTION_PATTERN),
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
+):
+    """
+    按站点批量训练接口：每个(站点, 指标, 训练方法)训练一个模型，模型记录不存在时自动创建
+    :param uid: 新建模型记录所属的用户ID
+    :param methods: 训练方法（可重复传入多个）
+    :param targets: 指标（可重复传入多个），默认PH / DO / NH3N
+    :param stations: 站点（可重复传入多个），默认全部站点
+    :param n_jobs: 并行训练的工作进程数，默认读取环境变量BATCH_N_JOBS
+    :param joint: 是否联合训练各指标（每个站点的每种训练方法只训练一次，见/api/training/joint）
+    :param wait: 是否等待训练完成，为false时立即返回任务ID，通过/api/jobs/{job_id}查询
+    :param epochs / batch_size / early_stopping / patience: 神经网络训练参数，同/api/training
+    :param resolution: 训练数据的时间分辨率，同/api/training
+    :param stages: 是否返回各阶段耗时（fetch / resolve / fit / save）
+    :param profile: 性能分析器（cprofile / torch），只分析批量训练的主进程
+    :return: 各模型的ID、RMSE与训练统计
+    """
+    print(f"收到按站点批量训练请求, 方法: {methods}, 指标: {targets}, 站点: {stations or '全部'}")
+    job = job_executor.submit(
+        "batch_training", batch_training_job,
+        targets=targets,
+        methods=methods,
+        uid=uid,
+        stations=stations,
+        n_jobs=n_jobs,
+        joint=joint,
+        epochs=epochs,
+        batch_size=batch_size,
+        early_stopping=early_stopping,
+        patience=patience,
+        resolution=resolution,
+        stages=stages,
+        profile=profile
+    )
+    job.future.add_done_callback(invalidate_trained_models)
+    return await run_job(job, wait)
+
+
+def _run_prediction(db, timer, model_id, month, profile):
+    """
+    单点预测的同步部分（在线程中执行）
+    :return: (预测结果, 性能分析结果或None)
+    """
+    with profiled(profile, f"prediction_{model_id}") as capture:
+        timer.restart()
         # noinspection PyTypeChecker
         model_info = db.query(Model).filter(Model.id == model_id).first()
+        timer.mark("query")
 
         if not model_info:
             raise HTTPException(status_code=404, detail=f"模型ID {model_id} 不存在")
 
-        # 获取目标列和训练方法
-        target_name = model_info.target
-        method = model_info.method
-
-        # 验证method和target
-        if model_info.method not in ["ADABOOST", "SVM", "LSTM", "GRU", "BI-RNN"]:
-            raise HTTPException(status_code=400, detail=f"不支持的模型方法: {model_info.method}")
-
-        if target_name not in ["PH", "DO", "NH3N"]:
-            raise HTTPException(status_code=400, detail=f"不支持的目标变量: {target_name}")
-
-        print(f"- 训练方式: {model_info.method}")
-
-        # 查询水质数据
-        # noinspection PyTypeChecker
-        target_column = getattr(WaterQuality, target_name)
-        water_quality_data = (
-            db.query(
-                WaterQuality.date,
-                target_column
-            ).filter(target_column.isnot(None))
-            .order_by(WaterQuality.date)
-            .all()
-        )
-
-        if not water_quality_data or len(water_quality_data) < 10:
-            raise HTTPException(status_code=400, detail=f"数据不足，无法训练模型")
-
-        print(f"- 样本量: {len(water_quality_data)}")
-
-        # Pandas特征工程
-        df = pd.DataFrame({
-            # 时间特征
-            'date': [data[0] for data in water_quality_data],
-            # 指标的值
-            target_name: [data[1] for data in water_quality_data]
-        })
-
-        # 计算相对时间差（以UNIX_EPOCH为基准，小时为单位）
-        df['time_diff_hours'] = df['date'].apply(
-            lambda x: (x - UNIX_EPOCH).total_seconds() / 3600
-        )
-
-        # 提取时间特征
-        time_features = df['date'].apply(lambda x: pd.Series(get_extract_time_features(x)))
-        # 拼接时间差列
-        df = pd.concat([df, time_features], axis=1)
-
-        # 准备特征和目标变量
-        features = [
-            'time_diff_hours',
-            'year',
-            'month',
-            'day',
-            'day_of_week',
-            'hour',
-            'day_of_year'
-        ]
-        X = df[features].values
-        y = df[target_name].values
-
-        # 数据标准化
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-
-        # 选择模型
-        if method == "ADABOOST":
-            trainer = AdaBoostTrainer(model_id, target_name, scaler)
-        elif method == "SVM":
-            trainer = SVMTrainer(model_id, target_name, scaler)
-        elif method == "LSTM":
-            trainer = LSTMTrainer(model_id, target_name, scaler)
-        elif method == "GRU":
-            trainer = GRUTrainer(model_id, target_name, scaler)
-        else:
-            trainer = BiRNNTrainer(model_id, target_name, scaler)
-
-        # 训练模型
-        rmse, _, y_test, y_pred = trainer.train(X_scaled, y)
-
-        # 更新模型RMSE到数据库
-        model_info.rmse = rmse
-        db.commit()
-
-        # 构建预测结果和真实值的对比数据
-        print("模型拟合完毕, 发回请求...")
-        return {
-            "status": "success",
-            "data": {
-                "rmse": rmse,
-                "pred": y_pred.tolist(),
-                "real": y_test.tolist()
-            }
-        }
+        # 从缓存获取已加载的训练器，未命中时从磁盘加载
+        trainer = model_registry.get(model_id, model_info.method, model_info.target)
+        timer.mark("load")
+        if trainer is None:
+            raise HTTPException(status_code=404, detail="模型未找到或未训练")
 
-    except Exception as e:
-        print(e)
-        return { "status": "failure" }
-    finally:
-        db.close()
+        # 生成预测特征
+        pred_date = calculate_next_month(datetime.now().year, month)
+        features = build_time_features([pred_date])
+        timer.mark("featurize")
 
+        # 预测
+        prediction = trainer.predict(features)[0]
+        timer.mark("predict")
+    return prediction, capture
 
 @app.get("/api/prediction")
 async def predict_next_point(
         model_id: int,
-        month: int
+        month: int,
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
 ):
     """
     模型预测接口
     :param model_id: 模型ID DB获得
     :param month: 待预测月份
+    :param stages: 是否返回各阶段耗时
+    :param profile: 性能分析器（cprofile / torch），分析结果写入PROFILE_DIR
     :return 预测结果
     """
     print(f"收到预测请求, 模型ID: {model_id}, 预测月: {month}")
     db = SessionLocal()
+    timer = StageTimer(REQUEST_STAGE_SECONDS, endpoint="/api/prediction")
 
     try:
         if not 1 <= month <= 12:
             raise HTTPException(status_code=400, detail="起始月份必须在1-12之间")
 
+        # 查询、加载与推理整体在线程中执行：未命中缓存时从磁盘加载不阻塞事件循环，性能分析也只覆盖本次请求
+        prediction, capture = await asyncio.to_thread(_run_prediction, db, timer, model_id, month, profile)
+
+        data = {"pred": float(prediction)}
+        if stages:
+            data["stages"] = timer.breakdown()
+        if capture is not None:
+            data["profile"] = capture.path
+        return {
+            "status": "success",
+            "data": data
+        }
+
+    except HTTPException:
+        raise
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"预测错误: {str(e)}")
+        return { "status": "failure" }
+    finally:
+        db.close()
+
+def _run_forecast(db, timer, model_id, horizon, timestamps, profile):
+    """
+    多步预测的同步部分（在线程中执行）
+    :return: (预测时间点, 预测结果, 性能分析结果或None)
+    """
+    with profiled(profile, f"forecast_{model_id}") as capture:
+        timer.restart()
         # noinspection PyTypeChecker
         model_info = db.query(Model).filter(Model.id == model_id).first()
+        timer.mark("query")
 
         if not model_info:
             raise HTTPException(status_code=404, detail=f"模型ID {model_id} 不存在")
 
-        # 加载对应的训练器
-        method = model_info.method
-        if method == "ADABOOST":
-            trainer = AdaBoostTrainer(model_id, model_info.target)
-        elif method == "SVM":
-            trainer = SVMTrainer(model_id, model_info.target)
-        elif method == "LSTM":
-            trainer = LSTMTrainer(model_id, model_info.target)
-        elif method == "GRU":
-            trainer = GRUTrainer(model_id, model_info.target)
+        trainer = model_registry.get(model_id, model_info.method, model_info.target)
+        timer.mark("load")
+        if trainer is None:
+            raise HTTPException(status_code=404, detail="模型未找到或未训练")
+
+        # 生成全部预测点的特征矩阵
+        if timestamps:
+            # 数据库中的时间不带时区，统一去掉时区信息
+            pred_dates = [timestamp.replace(tzinfo=None) for timestamp in timestamps]
         else:
-            trainer = BiRNNTrainer(model_id, model_info.target)
+            pred_dates = build_horizon_dates(datetime.now(), horizon)
+        features = build_time_features(pred_dates)
+        timer.mark("featurize")
 
-        if not trainer.load_model():
-            raise HTTPException(status_code=404, detail="模型未找到或未训练")
+        # 批量预测
+        predictions = trainer.predict(features)
+        timer.mark("predict")
+    return pred_dates, predictions, capture
 
-        # 生成预测特征
-        pred_date = calculate_next_month(datetime.now().year, month)
-        time_features = get_extract_time_features(pred_date)
-        time_diff_hours = (pred_date - UNIX_EPOCH).total_seconds() / 3600
-
-        features = [
-            time_diff_hours,
-            time_features['year'],
-            time_features['month'],
-            time_features['day'],
-            time_features['day_of_week'],
-            time_features['hour'],
-            time_features['day_of_year'],
-        ]
+@app.get("/api/forecast")
+async def forecast(
+        model_id: int,
+        horizon: int = 12,
+        timestamps: list[datetime] | None = Query(None),
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
+):
+    """
+    多步预测接口，一次批量推理返回全部预测点
+    :param model_id: 模型ID DB获得
+    :param horizon: 预测月数，从下个月起每月第一天各一个点（1-120）
+    :param timestamps: 显式指定的预测时间点，传入时忽略horizon
+    :param stages: 是否返回各阶段耗时
+    :param profile: 性能分析器（cprofile / torch），分析结果写入PROFILE_DIR
+    :return 各时间点的预测结果
+    """
+    print(f"收到多步预测请求, 模型ID: {model_id}, 步数: {len(timestamps) if timestamps else horizon}")
+    db = SessionLocal()
+    timer = StageTimer(REQUEST_STAGE_SECONDS, endpoint="/api/forecast")
 
-        # 预测
-        prediction = trainer.predict([features])[0]
+    try:
+        if not timestamps and not 1 <= horizon <= 120:
+            raise HTTPException(status_code=400, detail="预测月数必须在1-120之间")
 
+        # 与单点预测相同，同步部分整体在线程中执行
+        pred_dates, predictions, capture = await asyncio.to_thread(
+            _run_forecast, db, timer, model_id, horizon, timestamps, profile
+        )
+
+        data = {
+            "dates": [pred_date.strftime("%Y-%m-%d %H:%M:%S") for pred_date in pred_dates],
+            "pred": [float(prediction) for prediction in predictions]
+        }
+        if stages:
+            data["stages"] = timer.breakdown()
+        if capture is not None:
+            data["profile"] = capture.path
         return {
             "status": "success",
-            "data": {"pred": float(prediction)}
+            "data": data
         }
 
     except HTTPException:
         raise
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         print(f"预测错误: {str(e)}")
         return { "status": "failure" }
@@ -273,140 +431,75 @@ async def predict_next_point(
 @app.get("/api/tuning")
 async def tune_model(
         model_id: int,
-        method: str
+        method: str,
+        wait: bool = True,
+        n_jobs: int | None = Query(None, ge=1),
+        time_budget: float | None = Query(None, gt=0),
+        max_trials: int = Query(15, ge=1),
+        resolution: str | None = Query(None, pattern=RESOLUTION_PATTERN),
+        stages: bool = False,
+        profile: str | None = Query(None, pattern=PROFILER_PATTERN)
 ):
     """
     模型调优接口
     :param model_id: 模型ID DB获得
     :param method: 调优方法：random（随机搜索）、bayesian（贝叶斯优化）
+    :param wait: 是否等待调优完成，为false时立即返回任务ID，通过/api/jobs/{job_id}查询
+    :param n_jobs: 并行试验进程数，默认读取环境变量TUNER_N_JOBS
+    :param time_budget: 时间预算（秒），耗尽后停止并返回目前为止的最佳参数
+    :param max_trials: 试验数上限
+    :param resolution: 训练数据的时间分辨率，同/api/training
+    :param stages: 是否返回各阶段耗时（fetch / featurize / prepare / study / search / save）
+    :param profile: 性能分析器（cprofile / torch），只分析调优进程，并行试验的工作进程不在其中
     :return: 调优结果（最佳RMSE和参数）
     """
     print(f"收到调优请求 - 模型ID: {model_id}, 方法: {method}")
-    db = SessionLocal()
-
-    try:
-        # 验证模型存在性
-        # noinspection PyTypeChecker
-        model_info = db.query(Model).filter(Model.id == model_id).first()
-        if not model_info:
-            raise HTTPException(status_code=404, detail=f"模型ID {model_id} 不存在")
-
-        # 验证模型类型匹配
-        model_type = model_info.method
-        if model_type not in ["LSTM", "GRU", "BI-RNN"]:
-            raise HTTPException(status_code=400, detail=f"不支持的模型类型: {model_type}")
-
-        if model_info.method != model_type.upper():
-            raise HTTPException(
-                status_code=400,
-                detail=f"模型ID {model_id} 不是{model_type.upper()}模型（实际: {model_info.method}）"
-            )
-
-        # 获取训练数据
-        target_name = model_info.target
-        # noinspection PyTypeChecker
-        target_column = getattr(WaterQuality, target_name)
-        water_quality_data = (
-            db.query(WaterQuality.date, target_column)
-            .filter(target_column.isnot(None))
-            .order_by(WaterQuality.date)
-            .all()
-        )
-
-        if not water_quality_data or len(water_quality_data) < 10:
-            raise HTTPException(status_code=400, detail="数据不足（需至少10条样本）")
-
-        # 特征工程
-        df = pd.DataFrame({
-            'date': [data[0] for data in water_quality_data],
-            target_name: [data[1] for data in water_quality_data]
-        })
-        df['time_diff_hours'] = df['date'].apply(
-            lambda x: (x - UNIX_EPOCH).total_seconds() / 3600
-        )
-        time_features = df['date'].apply(lambda x: pd.Series(get_extract_time_features(x)))
-        df = pd.concat([df, time_features], axis=1)
-
-        features = ['time_diff_hours', 'year', 'month', 'day', 'day_of_week', 'hour', 'day_of_year']
-        X = df[features].values
-        y = df[target_name].values
-
-        # 初始化调优器
-        scaler = StandardScaler()
-        tuner = None
-
-        # 根据模型类型和调优方法选择调优器
-        if model_type == "LSTM":
-            if method == "random":
-                tuner = LSTMRandomSearchTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    n_iter=15
-                )
-            else:
-                tuner = LSTMBayesianOptimizationTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    max_evals=15
-                )
-
-        elif model_type == "GRU":
-            if method == "random":
-                tuner = GRURandomSearchTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    n_iter=15
-                )
-            else:
-                tuner = GRUBayesianOptimizationTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    max_evals=15
-                )
-
-        elif model_type == "BI-RNN":
-            if method == "random":
-                tuner = BiRNNSearchTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    n_iter=15
-                )
-            else:
-                tuner = BiRNNBayesianTuner(
-                    model_id=model_id,
-                    target_name=target_name,
-                    scaler=scaler,
-                    db_session=db,
-                    max_evals=15
-                )
-
-        # 执行调优
-        result = tuner.tune(X, y)
+    job = job_executor.submit(
+        "tuning",
+        tuning_job,
+        model_id=model_id,
+        method=method,
+        n_jobs=n_jobs,
+        time_budget=time_budget,
+        max_trials=max_trials,
+        resolution=resolution,
+        stages=stages,
+        profile=profile
+    )
+    return await run_job(job, wait)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    任务查询接口
+    :param job_id: 任务ID
+    :return: 任务状态、进度及结果
+    """
+    job = job_executor.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 不存在")
 
-        return {
-            "status": "success",
-            "data": {
-                "best_rmse": round(result["best_rmse"], 4),
-                "best_params": result["best_params"],
-            }
-        }
+    return {
+        "status": "success",
+        "data": job
+    }
 
-    except Exception as e:
-        # 未知错误
-        print(f"调优失败: {str(e)}")
-        return { "status": "failure" }
-    finally:
-        db.close()
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus指标接口
+    :return: Prometheus文本格式的指标
+    """
+    cache_stats = model_registry.stats()
+    requests = cache_stats["hits"] + cache_stats["misses"]
+    MODEL_CACHE_HIT_RATIO.set(cache_stats["hits"] / requests if requests else 0.0)
+    MODEL_CACHE_ENTRIES.set(cache_stats["entries"])
+    MODEL_CACHE_BYTES.set(cache_stats["bytes"])
+    JOBS_IN_FLIGHT.clear()
+    for kind, count in job_executor.in_flight().items():
+        JOBS_IN_FLIGHT.set(count, kind=kind)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,73 @@
+"""
+模型加载基准测试
+对比旧格式（state_dict + joblib归一化器两个文件）与单文件模型包（整体读取 / 内存映射 / float16）
+加载一批LSTM模型的耗时与文件大小
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.BundleBenchmark --models 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from trainers.LSTMTrainer import LSTMTrainer
+
+
+def load_all(model_ids, mmap):
+    """ 依次加载全部模型，返回耗时（秒） """
+    os.environ["MODEL_BUNDLE_MMAP"] = "1" if mmap else "0"
+    start_time = time.perf_counter()
+    for model_id in model_ids:
+        trainer = LSTMTrainer(model_id, "PH", inference_mode="eager")
+        assert trainer.load_model()
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型加载基准测试")
+    parser.add_argument('--models', type=int, default=50, help="模型数量")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            scaler = StandardScaler().fit(np.random.default_rng(42).normal(size=(100, 7)))
+            rows = []
+            for name, fp16 in [('legacy', None), ('bundle', '0'), ('bundle fp16', '1')]:
+                model_ids = [f"{name.replace(' ', '_')}_{i}" for i in range(args.models)]
+                size = 0
+                for model_id in model_ids:
+                    trainer = LSTMTrainer(model_id, "PH", scaler)
+                    trainer.model = trainer._build_model()
+                    if fp16 is None:
+                        # 旧格式：网络参数与归一化器分别保存
+                        os.makedirs("cached_models", exist_ok=True)
+                        torch.save(trainer.model.state_dict(), trainer.model_path)
+                        joblib.dump(trainer.scaler, trainer.scaler_path)
+                        size += os.path.getsize(trainer.model_path) + os.path.getsize(trainer.scaler_path)
+                    else:
+                        os.environ["MODEL_BUNDLE_FP16"] = fp16
+                        trainer._save_model()
+                        size += os.path.getsize(trainer.bundle_path)
+                # 预热页缓存
+                load_all(model_ids, mmap=False)
+                rows.append((name, 'read', load_all(model_ids, mmap=False), size))
+                if fp16 is not None:
+                    rows.append((name, 'mmap', load_all(model_ids, mmap=True), size))
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'格式':>12} | {'读取方式':>6} | {'总耗时(ms)':>10} | {'每个模型(ms)':>12} | {'文件总大小(KB)':>14}")
+    for name, mode, seconds, size in rows:
+        print(f"{name:>12} | {mode:>6} | {seconds * 1000:>10.1f} | {seconds * 1000 / args.models:>12.2f} | {size / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
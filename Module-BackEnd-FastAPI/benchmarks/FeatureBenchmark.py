@@ -0,0 +1,67 @@
+"""
+特征工程基准测试
+对比逐行apply与向量化build_time_features的吞吐量（行/秒）
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.FeatureBenchmark
+    python -m benchmarks.FeatureBenchmark --sizes 10000 1000000 10000000 --legacy-max 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from features.TimeFeatures import FEATURE_COLUMNS, UNIX_EPOCH, build_time_features, get_extract_time_features
+
+
+def make_dates(n_rows: int) -> np.ndarray:
+    """ 生成从2018年起、每4小时一条的监测时间序列 """
+    start = np.datetime64('2018-01-01T00:00:00', 'us')
+    return start + np.arange(n_rows, dtype=np.int64) * np.timedelta64(4, 'h')
+
+
+def legacy_features(dates: np.ndarray) -> np.ndarray:
+    """ 原Application.py中逐行apply的特征工程 """
+    df = pd.DataFrame({'date': pd.to_datetime(dates).to_pydatetime()})
+    df['time_diff_hours'] = df['date'].apply(
+        lambda x: (x - UNIX_EPOCH).total_seconds() / 3600
+    )
+    time_features = df['date'].apply(lambda x: pd.Series(get_extract_time_features(x)))
+    df = pd.concat([df, time_features], axis=1)
+    return df[FEATURE_COLUMNS].values.astype(np.float64)
+
+
+def bench(fn, dates: np.ndarray, repeat: int) -> float:
+    """ 返回最优一次的耗时（秒） """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(dates)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="特征工程吞吐量基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--legacy-max', type=int, default=10_000, help="逐行实现只在不超过该行数时运行")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'行数':>12} | {'实现':>8} | {'耗时(s)':>10} | {'行/秒':>14}")
+    for n_rows in args.sizes:
+        dates = make_dates(n_rows)
+
+        elapsed = bench(build_time_features, dates, args.repeat)
+        print(f"{n_rows:>12} | {'向量化':>8} | {elapsed:>10.4f} | {n_rows / elapsed:>14,.0f}")
+
+        if n_rows <= args.legacy_max:
+            # 校验两种实现结果一致
+            np.testing.assert_allclose(build_time_features(dates), legacy_features(dates))
+            elapsed = bench(legacy_features, dates, 1)
+            print(f"{n_rows:>12} | {'逐行':>8} | {elapsed:>10.4f} | {n_rows / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
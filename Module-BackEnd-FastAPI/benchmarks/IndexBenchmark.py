@@ -0,0 +1,121 @@
+"""
+waterquality索引迁移前后的查询延迟对比
+在独立的waterquality_bench表中生成合成数据，分别在迁移前后执行训练与按站点查询
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.IndexBenchmark                      # 使用DB_*环境变量配置的MySQL，1000万行
+    python -m benchmarks.IndexBenchmark --url sqlite:///bench.db --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, create_engine, text
+
+from db.Migration import migrate
+
+BENCH_TABLE = "waterquality_bench"
+# 查询名 -> SQL
+QUERIES = {
+    "训练查询(全表按日期排序)": f"SELECT date, PH FROM {BENCH_TABLE} WHERE PH IS NOT NULL ORDER BY date",
+    "单站点时间范围查询": f"SELECT date, PH FROM {BENCH_TABLE} WHERE station = :station "
+                 f"AND date >= :start AND date < :end ORDER BY date",
+    "单站点最近100条": f"SELECT date, PH FROM {BENCH_TABLE} WHERE station = :station ORDER BY date DESC LIMIT 100",
+    "各站点高水位": f"SELECT station, MAX(date) FROM {BENCH_TABLE} GROUP BY station",
+}
+
+
+def create_bench_table(engine, rows, stations, batch_size=50000):
+    """ 创建不带索引的基准表（结构同water.sql）并写入合成数据 """
+    metadata = MetaData()
+    table = Table(
+        BENCH_TABLE, metadata,
+        Column('id', Integer, primary_key=True),
+        Column('PH', Float),
+        Column('DO', Float),
+        Column('NH3N', Float),
+        Column('date', DateTime, nullable=False),
+        Column('station', Integer),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    if engine.dialect.name == "mysql":
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {BENCH_TABLE} ENGINE = MyISAM"))
+
+    # 每个站点每4小时一条，站点间交错写入（与多站点并行导入的物理顺序一致）
+    rng = np.random.default_rng(42)
+    per_station = -(-rows // stations)
+    start = np.datetime64('2015-01-01T00:00:00', 'us')
+    start_time = time.perf_counter()
+    for batch_start in range(0, rows, batch_size):
+        index = np.arange(batch_start, min(batch_start + batch_size, rows))
+        station = index % stations
+        dates = start + (index // stations) * np.timedelta64(4, 'h')
+        records = [
+            {'PH': ph, 'DO': do, 'NH3N': nh3n, 'date': date, 'station': st}
+            for ph, do, nh3n, date, st in zip(
+                rng.normal(7.5, 0.5, index.size).tolist(),
+                rng.normal(8.0, 1.0, index.size).tolist(),
+                rng.gamma(2.0, 0.2, index.size).tolist(),
+                dates.tolist(),
+                station.tolist(),
+            )
+        ]
+        with engine.begin() as connection:
+            connection.execute(table.insert(), records)
+    print(f"写入 {rows} 行（{stations} 个站点, 每站点 {per_station} 行）, 耗时 {time.perf_counter() - start_time:.1f}s")
+
+
+def time_queries(engine, stations, repeat):
+    """ 执行各查询，返回{查询名: 最优耗时(秒)} """
+    params = {
+        'station': stations // 2,
+        'start': '2016-01-01 00:00:00',
+        'end': '2016-04-01 00:00:00',
+    }
+    results = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            best = float('inf')
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                connection.execute(text(sql), params).fetchall()
+                best = min(best, time.perf_counter() - start_time)
+            results[name] = best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="索引迁移前后的查询延迟对比")
+    parser.add_argument('--url', default=None, help="数据库URL，默认使用DB_*环境变量配置的MySQL")
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--stations', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--innodb', action='store_true', help="迁移时同时转换为InnoDB")
+    parser.add_argument('--keep', action='store_true', help="结束后保留基准表")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from db.Database import engine
+
+    create_bench_table(engine, args.rows, args.stations)
+    try:
+        before = time_queries(engine, args.stations, args.repeat)
+        migrate(engine, table_name=BENCH_TABLE, innodb=args.innodb)
+        after = time_queries(engine, args.stations, args.repeat)
+
+        print(f"\n{'查询':<24} | {'迁移前(ms)':>12} | {'迁移后(ms)':>12} | {'加速比':>8}")
+        for name in QUERIES:
+            print(f"{name:<24} | {before[name] * 1000:>12.1f} | {after[name] * 1000:>12.1f} | "
+                  f"{before[name] / max(after[name], 1e-9):>7.1f}x")
+    finally:
+        if not args.keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
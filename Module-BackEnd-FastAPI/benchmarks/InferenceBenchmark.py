@@ -0,0 +1,96 @@
+"""
+RNN推理基准测试
+在合成数据上训练LSTM/GRU/Bi-RNN，对比eager fp32、TorchScript与动态int8量化三种推理模式的
+测试集RMSE（相对fp32的精度变化）以及单条和批量预测延迟
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.InferenceBenchmark --rows 5000 --epochs 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from features.TimeFeatures import build_time_features
+from trainers.BaseRNNTrainer import INFERENCE_MODES, export_inference_model
+from trainers.BiRNNTrainer import BiRNNTrainer
+from trainers.GRUTrainer import GRUTrainer
+from trainers.LSTMTrainer import LSTMTrainer
+
+TRAINERS = [('LSTM', LSTMTrainer), ('GRU', GRUTrainer), ('BI-RNN', BiRNNTrainer)]
+BATCH_SIZES = [1, 12, 120, 1000]
+
+
+def synthetic_series(rows, seed=42):
+    """ 生成带年周期的合成水质序列 """
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('2015-01-01T00:00') + np.arange(rows) * np.timedelta64(4, 'h')
+    X = build_time_features(dates)
+    y = 7.5 + 0.5 * np.sin(2 * np.pi * X[:, 6] / 365) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def latency_ms(model, X_tensor, repeat):
+    """ 预测延迟中位数（毫秒） """
+    timings = []
+    with torch.no_grad():
+        model(X_tensor)
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            model(X_tensor)
+            timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RNN推理基准测试")
+    parser.add_argument('--rows', type=int, default=5000, help="合成数据行数")
+    parser.add_argument('--epochs', type=int, default=5, help="训练轮数")
+    parser.add_argument('--repeat', type=int, default=50, help="每个批量大小的重复次数（取中位数）")
+    parser.add_argument('--threads', type=int, default=None, help="torch线程数")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    X, y = synthetic_series(args.rows)
+    header = " | ".join(f"{f'批量{batch_size}(ms)':>11}" for batch_size in BATCH_SIZES)
+    print(f"{'模型':>6} | {'模式':>9} | {'RMSE':>8} | {'相对fp32':>9} | {'最大偏差':>8} | {header}")
+
+    for name, trainer_class in TRAINERS:
+        # 在临时目录中训练，不覆盖cached_models中的模型
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                torch.manual_seed(0)
+                trainer = trainer_class(f"benchmark_{name}", "PH", inference_mode="eager")
+                trainer.train(X, y, epochs=args.epochs)
+            finally:
+                os.chdir(cwd)
+
+        # 全部样本上比较各推理模式与fp32网络的预测
+        X_tensor = torch.FloatTensor(trainer._reshape(trainer.scaler.transform(X)))
+        model = trainer.model.cpu().eval()
+        baseline = None
+        for mode in INFERENCE_MODES:
+            inference_model = export_inference_model(model, mode)
+            with torch.no_grad():
+                pred = inference_model(X_tensor).numpy().flatten()
+            if baseline is None:
+                baseline = pred
+            rmse = float(np.sqrt(np.mean((pred - y) ** 2)))
+            baseline_rmse = float(np.sqrt(np.mean((baseline - y) ** 2)))
+            latencies = " | ".join(
+                f"{latency_ms(inference_model, X_tensor[:batch_size], args.repeat):>11.3f}"
+                for batch_size in BATCH_SIZES
+            )
+            print(f"{name:>6} | {mode:>9} | {rmse:>8.4f} | {rmse - baseline_rmse:>+9.5f} | "
+                  f"{np.abs(pred - baseline).max():>8.5f} | {latencies}")
+
+
+if __name__ == "__main__":
+    main()
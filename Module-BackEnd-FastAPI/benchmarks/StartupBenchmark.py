@@ -0,0 +1,77 @@
+"""
+服务启动时间基准测试
+在全新的Python进程中导入Application，对比延迟加载插件与启动时导入全部训练器/调优器（原先的行为）
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.StartupBenchmark --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import Application
+from services.Plugins import TRAINERS, TUNERS
+if {eager}:
+    for registry in (TRAINERS, TUNERS):
+        for name in registry.names():
+            registry.resolve(name)
+ready = time.perf_counter()
+torch_loaded = "torch" in sys.modules
+
+TRAINERS.create("LSTM", 0, "PH")
+first_rnn = time.perf_counter()
+
+print(json.dumps({{
+    "import_seconds": ready - start,
+    "first_rnn_seconds": first_rnn - start,
+    "torch_at_ready": torch_loaded,
+}}))
+"""
+
+
+def measure(eager):
+    """
+    在子进程中测量一次启动
+    :return: 包含进程总耗时的测量结果
+    """
+    start_time = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(eager=eager)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start_time
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="服务启动时间基准测试")
+    parser.add_argument('--repeat', type=int, default=5, help="每种模式的重复次数（取中位数）")
+    args = parser.parse_args()
+
+    # 预热文件系统缓存与.pyc
+    measure(True)
+
+    print(f"{'模式':>6} | {'导入Application(s)':>18} | {'首次使用RNN(s)':>14} | {'进程总耗时(s)':>13} | 就绪时已加载torch")
+    medians = {}
+    for name, eager in [('eager', True), ('lazy', False)]:
+        results = [measure(eager) for _ in range(args.repeat)]
+        medians[name] = {key: statistics.median(result[key] for result in results)
+                         for key in ("import_seconds", "first_rnn_seconds", "process_seconds")}
+        print(f"{name:>6} | {medians[name]['import_seconds']:>18.3f} | {medians[name]['first_rnn_seconds']:>14.3f} | "
+              f"{medians[name]['process_seconds']:>13.3f} | {results[0]['torch_at_ready']}")
+
+    print(f"\n就绪时间缩短为原来的 {medians['lazy']['import_seconds'] / medians['eager']['import_seconds']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+模型服务基准测试套件
+在合成的多站点水质数据上（SQLite替身数据库，无需MySQL）测量：
+- 训练：各训练方法经TrainingService.train的各阶段耗时（fetch / featurize / scale / fit / evaluate / save）
+- 预测：经模型缓存的单点预测与12步批量预测延迟
+- 调优：随机搜索的试验数/小时
+结果可保存为JSON基线，之后的运行与基线比较并标出退化的指标
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.Suite --save-baseline main
+    python -m benchmarks.Suite --compare main --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import Synthetic
+from db.Model import Model
+from features.TimeFeatures import build_horizon_dates, build_time_features, calculate_next_month
+from services import TrainingService
+from services.ModelRegistry import ModelRegistry
+
+METHODS = ["ADABOOST", "SVM", "LSTM", "GRU", "BI-RNN"]
+RNN_METHODS = ["LSTM", "GRU", "BI-RNN"]
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def percentile(timings, q):
+    """ 百分位数（最近秩） """
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def create_models(session_factory, methods, target):
+    """
+    为每种训练方法插入一条模型记录
+    :return: 训练方法 -> 模型ID
+    """
+    db = session_factory()
+    try:
+        models = {method: Model(name=f"bench_{method}", target=target, method=method, uid=1, date=datetime.now())
+                  for method in methods}
+        db.add_all(models.values())
+        db.commit()
+        return {method: model.id for method, model in models.items()}
+    finally:
+        db.close()
+
+
+def bench_training(model_ids, train_options):
+    """
+    依次训练各方法的模型
+    :return: 训练方法 -> 各阶段耗时、总耗时与RMSE
+    """
+    results = {}
+    for method, model_id in model_ids.items():
+        # 清空序列缓存，fetch阶段每次都从数据库读取
+        TrainingService.series_cache.invalidate()
+        start_time = time.perf_counter()
+        result = TrainingService.train(model_id, stages=True, **(train_options if method in RNN_METHODS else {}))
+        results[method] = {
+            **result["stages"],
+            "total": round(time.perf_counter() - start_time, 4),
+            "rmse": result["rmse"],
+        }
+        print(f"- {method}: {results[method]}")
+    return results
+
+
+def bench_prediction(model_ids, target, repeat):
+    """
+    测量经模型缓存的预测延迟（与/api/prediction、/api/forecast相同的调用路径）
+    :return: 训练方法 -> 首次加载耗时与延迟百分位数（毫秒）
+    """
+    registry = ModelRegistry(TrainingService.create_trainer)
+    single = build_time_features([calculate_next_month(datetime.now().year, 1)])
+    batch = build_time_features(build_horizon_dates(datetime.now(), 12))
+
+    results = {}
+    for method, model_id in model_ids.items():
+        start_time = time.perf_counter()
+        registry.get(model_id, method, target).predict(single)
+        result = {"load_ms": (time.perf_counter() - start_time) * 1000}
+        for name, features in [("single", single), ("batch12", batch)]:
+            timings = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                registry.get(model_id, method, target).predict(features)
+                timings.append((time.perf_counter() - start_time) * 1000)
+            result[f"{name}_p50_ms"] = statistics.median(timings)
+            result[f"{name}_p95_ms"] = percentile(timings, 95)
+        results[method] = {key: round(value, 4) for key, value in result.items()}
+        print(f"- {method}: {results[method]}")
+    return results
+
+
+def bench_tuning(model_id, trials, time_budget):
+    """
+    随机搜索调优吞吐量
+    :return: 完成/剪枝的试验数、耗时与试验数/小时
+    """
+    start_time = time.perf_counter()
+    result = TrainingService.tune(model_id, "random", time_budget=time_budget, max_trials=trials)
+    seconds = time.perf_counter() - start_time
+    results = {
+        "seconds": round(seconds, 3),
+        "trials": result["trials"],
+        "pruned_trials": result["pruned_trials"],
+        "trials_per_hour": round(3600 * result["trials"] / seconds, 2),
+    }
+    print(f"- {results}")
+    return results
+
+
+def run(args):
+    """ 在临时目录中生成数据并运行全部基准测试 """
+    config = {
+        "stations": args.stations,
+        "rows_per_station": args.rows_per_station,
+        "target": args.target,
+        "methods": args.methods,
+        "epochs": args.epochs,
+        "tuner_trials": args.tuner_trials,
+        "tuner_budget": args.tuner_budget,
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # 模型文件与调优研究写入临时目录，不覆盖cached_models
+        os.chdir(directory)
+        try:
+            engine, session_factory = Synthetic.create_standin()
+            rows = Synthetic.load(engine, Synthetic.generate(args.stations, args.rows_per_station, seed=args.seed))
+            print(f"合成数据: {rows}行（{args.stations}个站点）")
+            TrainingService.SessionLocal = session_factory
+
+            model_ids = create_models(session_factory, args.methods, args.target)
+            print("训练:")
+            training = bench_training(model_ids, {"epochs": args.epochs})
+            print("预测:")
+            prediction = bench_prediction(model_ids, args.target, args.repeat)
+            tuning = {}
+            if args.tuner_trials > 0:
+                print("调优:")
+                tuning = bench_tuning(create_models(session_factory, ["LSTM"], args.target)["LSTM"],
+                                      args.tuner_trials, args.tuner_budget)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "config": config,
+        },
+        "training": training,
+        "prediction": prediction,
+        "tuning": tuning,
+    }
+
+
+def flatten(results):
+    """ 将training / prediction / tuning展开为 指标路径 -> 数值 """
+    metrics = {}
+    for section in ("training", "prediction", "tuning"):
+        for key, value in results.get(section, {}).items():
+            if isinstance(value, dict):
+                for name, metric in value.items():
+                    metrics[f"{section}.{key}.{name}"] = metric
+            else:
+                metrics[f"{section}.{key}"] = value
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基线比较
+    耗时/延迟越小越好，*_per_hour越大越好，RMSE与试验计数只作参考
+    绝对变化小于噪声下限（耗时5ms，延迟0.5ms）的指标不视为退化
+    :param tolerance: 允许的相对变化，超过时视为退化
+    :return: 退化的指标列表
+    """
+    if results["meta"]["config"] != baseline["meta"]["config"]:
+        print("警告: 与基线的数据规模或参数不同，比较结果仅供参考")
+
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"{'指标':<40} | {'基线':>10} | {'本次':>10} | {'变化':>8}")
+    for name, value in current.items():
+        base = previous.get(name)
+        if base is None:
+            continue
+        change = (value - base) / base if base else 0.0
+        noise_floor = 0.5 if name.endswith("_ms") else 0.005
+        if name.endswith("rmse") or name.endswith("trials") or abs(value - base) < noise_floor:
+            flag = ""
+        elif name.endswith("per_hour"):
+            flag = "退化" if change < -tolerance else ""
+        else:
+            flag = "退化" if change > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<40} | {base:>10.4f} | {value:>10.4f} | {change:>+8.1%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型服务基准测试套件")
+    parser.add_argument('--stations', type=int, default=5, help="站点数")
+    parser.add_argument('--rows-per-station', type=int, default=2000, help="每个站点的记录数")
+    parser.add_argument('--target', default="PH", choices=["PH", "DO", "NH3N"], help="预测指标")
+    parser.add_argument('--methods', nargs='+', default=METHODS, choices=METHODS, help="训练方法")
+    parser.add_argument('--epochs', type=int, default=20, help="RNN训练轮数")
+    parser.add_argument('--repeat', type=int, default=100, help="预测延迟的重复次数")
+    parser.add_argument('--tuner-trials', type=int, default=5, help="随机搜索试验数（0表示跳过调优）")
+    parser.add_argument('--tuner-budget', type=float, default=300, help="调优时间预算（秒）")
+    parser.add_argument('--seed', type=int, default=42, help="合成数据随机种子")
+    parser.add_argument('--output', help="结果JSON的保存路径")
+    parser.add_argument('--save-baseline', metavar='NAME', help=f"保存为基线 {BASELINE_DIR}/NAME.json")
+    parser.add_argument('--compare', metavar='NAME', help="与指定基线比较，有指标退化时返回非零退出码")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对变化（默认20%%）")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    paths = [args.output] if args.output else []
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        paths.append(os.path.join(BASELINE_DIR, f"{args.save_baseline}.json"))
+    for path in paths:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)}项指标退化超过{args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n没有指标退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+合成水质数据与SQLite替身数据库
+生成多站点PH/DO/NH3N序列，写入与MySQL结构相同的SQLite库，供基准测试在没有MySQL的环境中运行
+"""
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db.Model import Base, WaterQuality
+
+
+def generate(stations=5, rows_per_station=2000, freq_hours=4, missing_rate=0.02, seed=42):
+    """
+    生成多站点合成水质序列（年周期 + 日周期 + 噪声，随机缺测）
+    :param stations: 站点数
+    :param rows_per_station: 每个站点的记录数
+    :param freq_hours: 采样间隔（小时）
+    :param missing_rate: 每个指标的缺测比例
+    :return: 列名 -> numpy数组（date / station / PH / DO / NH3N，缺测为NaN）
+    """
+    rng = np.random.default_rng(seed)
+    steps = np.arange(rows_per_station)
+    dates = np.datetime64('2015-01-01T00:00:00', 'us') + steps * np.timedelta64(freq_hours, 'h')
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype('timedelta64[D]').astype(np.float64)
+    hour = (dates - dates.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.float64)
+    season = np.sin(2 * np.pi * day_of_year / 365.25)
+    daily = np.sin(2 * np.pi * hour / 24)
+
+    columns = {name: [] for name in ("date", "station", "PH", "DO", "NH3N")}
+    for station in range(1, stations + 1):
+        offset = rng.normal(scale=0.2)
+        columns["date"].append(dates)
+        columns["station"].append(np.full(rows_per_station, station, dtype=np.int64))
+        columns["PH"].append(7.5 + offset + 0.3 * season + 0.05 * daily + rng.normal(scale=0.1, size=rows_per_station))
+        # 溶解氧与水温负相关：夏季低、冬季高
+        columns["DO"].append(8.0 - 1.5 * season + 0.3 * daily + rng.normal(scale=0.3, size=rows_per_station))
+        columns["NH3N"].append(rng.gamma(2.0, 0.2 + 0.05 * (1 + season), size=rows_per_station))
+
+    data = {name: np.concatenate(values) for name, values in columns.items()}
+    for name in ("PH", "DO", "NH3N"):
+        data[name][rng.random(data[name].size) < missing_rate] = np.nan
+    return data
+
+
+def create_standin(path=None):
+    """
+    创建SQLite替身数据库（表结构与db/Model.py一致）
+    :param path: 数据库文件路径，None表示内存数据库
+    :return: (engine, 会话工厂)
+    """
+    if path is None:
+        # 内存库只存在于单个连接中，所有会话共用同一连接
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def load(engine, data, batch_size=50000):
+    """
+    将合成数据批量写入waterquality表
+    :return: 写入行数
+    """
+    rows = data["date"].size
+    with engine.begin() as connection:
+        for start in range(0, rows, batch_size):
+            end = min(start + batch_size, rows)
+            records = [
+                {
+                    "date": date,
+                    "station": station,
+                    **{name: (None if np.isnan(value) else value) for name, value in zip(("PH", "DO", "NH3N"), values)}
+                }
+                for date, station, *values in zip(
+                    data["date"][start:end].tolist(),
+                    data["station"][start:end].tolist(),
+                    data["PH"][start:end].tolist(),
+                    data["DO"][start:end].tolist(),
+                    data["NH3N"][start:end].tolist(),
+                )
+            ]
+            connection.execute(insert(WaterQuality.__table__), records)
+    return rows
@@ -0,0 +1,90 @@
+"""
+调优器单次试验吞吐量基准测试
+对比每轮重建DataLoader与张量原生小批量迭代器，覆盖hidden_size × batch_size网格
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m benchmarks.TunerBenchmark --rows 5000 --epochs 5
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from trainers.LSTMTrainer import LSTMModel
+from trainers.MiniBatch import MiniBatchIterator
+
+HIDDEN_SIZES = [32, 64, 128, 256]
+BATCH_SIZES = [16, 32, 64, 128]
+
+
+def dataloader_epochs(model, X, y, batch_size, epochs):
+    """ 原BaseTuner.evaluate_model的训练循环：每轮重建TensorDataset和DataLoader """
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    criterion = nn.MSELoss()
+    model.train()
+    for _ in range(epochs):
+        train_dataset = torch.utils.data.TensorDataset(X, y)
+        train_loader = torch.utils.data.DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        for X_batch, y_batch in train_loader:
+            optimizer.zero_grad()
+            criterion(model(X_batch), y_batch).backward()
+            optimizer.step()
+
+
+def tensor_epochs(model, X, y, batch_size, epochs):
+    """ 当前的训练循环：迭代器只构建一次，按随机排列切片 """
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    criterion = nn.MSELoss()
+    batches = MiniBatchIterator(X, y, batch_size=batch_size)
+    model.train()
+    for _ in range(epochs):
+        for X_batch, y_batch in batches:
+            optimizer.zero_grad()
+            criterion(model(X_batch), y_batch).backward()
+            optimizer.step()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="调优试验吞吐量基准测试")
+    parser.add_argument('--rows', type=int, default=5000, help="训练集样本数")
+    parser.add_argument('--epochs', type=int, default=5, help="每次试验的轮数（按比例换算为试验/小时）")
+    parser.add_argument('--trial-epochs', type=int, default=125, help="换算试验/小时时假设的每次试验轮数（搜索空间均值）")
+    parser.add_argument('--threads', type=int, default=None, help="torch线程数")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    rng = np.random.default_rng(42)
+    X = torch.FloatTensor(rng.normal(size=(args.rows, 1, 7)))
+    y = torch.FloatTensor(rng.normal(size=(args.rows, 1)))
+
+    # 预热，避免首个配置计入初始化开销
+    for fn in [dataloader_epochs, tensor_epochs]:
+        fn(LSTMModel(input_size=7, hidden_size=HIDDEN_SIZES[0]), X, y, BATCH_SIZES[-1], 1)
+
+    print(f"{'hidden':>6} | {'batch':>5} | {'DataLoader 试验/时':>18} | {'张量切片 试验/时':>16} | {'加速比':>6}")
+    totals = {'dataloader': 0.0, 'tensor': 0.0}
+    for hidden_size in HIDDEN_SIZES:
+        for batch_size in BATCH_SIZES:
+            seconds = {}
+            for name, fn in [('dataloader', dataloader_epochs), ('tensor', tensor_epochs)]:
+                torch.manual_seed(0)
+                model = LSTMModel(input_size=7, hidden_size=hidden_size, num_layers=2)
+                start_time = time.perf_counter()
+                fn(model, X, y, batch_size, args.epochs)
+                # 换算为一次完整试验的耗时
+                seconds[name] = (time.perf_counter() - start_time) / args.epochs * args.trial_epochs
+                totals[name] += seconds[name]
+            print(f"{hidden_size:>6} | {batch_size:>5} | {3600 / seconds['dataloader']:>18.1f} | "
+                  f"{3600 / seconds['tensor']:>16.1f} | {seconds['dataloader'] / seconds['tensor']:>5.2f}x")
+
+    trials = len(HIDDEN_SIZES) * len(BATCH_SIZES)
+    print(f"\n整个网格: DataLoader {3600 * trials / totals['dataloader']:.1f} 试验/时, "
+          f"张量切片 {3600 * trials / totals['tensor']:.1f} 试验/时, "
+          f"加速比 {totals['dataloader'] / totals['tensor']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 加载环境变量
+load_dotenv()
+
+########################### 数据库 ###########################
+# 数据库连接配置
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_NAME = os.getenv("DB_NAME", "water")
+##############################################################
+
+# 创建数据库引擎（连接在首次使用时才建立，子进程导入本模块会得到各自独立的连接池）
+engine = create_engine(
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+    pool_pre_ping = True,
+    pool_recycle = 300,  # 5分钟回收一次连接
+    pool_size = 10
+)
+# 创建会话工厂
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
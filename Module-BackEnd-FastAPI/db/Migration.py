@@ -0,0 +1,156 @@
+"""
+waterquality表结构迁移
+为已有数据库补充db/Model.py中声明的时间序列索引与model表新增的列，删除冗余索引，可选转换为InnoDB
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m db.Migration --dry-run
+    python -m db.Migration --dedupe --innodb
+"""
+import argparse
+import time
+
+from sqlalchemy import Index, MetaData, Table, inspect, text
+
+from db.Model import Model, WaterQuality
+
+# 与主键重复的唯一索引
+REDUNDANT_INDEXES = ["waterquality_id_uindex"]
+
+
+def declared_indexes(table_name=WaterQuality.__tablename__):
+    """
+    ORM中声明的索引，索引名中的表名前缀替换为table_name
+    :return: [(索引名, [列名], 是否唯一)]
+    """
+    prefix = WaterQuality.__tablename__
+    return [
+        (table_name + index.name[len(prefix):], [column.name for column in index.columns], bool(index.unique))
+        for index in sorted(WaterQuality.__table__.indexes, key=lambda index: index.name)
+    ]
+
+
+def missing_columns(engine, model=Model):
+    """
+    ORM中声明但数据库表中不存在的列（只补充可为空的列，不迁移已有数据）
+    :return: [列名]
+    """
+    existing = {column['name'] for column in inspect(engine).get_columns(model.__tablename__)}
+    return [column.name for column in model.__table__.columns if column.name not in existing]
+
+
+def count_duplicates(connection, table_name):
+    """ 统计(station, date)重复的多余行数 """
+    return connection.execute(text(
+        f"SELECT COALESCE(SUM(cnt - 1), 0) FROM ("
+        f"SELECT COUNT(*) AS cnt FROM {table_name} WHERE station IS NOT NULL "
+        f"GROUP BY station, date HAVING COUNT(*) > 1) d"
+    )).scalar()
+
+
+def remove_duplicates(connection, table_name):
+    """ 删除(station, date)重复的行，保留id最大的一条 """
+    return connection.execute(text(
+        f"DELETE FROM {table_name} WHERE station IS NOT NULL AND id NOT IN ("
+        f"SELECT id FROM (SELECT MAX(id) AS id FROM {table_name} "
+        f"WHERE station IS NOT NULL GROUP BY station, date) keep_ids)"
+    )).rowcount
+
+
+def table_engine(connection, table_name):
+    """ MySQL存储引擎，其他数据库返回None """
+    if connection.dialect.name != "mysql":
+        return None
+    return connection.execute(
+        text("SELECT ENGINE FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"),
+        {"name": table_name}
+    ).scalar()
+
+
+def plan(engine, table_name=WaterQuality.__tablename__, innodb=False):
+    """
+    对比当前表结构，生成待执行的迁移步骤
+    :return: [(步骤类型, 参数)]
+    """
+    existing = {index['name'] for index in inspect(engine).get_indexes(table_name)}
+    steps = []
+
+    if innodb:
+        with engine.connect() as connection:
+            current = table_engine(connection, table_name)
+        if current is not None and current.upper() != "INNODB":
+            steps.append(("engine", "InnoDB"))
+
+    for name in REDUNDANT_INDEXES:
+        name = table_name + name[len(WaterQuality.__tablename__):]
+        if name in existing:
+            steps.append(("drop_index", name))
+
+    for name, columns, unique in declared_indexes(table_name):
+        if name not in existing:
+            steps.append(("create_index", (name, columns, unique)))
+
+    # model表只随正式的waterquality表一起迁移
+    if table_name == WaterQuality.__tablename__ and inspect(engine).has_table(Model.__tablename__):
+        for name in missing_columns(engine):
+            steps.append(("add_column", (Model.__tablename__, name)))
+    return steps
+
+
+def migrate(engine, table_name=WaterQuality.__tablename__, innodb=False, dedupe=False, dry_run=False):
+    """
+    执行迁移，已完成的步骤会被跳过，可重复执行
+    :param innodb: 是否转换为InnoDB（仅MySQL）
+    :param dedupe: 创建唯一索引前是否删除(station, date)重复的行
+    :param dry_run: 只打印步骤不执行
+    :return: 执行（或计划执行）的步骤
+    """
+    steps = plan(engine, table_name, innodb)
+    if not steps:
+        print("表结构已是最新")
+        return steps
+
+    for kind, arg in steps:
+        print(f"- {kind}: {arg}")
+    if dry_run:
+        return steps
+
+    for kind, arg in steps:
+        start_time = time.perf_counter()
+        with engine.begin() as connection:
+            table = Table(table_name, MetaData(), autoload_with=connection)
+
+            if kind == "engine":
+                connection.execute(text(f"ALTER TABLE {table_name} ENGINE = {arg}"))
+
+            elif kind == "drop_index":
+                next(index for index in table.indexes if index.name == arg).drop(connection)
+
+            elif kind == "add_column":
+                model_table, name = arg
+                column_type = Model.__table__.c[name].type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {model_table} ADD COLUMN {name} {column_type} NULL"))
+
+            else:
+                name, columns, unique = arg
+                if unique:
+                    duplicates = count_duplicates(connection, table_name)
+                    if duplicates and not dedupe:
+                        raise RuntimeError(f"存在 {duplicates} 条(station, date)重复数据，请使用--dedupe删除后再创建唯一索引")
+                    if duplicates:
+                        print(f"  删除 {remove_duplicates(connection, table_name)} 条重复数据")
+                Index(name, *[table.c[column] for column in columns], unique=unique).create(connection)
+
+        print(f"  {kind} 完成, 耗时 {time.perf_counter() - start_time:.2f}s")
+    return steps
+
+
+if __name__ == "__main__":
+    from db.Database import engine as db_engine
+
+    parser = argparse.ArgumentParser(description="waterquality表结构迁移")
+    parser.add_argument('--innodb', action='store_true', help="将表转换为InnoDB")
+    parser.add_argument('--dedupe', action='store_true', help="创建唯一索引前删除(station, date)重复的行")
+    parser.add_argument('--dry-run', action='store_true', help="只打印步骤不执行")
+    args = parser.parse_args()
+
+    migrate(db_engine, innodb=args.innodb, dedupe=args.dedupe, dry_run=args.dry_run)
@@ -1,5 +1,5 @@
 # 基础模型类
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -14,13 +14,19 @@ class Model(Base):
     rmse = Column(Float)  # 均方根误差
     uid = Column(Integer, nullable=False)
     date = Column(DateTime, nullable=False)
+    station = Column(Integer)  # 训练数据所属站点，NULL表示全部站点
 # 定义WaterQuality表
 class WaterQuality(Base):
     __tablename__ = "waterquality"
+    # 时间序列索引，由db/Migration.py应用到已有数据库
+    __table_args__ = (
+        Index("waterquality_date_index", "date"),
+        Index("waterquality_station_date_uindex", "station", "date", unique=True),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    PH = Column(Float, nullable=False)
-    DO = Column(Float, nullable=False)
-    NH3N = Column(Float, nullable=False)
+    id = Column(Integer, primary_key=True)
+    PH = Column(Float)
+    DO = Column(Float)
+    NH3N = Column(Float)
     date = Column(DateTime, nullable=False)
-    station = Column(Integer, nullable=False)
\ No newline at end of file
+    station = Column(Integer)
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from db.Model import WaterQuality
+from monitoring.Metrics import DB_FETCH_SECONDS, DB_ROWS_FETCHED
+
+
+class CachedSeries:
+    """
+    单条时间序列（按日期升序）
+    """
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.dates = np.empty(0, dtype='datetime64[us]')
+        self.values = np.empty(0, dtype=np.float64)
+        # 高水位：已同步的最大id
+        self.max_id = 0
+        self.loaded_at = 0.0
+
+    def append(self, rows):
+        """
+        追加新行并保持日期有序
+        :param rows: [(id, date, value)]
+        """
+        ids, dates, values = zip(*rows)
+        new_ids = np.array(ids, dtype=np.int64)
+        new_dates = np.array(dates, dtype='datetime64[us]')
+        new_values = np.array(values, dtype=np.float64)
+
+        order = np.argsort(new_dates, kind='stable')
+        new_ids, new_dates, new_values = new_ids[order], new_dates[order], new_values[order]
+
+        # 新数据全部晚于已有数据时直接拼接，否则（补录历史数据）做一次归并排序
+        needs_merge = self.dates.size > 0 and new_dates[0] < self.dates[-1]
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.dates = np.concatenate([self.dates, new_dates])
+        self.values = np.concatenate([self.values, new_values])
+        if needs_merge:
+            order = np.argsort(self.dates, kind='stable')
+            self.ids, self.dates, self.values = self.ids[order], self.dates[order], self.values[order]
+
+        self.max_id = max(self.max_id, int(new_ids.max()))
+
+
+class SeriesCache:
+    """
+    waterquality表的进程内增量缓存
+    每条(指标, 站点)序列记录已同步的最大id，再次读取时只查询id更大的新行
+    已有行被修改或删除时无法通过高水位感知，超过ttl后整体重新加载
+    """
+    def __init__(self, ttl=None):
+        """
+        :param ttl: 整体重新加载的间隔（秒），默认读取环境变量SERIES_CACHE_TTL，0表示不过期
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv("SERIES_CACHE_TTL", "3600"))
+        # (target, station) -> CachedSeries
+        self._series = {}
+        self._lock = threading.Lock()
+
+# private
+    @staticmethod
+    def _fetch(db, target_name, station, after_id):
+        """ 查询id大于after_id的非空数据 """
+        # noinspection PyTypeChecker
+        target_column = getattr(WaterQuality, target_name)
+        query = (
+            db.query(WaterQuality.id, WaterQuality.date, target_column)
+            .filter(target_column.isnot(None), WaterQuality.id > after_id)
+        )
+        if station is not None:
+            query = query.filter(WaterQuality.station == station)
+        start_time = time.perf_counter()
+        rows = query.order_by(WaterQuality.id).all()
+        DB_FETCH_SECONDS.observe(time.perf_counter() - start_time, target=target_name)
+        DB_ROWS_FETCHED.observe(len(rows), target=target_name)
+        return rows
+# public
+    def get(self, db, target_name, station=None):
+        """
+        获取序列，先增量同步新数据
+        :param db: 数据库会话
+        :param target_name: 指标名 PH / DO / NH3N
+        :param station: 站点，None表示全部站点
+        :return: (dates, values) 按日期升序的datetime64数组与float64数组，调用方不应原地修改
+        """
+        key = (target_name, station)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None or (self.ttl and time.time() - series.loaded_at > self.ttl):
+                series = CachedSeries()
+                series.loaded_at = time.time()
+                self._series[key] = series
+
+            rows = self._fetch(db, target_name, station, series.max_id)
+            if rows:
+                series.append(rows)
+                print(f"- 序列缓存({target_name}, 站点{station}): 新增 {len(rows)} 条, 共 {series.dates.size} 条")
+
+            return series.dates, series.values
+
+    def invalidate(self, target_name=None, station=None):
+        """
+        使缓存失效
+        :param target_name: 指标名，None表示全部序列
+        :param station: 站点，None表示该指标的全部站点
+        """
+        with self._lock:
+            for key in list(self._series):
+                if target_name is None or (key[0] == target_name and (station is None or key[1] == station)):
+                    del self._series[key]
@@ -0,0 +1,335 @@
+"""
+waterquality表的列式快照
+每列一个连续的.npy文件（按日期升序），以内存映射方式打开，训练时可代替数据库查询
+
+用法（在Module-BackEnd-FastAPI目录下）:
+    python -m db.Snapshot export   # 全量导出
+    python -m db.Snapshot refresh  # 增量追加新数据
+
+增量刷新以id为高水位，只能感知新插入的行；已有行被修改（导入时按(station, date)覆盖写入）时id不变，无法感知。
+因此刷新时发现行数与数据库不一致（删除、Migration --dedupe）或距上次全量导出超过SNAPSHOT_TTL时改为全量导出，
+导入程序写入数据后也会全量导出快照。
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+from sqlalchemy import func
+
+from db.Model import WaterQuality
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，以msvcrt锁定锁文件的第一个字节
+    fcntl = None
+    import msvcrt
+
+# 列名 -> (数据类型, 空值填充)
+COLUMNS = {
+    'id': (np.int64, 0),
+    'date': ('datetime64[us]', np.datetime64('NaT')),
+    'PH': (np.float64, np.nan),
+    'DO': (np.float64, np.nan),
+    'NH3N': (np.float64, np.nan),
+    'station': (np.int32, -1),
+}
+META_FILE = "meta.json"
+# 导出/刷新的进程间排他锁文件
+LOCK_FILE = ".lock"
+# 打开快照时列文件被并发刷新删除后的重试次数
+OPEN_RETRIES = 5
+# 每批从数据库读取的行数
+FETCH_CHUNK = 100_000
+# 距上次全量导出超过该秒数时，刷新改为全量导出，以包含已有行的修改；0表示不过期
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", "86400"))
+
+
+def _to_column(values, name):
+    """ 将查询结果中的一列转换为数组，空值替换为填充值 """
+    dtype, fill = COLUMNS[name]
+    return np.array([fill if value is None else value for value in values], dtype=dtype)
+
+
+class Snapshot:
+    """
+    已打开的快照，各列均为只读的内存映射数组
+    """
+    def __init__(self, path, meta, columns):
+        self.path = path
+        self.meta = meta
+        self.columns = columns
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def max_id(self):
+        return self.meta['max_id']
+
+    @classmethod
+    def open(cls, path):
+        """
+        打开快照
+        :return: Snapshot，快照不存在时返回None
+        """
+        meta_path = os.path.join(path, META_FILE)
+        for attempt in range(OPEN_RETRIES):
+            if not os.path.exists(meta_path):
+                return None
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            try:
+                columns = {
+                    name: np.load(os.path.join(path, f"{name}.{meta['generation']}.npy"), mmap_mode='r')
+                    for name in COLUMNS
+                }
+            except FileNotFoundError:
+                # 读取meta后其他进程提交了新一代并删除了这一代文件，重新读取meta
+                if attempt == OPEN_RETRIES - 1:
+                    raise
+                continue
+            return cls(path, meta, columns)
+
+    def series(self, target_name, start=None, end=None, station=None):
+        """
+        按指标和日期范围切片
+        日期范围切片与列选择都不复制数据；存在空值或按站点过滤时才生成副本
+        :param target_name: 指标名 PH / DO / NH3N
+        :param start: 起始时间（含），None表示不限
+        :param end: 结束时间（不含），None表示不限
+        :param station: 站点，None表示全部站点
+        :return: (dates, values)
+        """
+        dates = self.columns['date']
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'us'), side='left'))
+        hi = dates.size if end is None else int(np.searchsorted(dates, np.datetime64(end, 'us'), side='left'))
+
+        dates = dates[lo:hi]
+        values = self.columns[target_name][lo:hi]
+
+        mask = None
+        if station is not None:
+            mask = self.columns['station'][lo:hi] == station
+        if np.isnan(values).any():
+            not_null = ~np.isnan(values)
+            mask = not_null if mask is None else mask & not_null
+        if mask is not None:
+            dates, values = dates[mask], values[mask]
+        return dates, values
+
+
+@contextmanager
+def exclusive(path):
+    """
+    目录级的进程间排他锁（锁文件为目录下的LOCK_FILE）
+    多个工作进程同时刷新快照时依次执行，不会计算出相同的新一代编号并写入同一组文件
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK重试10秒后仍未获得锁
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_generation(path, generation, chunks, rows):
+    """
+    将数据块写入新一代列文件
+    先写入唯一的临时文件，全部写完后再替换为正式文件名，不会截断其他进程可能已映射的文件
+    :param chunks: 可迭代的{列名: 数组}，整体需按日期升序
+    """
+    token = uuid.uuid4().hex
+    temp_paths = {name: os.path.join(path, f"{name}.{generation}.{token}.tmp") for name in COLUMNS}
+    try:
+        if rows == 0:
+            # 空文件无法映射，直接写入空数组
+            for name, (dtype, _) in COLUMNS.items():
+                with open(temp_paths[name], 'wb') as f:
+                    np.save(f, np.empty(0, dtype=dtype))
+            offset = 0
+        else:
+            outputs = {
+                name: np.lib.format.open_memmap(temp_paths[name], mode='w+', dtype=dtype, shape=(rows,))
+                for name, (dtype, _) in COLUMNS.items()
+            }
+            offset = 0
+            for chunk in chunks:
+                size = chunk['id'].size
+                for name, output in outputs.items():
+                    output[offset:offset + size] = chunk[name]
+                offset += size
+            for output in outputs.values():
+                output.flush()
+            del outputs
+
+        for name, temp_path in temp_paths.items():
+            os.replace(temp_path, os.path.join(path, f"{name}.{generation}.npy"))
+    except BaseException:
+        for temp_path in temp_paths.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    return offset
+
+
+def _commit_generation(path, generation, rows, max_id, old_meta, exported_at):
+    """
+    原子替换meta.json指向新一代文件，并删除上一代文件
+    :param exported_at: 最近一次全量导出的时间戳
+    """
+    meta = {
+        'generation': generation,
+        'rows': rows,
+        'max_id': max_id,
+        'exported_at': exported_at,
+        'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    tmp_path = os.path.join(path, META_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
+
+    # 已打开旧快照的进程仍持有映射，删除文件不影响其读取
+    if old_meta is not None:
+        for name in COLUMNS:
+            try:
+                os.remove(os.path.join(path, f"{name}.{old_meta['generation']}.npy"))
+            except FileNotFoundError:
+                pass
+    return meta
+
+
+def _query_chunks(db, after_id=0, upto_id=None):
+    """ 分批查询id在(after_id, upto_id]内的数据，按日期升序 """
+    query = (
+        db.query(
+            WaterQuality.id, WaterQuality.date, WaterQuality.PH,
+            WaterQuality.DO, WaterQuality.NH3N, WaterQuality.station
+        )
+        .filter(WaterQuality.id > after_id)
+        .filter(WaterQuality.id <= upto_id if upto_id is not None else True)
+        .order_by(WaterQuality.date, WaterQuality.id)
+        .yield_per(FETCH_CHUNK)
+    )
+    batch = []
+    for row in query:
+        batch.append(row)
+        if len(batch) == FETCH_CHUNK:
+            yield _rows_to_chunk(batch)
+            batch = []
+    if batch:
+        yield _rows_to_chunk(batch)
+
+
+def _rows_to_chunk(rows):
+    """ 行转列 """
+    columns = list(zip(*rows))
+    return {name: _to_column(columns[index], name) for index, name in enumerate(COLUMNS)}
+
+
+def export(db, path):
+    """
+    全量导出快照（持有快照目录的排他锁）
+    :return: 导出的行数
+    """
+    with exclusive(path):
+        return _export(db, path)
+
+
+def _export(db, path):
+    """ 全量导出快照（调用方持有锁） """
+    old = Snapshot.open(path)
+    old_meta = old.meta if old else None
+    generation = old_meta['generation'] + 1 if old_meta else 1
+
+    # 以导出开始时的最大id为界，避免导出期间插入的数据使行数不一致
+    max_id = db.query(func.max(WaterQuality.id)).scalar() or 0
+    rows = db.query(func.count(WaterQuality.id)).filter(WaterQuality.id <= max_id).scalar()
+    written = _write_generation(path, generation, _query_chunks(db, upto_id=max_id), rows)
+    _commit_generation(path, generation, written, max_id, old_meta, time.time())
+    return written
+
+
+def refresh(db, path):
+    """
+    增量刷新快照：只查询id大于快照高水位的新数据
+    新数据全部晚于快照末尾时直接追加，否则与已有数据归并排序
+    快照已过期（SNAPSHOT_TTL）或高水位内的行数与数据库不一致（有行被删除）时改为全量导出
+    持有快照目录的排他锁，并发刷新时后到的进程在锁内重新读取快照，只追加前一个进程之后的新数据
+    :return: 增量刷新时为新增的行数，全量导出时为导出的行数
+    """
+    with exclusive(path):
+        snapshot = Snapshot.open(path)
+        if snapshot is None or _stale(db, snapshot):
+            return _export(db, path)
+        return _refresh(db, path, snapshot)
+
+
+def _stale(db, snapshot):
+    """ 快照是否需要全量导出：超过SNAPSHOT_TTL，或高水位内的行数与数据库不一致 """
+    if SNAPSHOT_TTL and time.time() - snapshot.meta.get('exported_at', 0) > SNAPSHOT_TTL:
+        return True
+    rows = db.query(func.count(WaterQuality.id)).filter(WaterQuality.id <= snapshot.max_id).scalar()
+    return rows != snapshot.rows
+
+
+def _refresh(db, path, snapshot):
+    """ 增量刷新快照（调用方持有锁） """
+    chunks = list(_query_chunks(db, snapshot.max_id))
+    if not chunks:
+        return 0
+    new = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+    added = new['id'].size
+
+    old = snapshot.columns
+    if snapshot.rows and new['date'][0] < old['date'][-1]:
+        order = np.argsort(np.concatenate([old['date'], new['date']]), kind='stable')
+        merged = [{name: np.concatenate([old[name], new[name]])[order] for name in COLUMNS}]
+    else:
+        merged = [old, new]
+
+    generation = snapshot.meta['generation'] + 1
+    rows = _write_generation(path, generation, merged, snapshot.rows + added)
+    _commit_generation(
+        path, generation, rows, max(snapshot.max_id, int(new['id'].max())), snapshot.meta,
+        snapshot.meta.get('exported_at', 0)
+    )
+    return added
+
+
+if __name__ == "__main__":
+    from db.Database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="waterquality表列式快照")
+    parser.add_argument('action', choices=['export', 'refresh'])
+    parser.add_argument('--path', default=os.getenv("SNAPSHOT_DIR", "snapshots/waterquality"))
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        start_time = time.perf_counter()
+        count = export(session, args.path) if args.action == 'export' else refresh(session, args.path)
+        print(f"快照{args.action}完成: {count} 行, 耗时 {time.perf_counter() - start_time:.2f}s")
+    finally:
+        session.close()
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+# 训练数据的时间分辨率：raw（原始监测数据，约4小时一条）、hourly、daily、weekly
+RESOLUTIONS = ("raw", "hourly", "daily", "weekly")
+
+# 1970-01-01是周四，减去3天后按周截断即以周一为一周的起点
+_EPOCH_WEEKDAY = 3
+
+
+def resolve_resolution(resolution=None):
+    """
+    确定时间分辨率
+    :param resolution: 请求指定的分辨率，None时读取环境变量TRAINING_RESOLUTION（默认raw）
+    :raise ValueError: 不支持的分辨率
+    """
+    resolution = resolution or os.getenv("TRAINING_RESOLUTION", "raw")
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"不支持的时间分辨率: {resolution}")
+    return resolution
+
+
+def bucket_start(dates, resolution):
+    """
+    每个时间点所在时间桶的起点（整点 / 当日0点 / 周一0点）
+    :param dates: datetime64数组
+    """
+    dates = np.asarray(dates, dtype='datetime64[us]')
+    if resolution == "hourly":
+        return dates.astype('datetime64[h]').astype('datetime64[us]')
+    days = dates.astype('datetime64[D]')
+    if resolution == "weekly":
+        days = days - (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+    return days.astype('datetime64[us]')
+
+
+def resample(dates, values, resolution):
+    """
+    按时间桶对数据取均值（向量化，一次遍历），训练样本数随之降为时间桶数
+    跨站点的数据落入同一时间桶时一并取均值；空值不参与计算，时间桶内全为空值时结果为NaN
+    :param dates: 按日期升序的datetime64数组
+    :param values: 数值数组，一维[样本数]或二维[样本数, 指标数]
+    :param resolution: 时间分辨率，见RESOLUTIONS，raw时原样返回
+    :return: (时间桶起点, 各时间桶的均值)
+    """
+    if resolution == "raw" or len(dates) == 0:
+        return dates, values
+
+    buckets = bucket_start(dates, resolution)
+    # 日期已升序，时间桶起点变化的位置即每个时间桶的第一条数据
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    counts = np.add.reduceat(valid, starts, axis=0)
+    means = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+    return buckets[starts], means
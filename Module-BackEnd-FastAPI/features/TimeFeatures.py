@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import numpy as np
+
+# 统一基准时间：Unix时间戳起始点 - 1970年1月1日 00:00:00
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+# 模型输入特征列（顺序即特征矩阵的列顺序）
+FEATURE_COLUMNS = [
+    'time_diff_hours',
+    'year',
+    'month',
+    'day',
+    'day_of_week',
+    'hour',
+    'day_of_year'
+]
+
+# 1970-01-01是周四（weekday=3）
+_EPOCH_WEEKDAY = 3
+# 每小时的微秒数
+_US_PER_HOUR = 3600 * 1_000_000
+
+
+def get_extract_time_features(date: datetime) -> dict:
+    """
+    从datetime中提取时间特征
+    """
+    return {
+        'year': date.year,
+        'month': date.month,
+        'day': date.day,
+        'day_of_week': date.weekday(),  # 0=周一，6=周日
+        'hour': date.hour,
+        'day_of_year': date.timetuple().tm_yday
+    }
+
+
+def build_time_features(dates) -> np.ndarray:
+    """
+    向量化构建特征矩阵，与逐行调用get_extract_time_features的结果一致
+    :param dates: datetime序列（list / pandas.Series / datetime64数组）
+    :return: 形状为[样本数, 7]的float64矩阵，列顺序见FEATURE_COLUMNS
+    """
+    dates = np.asarray(dates, dtype='datetime64[us]')
+
+    # 按年/月/日截断，差值即为月份、日期、年内天数
+    years = dates.astype('datetime64[Y]')
+    months = dates.astype('datetime64[M]')
+    days = dates.astype('datetime64[D]')
+
+    features = np.empty((dates.shape[0], len(FEATURE_COLUMNS)), dtype=np.float64)
+    # 计算相对时间差（以UNIX_EPOCH为基准，小时为单位）
+    features[:, 0] = dates.astype(np.int64) / _US_PER_HOUR
+    features[:, 1] = years.astype(np.int64) + 1970
+    features[:, 2] = (months - years).astype(np.int64) + 1
+    features[:, 3] = (days - months).astype(np.int64) + 1
+    features[:, 4] = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7  # 0=周一，6=周日
+    features[:, 5] = (dates - days).astype('timedelta64[h]').astype(np.int64)
+    features[:, 6] = (days - years).astype(np.int64) + 1
+    return features
+
+
+def calculate_next_month(start_year: int, start_month: int) -> datetime:
+    """
+    计算下一个月的日期
+    """
+    month = start_month + 1
+    year = start_year
+
+    if month > 12:
+        month = 1
+        year += 1
+
+    return datetime(year, month, 1)  # 每月第一天
+
+
+def build_horizon_dates(start: datetime, horizon: int) -> list:
+    """
+    生成从start之后的下一个月起，连续horizon个月的每月第一天
+    """
+    dates = []
+    year, month = start.year, start.month
+    for _ in range(horizon):
+        next_date = calculate_next_month(year, month)
+        dates.append(next_date)
+        year, month = next_date.year, next_date.month
+    return dates
@@ -0,0 +1,202 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from monitoring.Metrics import JOB_SECONDS, JOBS_FINISHED, REGISTRY
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _execute(fn, job_id, progress, **params):
+    """
+    在工作进程中执行任务函数
+    :return: (结果, 异常, 任务期间记录的指标增量)，指标增量由服务进程合并
+    """
+    try:
+        result, error = fn(job_id, progress, **params), None
+    except Exception as e:
+        result, error = None, e
+    return result, error, REGISTRY.drain()
+
+
+class Job:
+    """
+    后台任务记录
+    """
+    def __init__(self, job_id, kind, params):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+
+
+class JobExecutor:
+    """
+    基于进程池的后台任务执行器
+    训练/调优是CPU密集型任务，放在独立的工作进程中执行，避免阻塞处理请求的事件循环
+    """
+    def __init__(self, max_workers=None, max_finished_jobs=1000):
+        """
+        :param max_workers: 工作进程数上限，默认读取环境变量JOB_MAX_WORKERS
+        :param max_finished_jobs: 最多保留的已结束任务数，超出后淘汰最早的任务
+        """
+        self.max_workers = max_workers or int(os.getenv("JOB_MAX_WORKERS", "2"))
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        # 进程池与跨进程的进度字典在首次提交任务时才创建
+        self._context = multiprocessing.get_context("spawn")
+        self._manager = None
+        self._progress = None
+        self._pool = None
+
+# private
+    def _ensure_started(self):
+        """ 懒加载进程池 """
+        if self._pool is None:
+            self._manager = self._context.Manager()
+            self._progress = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+
+    def _restart_pool(self):
+        """
+        重建进程池
+        工作进程异常退出（OOM、SIGKILL）后进程池永久不可用，关闭旧进程池，其中未结束的任务标记为失败
+        """
+        with self._lock:
+            broken = self._pool
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+            # 重建前提交的任务都在旧进程池中，无法再完成
+            orphans = [job for job in self._jobs.values() if job.state not in (SUCCEEDED, FAILED)]
+        broken.shutdown(wait=False, cancel_futures=True)
+        for job in orphans:
+            self._finish(job, error=BrokenProcessPool("工作进程异常退出，任务已终止"))
+
+    def _on_done(self, job, future):
+        """ 任务结束回调（在执行器线程中运行） """
+        try:
+            result, error, metrics = future.result()
+        except (Exception, CancelledError) as e:
+            # 工作进程异常退出（BrokenProcessPool）或进程池关闭时取消了排队的任务
+            result, error, metrics = None, e, {}
+        self._finish(job, result, error, metrics)
+
+    def _finish(self, job, result=None, error=None, metrics=None):
+        """ 合并工作进程回传的指标，记录任务结果后完成任务的Future（任务已结束时忽略） """
+        with self._lock:
+            if job.state in (SUCCEEDED, FAILED):
+                return
+            job.finished_at = time.time()
+            REGISTRY.merge(metrics or {})
+            if error is None:
+                job.result = result
+                job.state = SUCCEEDED
+            else:
+                job.error = str(error) or type(error).__name__
+                job.state = FAILED
+            JOBS_FINISHED.inc(kind=job.kind, state=job.state)
+            JOB_SECONDS.observe(job.finished_at - job.created_at, kind=job.kind)
+            self._evict()
+
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
+
+    def _evict(self):
+        """ 淘汰最早结束的任务记录 """
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+            self._progress.pop(job_id, None)
+# public
+    def submit(self, kind, fn, **params):
+        """
+        提交任务
+        :param kind: 任务类型（training / tuning）
+        :param fn: 模块级的任务函数 fn(job_id, progress, **params)，须可被子进程导入
+        :param params: 任务参数
+        :return: Job
+        """
+        self._ensure_started()
+        job = Job(uuid.uuid4().hex, kind, params)
+        # 任务的Future在_finish更新任务状态后才完成，结果与原任务函数的返回值一致
+        job.future = Future()
+        try:
+            pool_future = self._pool.submit(_execute, fn, job.id, self._progress, **params)
+        except BrokenProcessPool:
+            print("进程池不可用（工作进程异常退出），重建进程池")
+            self._restart_pool()
+            pool_future = self._pool.submit(_execute, fn, job.id, self._progress, **params)
+        # 提交成功后才登记任务，提交失败时不会留下永远排队的任务记录
+        with self._lock:
+            self._jobs[job.id] = job
+        pool_future.add_done_callback(lambda future: self._on_done(job, future))
+        return job
+
+    def get(self, job_id):
+        """
+        查询任务状态
+        :return: 任务快照，不存在时返回None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = {
+                "id": job.id,
+                "kind": job.kind,
+                "params": job.params,
+                "state": job.state,
+                "progress": 0.0,
+                "stage": None,
+                "result": job.result,
+                "error": job.error,
+                "created_at": job.created_at,
+                "started_at": None,
+                "finished_at": job.finished_at,
+            }
+        # 合并子进程上报的进度
+        progress = self._progress.get(job_id) if self._progress is not None else None
+        if progress:
+            snapshot["progress"] = progress["progress"]
+            snapshot["stage"] = progress["stage"]
+            snapshot["started_at"] = progress["started_at"]
+            if snapshot["state"] == PENDING:
+                snapshot["state"] = RUNNING
+        if snapshot["state"] == SUCCEEDED:
+            snapshot["progress"] = 1.0
+        return snapshot
+
+    def in_flight(self):
+        """
+        排队或执行中的任务数
+        :return: 任务类型 -> 任务数
+        """
+        counts = {}
+        with self._lock:
+            for job in self._jobs.values():
+                if job.state not in (SUCCEEDED, FAILED):
+                    counts[job.kind] = counts.get(job.kind, 0) + 1
+        return counts
+
+    def shutdown(self):
+        """ 关闭进程池 """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._pool = None
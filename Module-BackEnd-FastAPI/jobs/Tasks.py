@@ -0,0 +1,60 @@
+import time
+
+from fastapi import HTTPException
+
+from monitoring.Profiling import profiled
+from services import BatchTraining, TrainingService
+
+
+def _progress_reporter(job_id, progress):
+    """
+    构建进度回调，将进度写入跨进程共享的字典
+    """
+    started_at = time.time()
+
+    def report(fraction, stage):
+        progress[job_id] = {"progress": round(fraction, 4), "stage": stage, "started_at": started_at}
+
+    report(0.0, "start")
+    return report
+
+
+def _run(fn, job_id, progress, profile, *args, **kwargs):
+    """
+    在工作进程中执行任务，异常统一转换为可序列化的RuntimeError
+    :param profile: 性能分析器（cprofile / torch），None表示不分析；分析结果的路径以profile字段返回
+    """
+    try:
+        with profiled(profile, f"{fn.__name__}_{job_id}") as capture:
+            result = fn(*args, progress=_progress_reporter(job_id, progress), **kwargs)
+        if capture is not None:
+            result["profile"] = capture.path
+        return result
+    except HTTPException as e:
+        raise RuntimeError(e.detail) from None
+    except Exception as e:
+        raise RuntimeError(str(e)) from None
+
+
+def training_job(job_id, progress, model_id, profile=None, **train_options):
+    """ 训练任务 """
+    print(f"[任务 {job_id}] 开始训练, 模型ID: {model_id}")
+    return _run(TrainingService.train, job_id, progress, profile, model_id, **train_options)
+
+
+def joint_training_job(job_id, progress, model_ids, profile=None, **train_options):
+    """ 多指标联合训练任务 """
+    print(f"[任务 {job_id}] 开始联合训练, 模型ID: {model_ids}")
+    return _run(TrainingService.train_joint, job_id, progress, profile, model_ids, **train_options)
+
+
+def batch_training_job(job_id, progress, targets, methods, uid, profile=None, **options):
+    """ 按站点批量训练任务 """
+    print(f"[任务 {job_id}] 开始按站点批量训练, 指标: {targets}, 方法: {methods}")
+    return _run(BatchTraining.train_batch, job_id, progress, profile, targets, methods, uid, **options)
+
+
+def tuning_job(job_id, progress, model_id, method, profile=None, **tune_options):
+    """ 调优任务 """
+    print(f"[任务 {job_id}] 开始调优, 模型ID: {model_id}, 方法: {method}")
+    return _run(TrainingService.tune, job_id, progress, profile, model_id, method, **tune_options)
@@ -0,0 +1,251 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+
+# 直方图分桶上界
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _escape(value):
+    """ 转义标签值 """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=None):
+    """ 格式化标签 {a="x",b="y"} """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """
+    指标基类：按标签值元组保存样本
+    """
+    kind = None
+    # 是否为累计值（计数器/直方图），工作进程只回传累计值的增量
+    cumulative = True
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+# private
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"指标{self.name}需要标签: {', '.join(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self):
+        """ 生成(名称后缀, 标签文本, 数值) """
+        pass
+# public
+    def render(self):
+        """ Prometheus文本格式 """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self._samples())
+        return "\n".join(lines)
+
+    def drain(self):
+        """ 取出并清空全部样本（工作进程回传增量用） """
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+
+class Counter(Metric):
+    """ 只增计数器 """
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def merge(self, values):
+        """ 累加其他进程的增量 """
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    """ 瞬时值，在抓取时由服务进程设置，不跨进程合并 """
+    kind = "gauge"
+    cumulative = False
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """
+    分桶直方图
+    每组标签保存[各桶计数（非累计，最后一个为+Inf）, 总和, 次数]，输出时转换为累计计数
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def merge(self, values):
+        """ 累加其他进程的增量 """
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def _samples(self):
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield "_bucket", _format_labels(self.labelnames, key, ("le", _format_value(bound))), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), count
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表
+    训练/调优在工作进程中执行，任务结束时以drain()取出增量随结果回传，由服务进程merge()
+    """
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"指标已注册: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """ 全部指标的Prometheus文本格式 """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def drain(self):
+        """
+        取出并清空累计指标的增量
+        :return: 指标名 -> 样本，可跨进程序列化
+        """
+        delta = {}
+        for name, metric in self._metrics.items():
+            if metric.cumulative:
+                values = metric.drain()
+                if values:
+                    delta[name] = values
+        return delta
+
+    def merge(self, delta):
+        """ 合并其他进程回传的增量 """
+        for name, values in delta.items():
+            metric = self._metrics.get(name)
+            if metric is not None and metric.cumulative:
+                metric.merge(values)
+
+
+########################### 指标定义 ###########################
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "接口请求耗时（秒）", ("endpoint", "method", "status")
+)
+REQUEST_STAGE_SECONDS = REGISTRY.histogram(
+    "http_request_stage_duration_seconds", "预测接口各阶段耗时（秒）", ("endpoint", "stage")
+)
+TRAINING_STAGE_SECONDS = REGISTRY.histogram(
+    "training_stage_duration_seconds", "训练各阶段耗时（秒）", ("trainer", "stage"), STAGE_BUCKETS
+)
+TRAINING_SECONDS = REGISTRY.histogram(
+    "training_duration_seconds", "训练总耗时（秒，不含读取数据）", ("trainer",), STAGE_BUCKETS
+)
+TRAINING_EPOCHS = REGISTRY.counter(
+    "training_epochs_total", "神经网络训练完成的轮数", ("trainer",)
+)
+TUNING_STAGE_SECONDS = REGISTRY.histogram(
+    "tuning_stage_duration_seconds", "调优各阶段耗时（秒）", ("tuner", "stage"), STAGE_BUCKETS
+)
+TUNING_TRIALS = REGISTRY.counter(
+    "tuning_trials_total", "调优完成的试验数（completed / pruned / cached）", ("tuner", "state")
+)
+DB_FETCH_SECONDS = REGISTRY.histogram(
+    "db_fetch_duration_seconds", "水质数据查询耗时（秒）", ("target",)
+)
+DB_ROWS_FETCHED = REGISTRY.histogram(
+    "db_rows_fetched", "每次查询读取的行数", ("target",), ROW_BUCKETS
+)
+MODEL_CACHE_REQUESTS = REGISTRY.counter(
+    "model_cache_requests_total", "模型缓存请求数（hit / miss）", ("result",)
+)
+MODEL_CACHE_HIT_RATIO = REGISTRY.gauge(
+    "model_cache_hit_ratio", "模型缓存命中率"
+)
+MODEL_CACHE_ENTRIES = REGISTRY.gauge(
+    "model_cache_entries", "已缓存的模型数"
+)
+MODEL_CACHE_BYTES = REGISTRY.gauge(
+    "model_cache_bytes", "已缓存模型文件的总大小（字节）"
+)
+JOBS_IN_FLIGHT = REGISTRY.gauge(
+    "jobs_in_flight", "排队或执行中的后台任务数", ("kind",)
+)
+JOBS_FINISHED = REGISTRY.counter(
+    "jobs_finished_total", "已结束的后台任务数", ("kind", "state")
+)
+JOB_SECONDS = REGISTRY.histogram(
+    "job_duration_seconds", "后台任务从提交到结束的耗时（秒，含排队）", ("kind",), STAGE_BUCKETS
+)
+##############################################################
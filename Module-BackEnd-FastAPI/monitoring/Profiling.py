@@ -0,0 +1,128 @@
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# 可选的性能分析器：cprofile（Python函数级，.prof供pstats/snakeviz分析）、torch（torch.profiler，Chrome trace）
+PROFILERS = ("cprofile", "torch")
+# 同一进程内同时只进行一次性能分析：Python 3.12起cProfile为全局钩子，第二次enable()会失败，
+# 3.11及以前后开启的分析会替换前一个的钩子；torch.profiler也不支持嵌套
+_capture_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """ 本进程已有性能分析正在进行 """
+    pass
+
+
+class StageTimer:
+    """
+    阶段计时器
+    mark(stage)记录自上一次mark（或restart）以来的耗时，同名阶段重复记录时覆盖
+    指定直方图时同时写入监控指标
+    """
+    def __init__(self, histogram=None, **labels):
+        """
+        :param histogram: 监控指标直方图，标签为labels + stage
+        :param labels: 直方图的其余标签
+        """
+        self.histogram = histogram
+        self.labels = labels
+        self.seconds = {}
+        self._last = time.perf_counter()
+
+    def restart(self):
+        """ 从当前时刻开始计时下一阶段（保留已记录的阶段） """
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """
+        结束一个阶段
+        :return: 该阶段耗时（秒）
+        """
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.seconds[stage] = elapsed
+        if self.histogram is not None:
+            self.histogram.observe(elapsed, stage=stage, **self.labels)
+        return elapsed
+
+    @contextmanager
+    def stage(self, stage):
+        """ 以with语句计时一个阶段 """
+        self.restart()
+        try:
+            yield
+        finally:
+            self.mark(stage)
+
+    def breakdown(self):
+        """ 各阶段耗时（秒，保留4位小数） """
+        return {stage: round(seconds, 4) for stage, seconds in self.seconds.items()}
+
+
+class ProfileCapture:
+    """
+    单次请求的性能分析
+    以with语句包裹请求处理过程，结束时将结果写入环境变量PROFILE_DIR指定的目录（默认profiles）
+    cProfile只分析开启它的线程，包裹的代码中不应有await；已有分析进行时抛出ProfilerBusy
+    """
+    def __init__(self, profiler, name, directory=None):
+        """
+        :param profiler: 分析器，见PROFILERS
+        :param name: 文件名前缀（如 training_{job_id}）
+        """
+        if profiler not in PROFILERS:
+            raise ValueError(f"不支持的性能分析器: {profiler}")
+        self.profiler = profiler
+        directory = directory or os.getenv("PROFILE_DIR", "profiles")
+        suffix = ".prof" if profiler == "cprofile" else ".json"
+        self.path = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}{suffix}")
+        self._profile = None
+
+    def __enter__(self):
+        if not _capture_lock.acquire(blocking=False):
+            raise ProfilerBusy("已有性能分析正在进行，请稍后重试")
+        try:
+            if self.profiler == "cprofile":
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+            else:
+                # torch只在需要时导入，不增加服务启动时间
+                import torch
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                self._profile = torch.profiler.profile(activities=activities, record_shapes=True)
+                self._profile.__enter__()
+        except BaseException:
+            _capture_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.profiler == "cprofile":
+                self._profile.disable()
+                self._profile.dump_stats(self.path)
+            else:
+                self._profile.__exit__(exc_type, exc_value, traceback)
+                self._profile.export_chrome_trace(self.path)
+            print(f"性能分析结果已保存: {self.path}")
+        finally:
+            _capture_lock.release()
+        return False
+
+
+def profiled(profiler, name):
+    """
+    按需开启性能分析
+    :param profiler: 分析器，None表示不分析
+    :return: 上下文管理器，不分析时为空操作
+    """
+    if profiler is None:
+        return nullcontext()
+    return ProfileCapture(profiler, name)
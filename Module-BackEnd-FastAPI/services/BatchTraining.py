@@ -0,0 +1,248 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from db.Database import SessionLocal
+from db.Model import Model, WaterQuality
+from features.Resample import resample, resolve_resolution
+from features.TimeFeatures import build_time_features
+from monitoring.Metrics import REGISTRY
+from monitoring.Profiling import StageTimer
+from services.Plugins import TRAINERS
+from services.TrainingService import TARGETS, _report, create_trainer, fit_trainer, open_snapshot
+
+
+def load_station_series(db, stations=None):
+    """
+    一次查询读取各站点的全部指标（配置了SNAPSHOT_DIR时从列式快照读取，与单模型训练相同，按SNAPSHOT_REFRESH先刷新）
+    :param stations: 站点列表，None表示全部站点
+    :return: 站点 -> (dates, 指标名 -> 数值数组)，按日期升序，缺测为NaN
+    """
+    snapshot = open_snapshot(db)
+
+    if snapshot is not None:
+        station = np.asarray(snapshot.columns['station'])
+        keep = station >= 0 if stations is None else np.isin(station, stations)
+        # 快照按日期排序，稳定排序后每个站点内仍按日期升序
+        order = np.flatnonzero(keep)[np.argsort(station[keep], kind='stable')]
+        columns = {name: np.asarray(snapshot.columns[name])[order] for name in ['station', 'date', *TARGETS]}
+    else:
+        # noinspection PyTypeChecker
+        query = (
+            db.query(WaterQuality.station, WaterQuality.date, WaterQuality.PH, WaterQuality.DO, WaterQuality.NH3N)
+            .filter(WaterQuality.station.isnot(None))
+        )
+        if stations is not None:
+            query = query.filter(WaterQuality.station.in_(stations))
+        # (station, date)唯一索引上的有序扫描
+        rows = query.order_by(WaterQuality.station, WaterQuality.date).all()
+        if not rows:
+            return {}
+        station, date, *values = zip(*rows)
+        columns = {
+            'station': np.array(station, dtype=np.int64),
+            'date': np.array(date, dtype='datetime64[us]'),
+            # float数组中的None转换为NaN
+            **{name: np.array(column, dtype=np.float64) for name, column in zip(TARGETS, values)},
+        }
+
+    bounds = np.flatnonzero(np.diff(columns['station'])) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [columns['station'].size]])
+    return {
+        int(columns['station'][start]): (
+            columns['date'][start:end],
+            {name: columns[name][start:end] for name in TARGETS}
+        )
+        for start, end in zip(starts, ends) if end > start
+    }
+
+
+def resolve_models(db, stations, targets, methods, uid):
+    """
+    查找每个(站点, 指标, 训练方法)的模型记录，不存在时批量创建
+    :return: (站点, 指标, 训练方法) -> 模型ID
+    """
+    # noinspection PyTypeChecker
+    existing = (
+        db.query(Model)
+        .filter(
+            Model.uid == uid,
+            Model.station.in_(stations),
+            Model.target.in_(targets),
+            Model.method.in_(methods)
+        )
+        .order_by(Model.id)
+        .all()
+    )
+    # 同一组合存在多条记录时使用最新的一条
+    models = {(model.station, model.target, model.method): model for model in existing}
+
+    now = datetime.now()
+    created = [
+        Model(name=f"{method}-{target}-站点{station}", target=target, method=method, station=station, uid=uid, date=now)
+        for station in stations for target in targets for method in methods
+        if (station, target, method) not in models
+    ]
+    if created:
+        db.add_all(created)
+        db.commit()
+        print(f"- 新建模型记录: {len(created)} 条")
+    models.update({(model.station, model.target, model.method): model for model in created})
+    return {key: model.id for key, model in models.items()}
+
+
+def _init_worker(num_threads):
+    """
+    工作进程初始化：限定计算线程数
+    环境变量作用于之后加载的numpy/sklearn计算库；torch可能已随训练器模块导入，另外显式设置其线程数
+    """
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    import torch
+
+    torch.set_num_threads(num_threads)
+
+
+def train_station(station, dates, values, specs, train_options, joint=False, resolution="raw"):
+    """
+    训练一个站点的全部模型（时间特征只构建一次）
+    :param values: 指标名 -> 数值数组（缺测为NaN）
+    :param specs: [(模型ID, 指标, 训练方法)]
+    :param joint: 是否联合训练：同一训练方法的全部指标一次训练，只使用各指标均非空的样本
+    :param resolution: 时间分辨率，各指标按时间桶取均值后再构建特征
+    :return: (各模型的训练结果, 训练期间记录的指标增量)
+    """
+    if resolution != "raw":
+        names = list(values)
+        dates, matrix = resample(dates, np.column_stack([values[name] for name in names]), resolution)
+        values = {name: matrix[:, index] for index, name in enumerate(names)}
+    X = build_time_features(dates)
+    # 每组一次训练：联合训练时按训练方法分组，否则每个模型一组
+    groups = {}
+    for model_id, target, method in specs:
+        groups.setdefault(method if joint else (model_id, method), []).append((model_id, target))
+
+    results = []
+    for key, members in groups.items():
+        method = key if joint else key[1]
+        model_ids, targets = zip(*members)
+        group_results = [
+            {"model_id": model_id, "station": station, "target": target, "method": method}
+            for model_id, target in members
+        ]
+        y = np.column_stack([values[target] for target in targets]) if joint else values[targets[0]]
+        not_null = ~np.isnan(y).any(axis=1) if joint else ~np.isnan(y)
+        try:
+            if not_null.sum() < 10:
+                raise ValueError("数据不足（需至少10条样本）")
+            trainer = create_trainer(method, model_ids[0], targets[0])
+            fit_trainer(trainer, method, X[not_null], y[not_null], train_options)
+            trainers = trainer.save_outputs(model_ids, targets) if joint else [trainer]
+            for result, output in zip(group_results, trainers):
+                result.update({"samples": int(not_null.sum()), **output.training_stats})
+        except Exception as e:
+            for result in group_results:
+                result["error"] = str(e)
+        results.extend(group_results)
+    return results, REGISTRY.drain()
+
+
+def train_batch(targets, methods, uid, stations=None, n_jobs=None, progress=None, stages=False, joint=False,
+                resolution=None, **train_options):
+    """
+    按站点批量训练：每个(站点, 指标, 训练方法)一个模型
+    全部数据只读取一次，各站点分发到进程池并行训练，RMSE批量写回model表
+    :param targets: 指标列表
+    :param methods: 训练方法列表
+    :param uid: 新建模型记录所属的用户ID
+    :param stations: 站点列表，None表示全部站点
+    :param n_jobs: 工作进程数，默认读取环境变量BATCH_N_JOBS（未设置时为CPU核心数），1表示在当前进程中依次训练
+    :param progress: 进度回调 progress(fraction, stage)
+    :param stages: 是否在结果中返回各阶段耗时
+    :param joint: 是否联合训练各指标（每个站点的每种训练方法只训练一次）
+    :param resolution: 训练数据的时间分辨率（raw / hourly / daily / weekly），默认读取环境变量TRAINING_RESOLUTION
+    :param train_options: 神经网络训练参数（epochs / batch_size / early_stopping / patience）
+    :return: 各模型的训练结果（不含逐点预测值）
+    """
+    for method in methods:
+        if method not in TRAINERS:
+            raise HTTPException(status_code=400, detail=f"不支持的模型方法: {method}")
+    for target in targets:
+        if target not in TARGETS:
+            raise HTTPException(status_code=400, detail=f"不支持的目标变量: {target}")
+    resolution = resolve_resolution(resolution)
+
+    db = SessionLocal()
+    timer = StageTimer()
+    try:
+        _report(progress, 0.02, "fetch")
+        series = load_station_series(db, stations)
+        if not series:
+            raise HTTPException(status_code=400, detail="没有可训练的站点数据")
+        timer.mark("fetch")
+        print(f"- 批量训练: {len(series)} 个站点, {sum(dates.size for dates, _ in series.values())} 条记录")
+
+        model_ids = resolve_models(db, list(series), targets, methods, uid)
+        timer.mark("resolve")
+
+        # 数据量大的站点先开始，缩短最后一个站点的等待
+        shards = sorted(series.items(), key=lambda item: item[1][0].size, reverse=True)
+        shards = [
+            (station, dates, values, [(model_ids[(station, target, method)], target, method)
+                                      for target in targets for method in methods])
+            for station, (dates, values) in shards
+        ]
+        n_jobs = max(1, min(n_jobs or int(os.getenv("BATCH_N_JOBS", "0")) or os.cpu_count() or 1, len(shards)))
+
+        results = []
+
+        def collect(station_results, metrics):
+            REGISTRY.merge(metrics)
+            results.extend(station_results)
+            _report(progress, 0.05 + 0.9 * len(results) / len(model_ids), f"model {len(results)}/{len(model_ids)}")
+
+        _report(progress, 0.05, "fit")
+        if n_jobs == 1:
+            for shard in shards:
+                collect(*train_station(*shard, train_options, joint, resolution))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // n_jobs)
+            print(f"- 并行训练: {n_jobs} 个工作进程, 每个进程 {threads} 个线程")
+            with ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(threads,)
+            ) as pool:
+                futures = [pool.submit(train_station, *shard, train_options, joint, resolution) for shard in shards]
+                for future in as_completed(futures):
+                    collect(*future.result())
+        timer.mark("fit")
+
+        # 批量写回RMSE
+        trained = [result for result in results if "error" not in result]
+        if trained:
+            db.execute(update(Model), [{"id": result["model_id"], "rmse": result["rmse"]} for result in trained])
+            db.commit()
+        timer.mark("save")
+        _report(progress, 1.0, "done")
+
+        print(f"批量训练完成: 成功 {len(trained)} 个, 失败 {len(results) - len(trained)} 个")
+        response = {
+            "stations": len(series),
+            "trained": len(trained),
+            "failed": len(results) - len(trained),
+            "n_jobs": n_jobs,
+            "models": sorted(results, key=lambda result: (result["station"], result["target"], result["method"])),
+        }
+        if stages:
+            response["stages"] = timer.breakdown()
+        return response
+    finally:
+        db.close()
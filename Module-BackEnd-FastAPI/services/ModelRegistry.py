@@ -0,0 +1,123 @@
+import os
+import threading
+from collections import OrderedDict
+
+from monitoring.Metrics import MODEL_CACHE_REQUESTS
+from trainers.Artifacts import artifact_paths, bundle_path
+
+
+class ModelRegistry:
+    """
+    已加载模型的进程内LRU缓存
+    以(model_id, 模型文件版本)为键，模型文件被重新训练覆盖后版本变化，旧条目自动失效
+    """
+    def __init__(self, trainer_factory, max_entries=None, max_bytes=None):
+        """
+        :param trainer_factory: 训练器工厂 trainer_factory(method, model_id, target) -> BaseTrainer
+        :param max_entries: 最多缓存的模型数，默认读取环境变量MODEL_CACHE_SIZE
+        :param max_bytes: 缓存模型文件总大小上限（字节），默认读取环境变量MODEL_CACHE_MAX_MB
+        """
+        self.trainer_factory = trainer_factory
+        self.max_entries = max_entries or int(os.getenv("MODEL_CACHE_SIZE", "32"))
+        self.max_bytes = max_bytes or int(os.getenv("MODEL_CACHE_MAX_MB", "512")) * 1024 * 1024
+        # model_id -> (version, size, trainer)
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+# private
+    @staticmethod
+    def _artifact_version(model_id):
+        """
+        读取模型文件版本（优先单文件模型包，不存在时为旧格式的两个文件）
+        :return: (文件mtime, 文件总大小)，文件不存在时返回(None, 0)
+        """
+        try:
+            bundle_stat = os.stat(bundle_path(model_id))
+            return (bundle_stat.st_mtime_ns,), bundle_stat.st_size
+        except FileNotFoundError:
+            pass
+
+        model_path, scaler_path = artifact_paths(model_id)
+        try:
+            model_stat = os.stat(model_path)
+            scaler_stat = os.stat(scaler_path)
+        except FileNotFoundError:
+            return None, 0
+        return (model_stat.st_mtime_ns, scaler_stat.st_mtime_ns), model_stat.st_size + scaler_stat.st_size
+
+    def _remove(self, model_id):
+        """ 移除条目（调用方持有锁） """
+        entry = self._entries.pop(model_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def _evict(self):
+        """ 按数量和内存上限淘汰最久未使用的条目（调用方持有锁） """
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            model_id, _ = next(iter(self._entries.items()))
+            self._remove(model_id)
+# public
+    def get(self, model_id, method, target):
+        """
+        获取已加载的训练器，未命中或版本过期时从磁盘加载
+        :return: 训练器，模型未训练时返回None
+        """
+        version, size = self._artifact_version(model_id)
+        if version is None:
+            self.invalidate(model_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(model_id)
+                self.hits += 1
+                MODEL_CACHE_REQUESTS.inc(result="hit")
+                return entry[2]
+            self.misses += 1
+        MODEL_CACHE_REQUESTS.inc(result="miss")
+
+        # 在锁外加载，避免阻塞其他模型的命中
+        trainer = self.trainer_factory(method, model_id, target)
+        if not trainer.load_model():
+            return None
+
+        with self._lock:
+            self._remove(model_id)
+            self._entries[model_id] = (version, size, trainer)
+            self._total_bytes += size
+            self._evict()
+        return trainer
+
+    def invalidate(self, model_id):
+        """ 使指定模型的缓存失效（重新训练后调用） """
+        with self._lock:
+            self._remove(model_id)
+
+    def preload(self, models):
+        """
+        预加载模型
+        :param models: 可迭代的(model_id, method, target)
+        :return: 成功加载的模型数
+        """
+        loaded = 0
+        for model_id, method, target in models:
+            try:
+                if self.get(model_id, method, target) is not None:
+                    loaded += 1
+            except Exception as e:
+                print(f"预加载模型 {model_id} 失败: {str(e)}")
+        return loaded
+
+    def stats(self):
+        """ 缓存统计 """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
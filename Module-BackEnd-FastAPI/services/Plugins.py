@@ -0,0 +1,80 @@
+import importlib
+import threading
+
+
+class PluginRegistry:
+    """
+    名称 -> 工厂 的延迟加载注册表
+    注册时只记录"模块:属性"，第一次使用时才导入对应模块，
+    torch / hyperopt / sklearn等重量级依赖因此不会在服务启动时加载
+    """
+    def __init__(self, kind):
+        """
+        :param kind: 插件类别，用于错误信息
+        """
+        self.kind = kind
+        # 名称 -> "模块:属性"
+        self._targets = {}
+        # 名称 -> 已导入的工厂
+        self._factories = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, target):
+        """
+        注册插件
+        :param name: 名称（训练方法，或(模型类型, 调优方法)）
+        :param target: "模块:属性"，如"trainers.LSTMTrainer:LSTMTrainer"
+        """
+        self._targets[name] = target
+
+    def __contains__(self, name):
+        return name in self._targets
+
+    def names(self):
+        """ 已注册的名称 """
+        return list(self._targets)
+
+    def is_loaded(self, name):
+        """ 插件模块是否已经导入 """
+        return name in self._factories
+
+    def resolve(self, name):
+        """
+        获取工厂，第一次使用时导入模块
+        :raise ValueError: 名称未注册
+        """
+        factory = self._factories.get(name)
+        if factory is not None:
+            return factory
+
+        if name not in self._targets:
+            raise ValueError(f"不支持的{self.kind}: {name}")
+        module_name, attr = self._targets[name].split(":")
+        with self._lock:
+            if name not in self._factories:
+                self._factories[name] = getattr(importlib.import_module(module_name), attr)
+            return self._factories[name]
+
+    def create(self, name, *args, **kwargs):
+        """ 按名称创建插件实例 """
+        return self.resolve(name)(*args, **kwargs)
+
+
+########################### 训练器 ###########################
+TRAINERS = PluginRegistry("模型方法")
+TRAINERS.register("ADABOOST", "trainers.AdaBoostTrainer:AdaBoostTrainer")
+TRAINERS.register("SVM", "trainers.SVMTrainer:SVMTrainer")
+TRAINERS.register("LSTM", "trainers.LSTMTrainer:LSTMTrainer")
+TRAINERS.register("GRU", "trainers.GRUTrainer:GRUTrainer")
+TRAINERS.register("BI-RNN", "trainers.BiRNNTrainer:BiRNNTrainer")
+##############################################################
+
+########################### 调优器 ###########################
+TUNERS = PluginRegistry("调优方法")
+TUNERS.register(("LSTM", "random"), "tuners.Random.LSTMRandomTuner:LSTMRandomSearchTuner")
+TUNERS.register(("LSTM", "bayesian"), "tuners.Bayesian.LSTMBayesianTuner:LSTMBayesianOptimizationTuner")
+TUNERS.register(("GRU", "random"), "tuners.Random.GRURandomTuner:GRURandomSearchTuner")
+TUNERS.register(("GRU", "bayesian"), "tuners.Bayesian.GRUBayesianTuner:GRUBayesianOptimizationTuner")
+TUNERS.register(("BI-RNN", "random"), "tuners.Random.BiRNNRandomTuner:BiRNNSearchTuner")
+TUNERS.register(("BI-RNN", "bayesian"), "tuners.Bayesian.BiRNNBayesianTuner:BiRNNBayesianTuner")
+##############################################################
@@ -0,0 +1,368 @@
+import os
+import time
+
+import numpy as np
+from fastapi import HTTPException
+
+from db.Database import SessionLocal
+from db.Model import Model, WaterQuality
+from db.SeriesCache import SeriesCache
+from db.Snapshot import Snapshot, refresh as refresh_snapshot
+from features.Resample import resample, resolve_resolution
+from features.TimeFeatures import build_time_features
+from monitoring.Metrics import DB_FETCH_SECONDS, DB_ROWS_FETCHED
+from monitoring.Profiling import StageTimer
+from services.Plugins import TRAINERS, TUNERS
+
+# 时间序列缓存（每个工作进程一份，重复的训练/调优请求只读取新增数据）
+series_cache = SeriesCache()
+# 支持的预测指标与接受神经网络训练参数的训练方法
+TARGETS = ["PH", "DO", "NH3N"]
+RNN_METHODS = ["LSTM", "GRU", "BI-RNN"]
+
+
+def _report(progress, fraction, stage):
+    """
+    上报任务进度
+    :param progress: 进度回调 progress(fraction, stage)，可为None
+    :param fraction: 完成比例 0~1
+    :param stage: 当前阶段描述
+    """
+    if progress is not None:
+        progress(fraction, stage)
+
+
+def create_trainer(method, model_id, target_name, scaler=None):
+    """
+    根据训练方法创建训练器（训练器模块在第一次使用时导入）
+    """
+    return TRAINERS.create(method, model_id, target_name, scaler)
+
+
+def fit_trainer(trainer, method, X, y, train_options):
+    """
+    训练模型，神经网络训练参数只传给RNN训练器
+    :return: rmse, X_test, y_test, y_pred
+    """
+    if method in RNN_METHODS:
+        return trainer.train(X, y, **train_options)
+    return trainer.train(X, y)
+
+
+def open_snapshot(db):
+    """
+    打开环境变量SNAPSHOT_DIR指定的列式快照，SNAPSHOT_REFRESH为1时先增量刷新
+    单模型训练、联合训练与批量训练都经此读取快照，看到的数据一致
+    :return: Snapshot，未配置或快照不存在时返回None
+    """
+    snapshot_dir = os.getenv("SNAPSHOT_DIR")
+    if not snapshot_dir:
+        return None
+    if os.getenv("SNAPSHOT_REFRESH") == "1":
+        refresh_snapshot(db, snapshot_dir)
+    return Snapshot.open(snapshot_dir)
+
+
+def load_training_data(db, target_name, timer=None, station=None, resolution=None):
+    """
+    读取目标指标的全部非空数据并构建特征矩阵
+    配置了环境变量SNAPSHOT_DIR时从列式快照读取，否则经序列缓存查询数据库
+    :param timer: 阶段计时器，记录fetch /（resample）/ featurize阶段
+    :param station: 站点，None表示全部站点
+    :param resolution: 时间分辨率（raw / hourly / daily / weekly），默认读取环境变量TRAINING_RESOLUTION
+    :return: (X, y)
+    """
+    resolution = resolve_resolution(resolution)
+    timer = timer or StageTimer()
+    timer.restart()
+    snapshot = open_snapshot(db)
+
+    if snapshot is not None:
+        dates, y = snapshot.series(target_name, station=station)
+    else:
+        dates, y = series_cache.get(db, target_name, station)
+    timer.mark("fetch")
+
+    # 缓存与快照保存原始数据，按分辨率取均值后再构建特征，训练开销随时间桶数而非原始行数增长
+    if resolution != "raw":
+        raw_rows = dates.size
+        dates, y = resample(dates, y, resolution)
+        print(f"- 时间分辨率: {resolution}, {raw_rows} 条 -> {dates.size} 条")
+        timer.mark("resample")
+
+    if dates.size < 10:
+        raise HTTPException(status_code=400, detail="数据不足（需至少10条样本）")
+
+    print(f"- 样本量: {dates.size}")
+
+    # 特征工程（向量化构建时间特征矩阵）
+    X = build_time_features(dates)
+    timer.mark("featurize")
+    return X, y
+
+
+def load_joint_training_data(db, target_names, timer=None, station=None, resolution=None):
+    """
+    一次查询读取多个指标均非空的数据并构建特征矩阵（联合训练用）
+    配置了环境变量SNAPSHOT_DIR时从列式快照读取；不经过序列缓存
+    :param target_names: 指标名列表
+    :param timer: 阶段计时器，记录fetch /（resample）/ featurize阶段
+    :param station: 站点，None表示全部站点
+    :param resolution: 时间分辨率，同load_training_data
+    :return: (X, Y)，Y为[样本数, 指标数]的标签矩阵，列顺序与target_names一致
+    """
+    resolution = resolve_resolution(resolution)
+    timer = timer or StageTimer()
+    timer.restart()
+    snapshot = open_snapshot(db)
+
+    if snapshot is not None:
+        dates = snapshot.columns['date']
+        Y = np.column_stack([snapshot.columns[name] for name in target_names])
+        mask = ~np.isnan(Y).any(axis=1)
+        if station is not None:
+            mask &= snapshot.columns['station'] == station
+        dates, Y = dates[mask], Y[mask]
+    else:
+        columns = [getattr(WaterQuality, name) for name in target_names]
+        # noinspection PyTypeChecker
+        query = db.query(WaterQuality.date, *columns).filter(*[column.isnot(None) for column in columns])
+        if station is not None:
+            query = query.filter(WaterQuality.station == station)
+        start_time = time.perf_counter()
+        rows = query.order_by(WaterQuality.date, WaterQuality.id).all()
+        label = ",".join(target_names)
+        DB_FETCH_SECONDS.observe(time.perf_counter() - start_time, target=label)
+        DB_ROWS_FETCHED.observe(len(rows), target=label)
+        dates = np.array([row[0] for row in rows], dtype='datetime64[us]')
+        Y = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(target_names))
+    timer.mark("fetch")
+
+    if resolution != "raw":
+        raw_rows = dates.size
+        dates, Y = resample(dates, Y, resolution)
+        print(f"- 时间分辨率: {resolution}, {raw_rows} 条 -> {dates.size} 条")
+        timer.mark("resample")
+
+    if dates.size < 10:
+        raise HTTPException(status_code=400, detail="数据不足（需至少10条样本）")
+
+    print(f"- 样本量: {dates.size}")
+
+    X = build_time_features(dates)
+    timer.mark("featurize")
+    return X, Y
+
+
+def train(model_id: int, progress=None, stages=False, resolution=None, **train_options) -> dict:
+    """
+    训练模型并将RMSE写回数据库
+    :param model_id: 模型ID DB获得
+    :param progress: 进度回调 progress(fraction, stage)
+    :param stages: 是否在结果中返回各阶段耗时
+    :param resolution: 训练数据的时间分辨率（raw / hourly / daily / weekly），默认读取环境变量TRAINING_RESOLUTION
+    :param train_options: 神经网络训练参数（epochs / batch_size / early_stopping / patience），对ADABOOST/SVM无效
+    :return: 训练结果（包含模型RMSE和各样本点的原始值/预测值）
+    """
+    db = SessionLocal()
+
+    try:
+        # 查询模型信息
+        # noinspection PyTypeChecker
+        model_info = db.query(Model).filter(Model.id == model_id).first()
+
+        if not model_info:
+            raise HTTPException(status_code=404, detail=f"模型ID {model_id} 不存在")
+
+        # 获取目标列和训练方法
+        target_name = model_info.target
+        method = model_info.method
+
+        # 验证method和target
+        if method not in TRAINERS:
+            raise HTTPException(status_code=400, detail=f"不支持的模型方法: {method}")
+
+        if target_name not in TARGETS:
+            raise HTTPException(status_code=400, detail=f"不支持的目标变量: {target_name}")
+
+        print(f"- 训练方式: {method}")
+
+        # 选择模型（数据标准化由训练器完成，保存的归一化器与预测时一致）
+        trainer = create_trainer(method, model_id, target_name)
+
+        # 查询水质数据
+        _report(progress, 0.05, "fetch")
+        X, y = load_training_data(db, target_name, trainer.timer, model_info.station, resolution)
+
+        # 训练模型
+        _report(progress, 0.3, "fit")
+        rmse, _, y_test, y_pred = fit_trainer(trainer, method, X, y, train_options)
+
+        # 更新模型RMSE到数据库
+        model_info.rmse = rmse
+        db.commit()
+        _report(progress, 1.0, "done")
+
+        # 构建预测结果和真实值的对比数据
+        print("模型拟合完毕, 发回请求...")
+        result = {
+            "rmse": rmse,
+            "pred": y_pred.tolist(),
+            "real": y_test.tolist(),
+            **trainer.training_stats
+        }
+        if stages:
+            result["stages"] = trainer.timer.breakdown()
+        return result
+    finally:
+        db.close()
+
+
+def train_joint(model_ids: list, progress=None, stages=False, resolution=None, **train_options) -> dict:
+    """
+    多指标联合训练：同一训练方法、同一站点的多个模型（各对应一个指标）一次训练完成
+    只查询一次数据、构建一次特征，神经网络以output_size=指标数训练，sklearn模型以MultiOutputRegressor训练，
+    训练后拆分为各模型的单输出模型包并将RMSE写回数据库
+    :param model_ids: 模型ID列表，各模型的指标互不相同
+    :param progress: 进度回调 progress(fraction, stage)
+    :param stages: 是否在结果中返回各阶段耗时
+    :param resolution: 训练数据的时间分辨率，同train
+    :param train_options: 神经网络训练参数（epochs / batch_size / early_stopping / patience），对ADABOOST/SVM无效
+    :return: 各模型的RMSE和测试集的原始值/预测值，以及共同的训练统计
+    """
+    db = SessionLocal()
+
+    try:
+        if not model_ids:
+            raise HTTPException(status_code=400, detail="缺少联合训练的模型ID")
+        # noinspection PyTypeChecker
+        found = {model.id: model for model in db.query(Model).filter(Model.id.in_(model_ids)).all()}
+        missing = [model_id for model_id in model_ids if model_id not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"模型ID {missing} 不存在")
+        models = [found[model_id] for model_id in model_ids]
+
+        method = models[0].method
+        station = models[0].station
+        target_names = [model.target for model in models]
+        if method not in TRAINERS:
+            raise HTTPException(status_code=400, detail=f"不支持的模型方法: {method}")
+        for target_name in target_names:
+            if target_name not in TARGETS:
+                raise HTTPException(status_code=400, detail=f"不支持的目标变量: {target_name}")
+        if any(model.method != method or model.station != station for model in models):
+            raise HTTPException(status_code=400, detail="联合训练的模型须使用相同的训练方法和站点")
+        if len(set(target_names)) != len(target_names):
+            raise HTTPException(status_code=400, detail="联合训练的模型指标不能重复")
+
+        print(f"- 训练方式: {method}, 联合训练指标: {target_names}")
+        trainer = create_trainer(method, model_ids[0], target_names[0])
+
+        _report(progress, 0.05, "fetch")
+        X, Y = load_joint_training_data(db, target_names, trainer.timer, station, resolution)
+
+        _report(progress, 0.3, "fit")
+        _, _, y_test, y_pred = fit_trainer(trainer, method, X, Y, train_options)
+        trainer.save_outputs(model_ids, target_names)
+
+        # 各模型的RMSE写回数据库并在models中分别返回
+        stats = dict(trainer.training_stats)
+        rmses = stats.pop("rmse")
+        for model, rmse in zip(models, rmses):
+            model.rmse = rmse
+        db.commit()
+        _report(progress, 1.0, "done")
+
+        print("模型拟合完毕, 发回请求...")
+        result = {
+            **stats,
+            "models": [
+                {
+                    "model_id": model_id,
+                    "target": target_name,
+                    "rmse": rmses[index],
+                    "pred": y_pred[:, index].tolist(),
+                    "real": y_test[:, index].tolist(),
+                }
+                for index, (model_id, target_name) in enumerate(zip(model_ids, target_names))
+            ],
+        }
+        if stages:
+            result["stages"] = trainer.timer.breakdown()
+        return result
+    finally:
+        db.close()
+
+
+def tune(model_id: int, method: str, progress=None, n_jobs=None, time_budget=None, max_trials=None,
+         stages=False, resolution=None) -> dict:
+    """
+    超参数调优
+    :param model_id: 模型ID DB获得
+    :param method: 调优方法：random（随机搜索）、bayesian（贝叶斯优化）
+    :param progress: 进度回调 progress(fraction, stage)
+    :param n_jobs: 并行试验进程数，默认读取环境变量TUNER_N_JOBS
+    :param time_budget: 时间预算（秒），耗尽后停止并返回目前为止的最佳参数
+    :param max_trials: 试验数上限，默认15
+    :param stages: 是否在结果中返回各阶段耗时
+    :param resolution: 训练数据的时间分辨率，同train
+    :return: 调优结果（最佳RMSE和参数）
+    """
+    db = SessionLocal()
+
+    try:
+        # 验证模型存在性
+        # noinspection PyTypeChecker
+        model_info = db.query(Model).filter(Model.id == model_id).first()
+        if not model_info:
+            raise HTTPException(status_code=404, detail=f"模型ID {model_id} 不存在")
+
+        # 验证模型类型匹配
+        model_type = model_info.method
+        tuning_method = "random" if method == "random" else "bayesian"
+        if (model_type, tuning_method) not in TUNERS:
+            raise HTTPException(status_code=400, detail=f"不支持的模型类型: {model_type}")
+
+        # 初始化调优器
+        n_trials = max_trials or 15
+        tuner = TUNERS.create(
+            (model_type, tuning_method),
+            model_id,
+            model_info.target,
+            None,
+            db,
+            n_trials,
+            n_jobs=n_jobs,
+            time_budget=time_budget
+        )
+
+        # 每完成一组参数上报一次进度，有时间预算时按已用时间与已完成试验数中较快的一方计算
+        def report_trial(done):
+            fraction = min(done, n_trials) / n_trials
+            if tuner.deadline is not None:
+                fraction = max(fraction, 1 - (tuner.deadline - time.time()) / tuner.time_budget)
+            _report(progress, 0.05 + 0.95 * min(fraction, 1.0), f"trial {done}/{n_trials}")
+
+        tuner.progress_callback = report_trial
+
+        # 获取训练数据
+        _report(progress, 0.02, "fetch")
+        X, y = load_training_data(db, model_info.target, tuner.timer, model_info.station, resolution)
+
+        # 执行调优
+        result = tuner.tune(X, y)
+        _report(progress, 1.0, "done")
+
+        response = {
+            # 时间预算内没有完成任何试验时没有最佳结果
+            "best_rmse": round(result["best_rmse"], 4) if result["best_params"] is not None else None,
+            "best_params": result["best_params"],
+            "trials": result["trials"],
+            "pruned_trials": result["pruned_trials"],
+            "budget_exhausted": result["budget_exhausted"],
+        }
+        if stages:
+            response["stages"] = tuner.timer.breakdown()
+        return response
+    finally:
+        db.close()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 服务模块以项目根目录为导入起点（与 uvicorn Application:app 一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks import Synthetic
+from db.Snapshot import export
+from services.BatchTraining import _init_worker, load_station_series
+
+
+def test_batch_series_refreshes_snapshot(tmp_path, monkeypatch):
+    engine, Session = Synthetic.create_standin(str(tmp_path / "water.db"))
+    Synthetic.load(engine, Synthetic.generate(stations=2, rows_per_station=50))
+    snapshot_dir = str(tmp_path / "snapshot")
+    db = Session()
+    try:
+        export(db, snapshot_dir)
+        # 快照导出后写入的新数据
+        Synthetic.load(engine, {
+            "date": np.array(['2030-01-01T00:00:00'], dtype='datetime64[us]'),
+            "station": np.array([1]),
+            "PH": np.array([7.0]),
+            "DO": np.array([8.0]),
+            "NH3N": np.array([0.5]),
+        })
+
+        monkeypatch.setenv("SNAPSHOT_DIR", snapshot_dir)
+        monkeypatch.delenv("SNAPSHOT_REFRESH", raising=False)
+        assert load_station_series(db)[1][0].size == 50
+
+        monkeypatch.setenv("SNAPSHOT_REFRESH", "1")
+        series = load_station_series(db)
+        assert series[1][0].size == 51
+        assert series[1][0][-1] == np.datetime64('2030-01-01T00:00:00', 'us')
+        assert series[2][0].size == 50
+
+        # 与直接查询数据库的结果一致
+        monkeypatch.delenv("SNAPSHOT_DIR")
+        expected = load_station_series(db)
+        for station, (dates, values) in expected.items():
+            np.testing.assert_array_equal(series[station][0], dates)
+            for name, column in values.items():
+                np.testing.assert_array_equal(series[station][1][name], column)
+    finally:
+        db.close()
+
+
+def torch_threads():
+    import torch
+
+    return torch.get_num_threads()
+
+
+def test_worker_limits_torch_threads():
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(1,)) as pool:
+        assert pool.submit(torch_threads).result() == 1
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from trainers.Bundle import ALIGNMENT, Bundle, write_bundle
+
+
+def make_arrays():
+    rng = np.random.default_rng(0)
+    return {
+        "weight": rng.normal(size=(4, 3)).astype(np.float32),
+        "bias": np.arange(3, dtype=np.float32),
+        "scale": rng.normal(size=5),
+        "index": np.arange(6, dtype=np.int64).reshape(2, 3),
+    }
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_fp32(tmp_path, mmap):
+    path = str(tmp_path / "model.bundle")
+    arrays = make_arrays()
+    write_bundle(path, arrays, {"hidden_size": 3, "name": "模型"}, blobs={"sklearn": b"\x00\x01payload"})
+
+    bundle = Bundle.open(path, mmap=mmap)
+    assert bundle.metadata == {"hidden_size": 3, "name": "模型"}
+    assert bundle.names() == list(arrays)
+    for name, array in arrays.items():
+        loaded = bundle.array(name)
+        assert loaded.dtype == array.dtype
+        np.testing.assert_array_equal(loaded, array)
+        assert bundle.header["arrays"][name]["offset"] % ALIGNMENT == 0
+    assert bundle.blob("sklearn") == b"\x00\x01payload"
+    assert [p.name for p in tmp_path.iterdir()] == ["model.bundle"]
+
+
+def test_round_trip_fp16(tmp_path):
+    path = str(tmp_path / "model.bundle")
+    arrays = make_arrays()
+    write_bundle(path, arrays, {}, fp16=True)
+
+    bundle = Bundle.open(path)
+    # float32以float16存储，读取时转换回float32；其他类型原样存储
+    assert bundle.header["arrays"]["weight"]["stored_dtype"] == np.dtype(np.float16).str
+    assert bundle.header["arrays"]["scale"]["stored_dtype"] == np.dtype(np.float64).str
+    weight = bundle.array("weight")
+    assert weight.dtype == np.float32
+    np.testing.assert_allclose(weight, arrays["weight"], rtol=1e-3, atol=1e-3)
+    np.testing.assert_array_equal(bundle.array("scale"), arrays["scale"])
+    np.testing.assert_array_equal(bundle.array("index"), arrays["index"])
+
+
+def test_corrupt_files(tmp_path):
+    path = tmp_path / "model.bundle"
+    write_bundle(str(path), make_arrays(), {"hidden_size": 3})
+    data = path.read_bytes()
+
+    cases = {
+        "empty": b"",
+        "prefix": data[:6],
+        "magic": b"NOTABUND" + data[8:],
+        "header": data[:20],
+        "json": data[:12] + b"{" * 40 + data[52:],
+        "arrays": data[:-10],
+    }
+    for name, content in cases.items():
+        broken = tmp_path / f"{name}.bundle"
+        broken.write_bytes(content)
+        with pytest.raises(ValueError):
+            Bundle.open(str(broken))
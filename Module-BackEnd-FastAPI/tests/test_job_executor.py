@@ -0,0 +1,43 @@
+import os
+import signal
+import time
+
+import pytest
+
+from jobs.JobExecutor import FAILED, SUCCEEDED, JobExecutor
+
+
+def sleep_job(job_id, progress, seconds):
+    """ 测试任务：等待指定秒数 """
+    time.sleep(seconds)
+    return {"slept": seconds}
+
+
+def worker_pids(executor):
+    return list(executor._pool._processes)
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(max_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+def test_submit_after_worker_killed(executor):
+    job = executor.submit("training", sleep_job, seconds=60)
+    # 等待工作进程启动后强制结束（模拟OOM）
+    deadline = time.time() + 30
+    while not worker_pids(executor) and time.time() < deadline:
+        time.sleep(0.05)
+    os.kill(worker_pids(executor)[0], signal.SIGKILL)
+
+    with pytest.raises(Exception):
+        job.future.result(timeout=30)
+    assert executor.get(job.id)["state"] == FAILED
+
+    # 进程池重建后可以继续提交任务
+    retry = executor.submit("training", sleep_job, seconds=0)
+    assert retry.future.result(timeout=60) == {"slept": 0}
+    assert executor.get(retry.id)["state"] == SUCCEEDED
+    assert executor.in_flight() == {}
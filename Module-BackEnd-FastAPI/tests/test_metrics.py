@@ -0,0 +1,48 @@
+import pytest
+
+from monitoring.Metrics import Metric, MetricsRegistry
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "请求数", ("result",))
+    histogram = registry.histogram("latency_seconds", "耗时", ("stage",), buckets=(0.1, 1))
+    gauge = registry.gauge("entries", "条目数")
+    return registry, counter, histogram, gauge
+
+
+def test_metric_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("m", "指标")
+
+
+def test_drain_and_merge():
+    worker, counter, histogram, gauge = make_registry()
+    counter.inc(result="hit")
+    counter.inc(2, result="hit")
+    counter.inc(result="miss")
+    histogram.observe(0.05, stage="fit")
+    histogram.observe(0.5, stage="fit")
+    histogram.observe(5, stage="fit")
+    gauge.set(3)
+
+    delta = worker.drain()
+    # 只回传累计指标，取出后清空
+    assert set(delta) == {"requests_total", "latency_seconds"}
+    assert delta["requests_total"] == {("hit",): 3.0, ("miss",): 1.0}
+    assert delta["latency_seconds"] == {("fit",): [[1, 1, 1], 5.55, 3]}
+    assert worker.drain() == {}
+
+    server, server_counter, server_histogram, server_gauge = make_registry()
+    server_counter.inc(result="hit")
+    server_histogram.observe(0.05, stage="fit")
+    server.merge(delta)
+    server.merge(delta)
+    text = server.render()
+    assert 'requests_total{result="hit"} 7' in text
+    assert 'requests_total{result="miss"} 2' in text
+    # 输出为累计计数
+    assert 'latency_seconds_bucket{stage="fit",le="0.1"} 3' in text
+    assert 'latency_seconds_bucket{stage="fit",le="1"} 5' in text
+    assert 'latency_seconds_bucket{stage="fit",le="+Inf"} 7' in text
+    assert 'latency_seconds_count{stage="fit"} 7' in text
@@ -0,0 +1,38 @@
+import pytest
+import torch
+
+from trainers.MiniBatch import MiniBatchIterator
+
+
+@pytest.mark.parametrize("size, batch_size", [(10, 3), (12, 4), (5, 8), (1, 1)])
+def test_each_sample_once_per_epoch(size, batch_size):
+    X = torch.arange(size, dtype=torch.float32).unsqueeze(1).repeat(1, 2)
+    y = torch.arange(size, dtype=torch.float32)
+    iterator = MiniBatchIterator(X, y, batch_size=batch_size)
+    assert len(iterator) == (size + batch_size - 1) // batch_size
+
+    for _ in range(3):
+        batches = list(iterator)
+        assert len(batches) == len(iterator)
+        assert all(batch_X.shape[0] <= batch_size for batch_X, _ in batches)
+        seen_X = torch.cat([batch_X for batch_X, _ in batches])
+        seen_y = torch.cat([batch_y for _, batch_y in batches])
+        # 每个样本恰好出现一次，X与y的对应关系不变
+        assert sorted(seen_y.tolist()) == list(range(size))
+        assert torch.equal(seen_X[:, 0], seen_y)
+    # 原张量不被修改
+    assert torch.equal(y, torch.arange(size, dtype=torch.float32))
+
+
+def test_no_shuffle_keeps_order():
+    y = torch.arange(7)
+    batches = [batch_y.tolist() for (batch_y,) in MiniBatchIterator(y, batch_size=3, shuffle=False)]
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_epochs_are_reshuffled():
+    torch.manual_seed(0)
+    iterator = MiniBatchIterator(torch.arange(100), batch_size=10)
+    first = torch.cat([batch for (batch,) in iterator]).tolist()
+    second = torch.cat([batch for (batch,) in iterator]).tolist()
+    assert first != second
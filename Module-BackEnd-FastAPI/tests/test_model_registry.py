@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from services.ModelRegistry import ModelRegistry
+from trainers.Artifacts import bundle_path
+
+
+class FakeTrainer:
+    def __init__(self, model_id):
+        self.model_id = model_id
+
+    def load_model(self):
+        return True
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("cached_models")
+    loads = []
+
+    def factory(method, model_id, target):
+        loads.append(model_id)
+        return FakeTrainer(model_id)
+
+    registry = ModelRegistry(factory, max_entries=2, max_bytes=1000)
+    registry.loads = loads
+    return registry
+
+
+def write_bundle(model_id, size=10, mtime_ns=None):
+    with open(bundle_path(model_id), "wb") as f:
+        f.write(b"\0" * size)
+    if mtime_ns is not None:
+        os.utime(bundle_path(model_id), ns=(mtime_ns, mtime_ns))
+
+
+def test_lru_eviction_by_count(registry):
+    for model_id in (1, 2, 3):
+        write_bundle(model_id)
+    registry.get(1, "SVM", "PH")
+    registry.get(2, "SVM", "PH")
+    # 访问1后，2成为最久未使用的条目
+    registry.get(1, "SVM", "PH")
+    registry.get(3, "SVM", "PH")
+    assert registry.stats() == {"entries": 2, "bytes": 20, "hits": 1, "misses": 3}
+
+    registry.get(1, "SVM", "PH")
+    registry.get(2, "SVM", "PH")
+    assert registry.loads == [1, 2, 3, 2]
+
+
+def test_eviction_by_size(registry):
+    write_bundle(1, size=600)
+    write_bundle(2, size=600)
+    registry.get(1, "SVM", "PH")
+    registry.get(2, "SVM", "PH")
+    assert registry.stats()["entries"] == 1
+    assert registry.stats()["bytes"] == 600
+    registry.get(2, "SVM", "PH")
+    assert registry.loads == [1, 2]
+
+
+def test_mtime_invalidation(registry):
+    write_bundle(1, mtime_ns=1_000_000_000)
+    first = registry.get(1, "SVM", "PH")
+    assert registry.get(1, "SVM", "PH") is first
+
+    # 重新训练覆盖模型文件后重新加载
+    write_bundle(1, mtime_ns=2_000_000_000)
+    second = registry.get(1, "SVM", "PH")
+    assert second is not first
+    assert registry.loads == [1, 1]
+
+    # 模型文件被删除后返回None并移除条目
+    os.remove(bundle_path(1))
+    assert registry.get(1, "SVM", "PH") is None
+    assert registry.stats()["entries"] == 0
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import Application
+from benchmarks import Synthetic
+from db.Model import Model
+from monitoring.Profiling import ProfileCapture, ProfilerBusy
+
+
+class ConstantTrainer:
+    def predict(self, features):
+        return np.full(len(features), 7.0)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profiles"))
+    _, session_factory = Synthetic.create_standin()
+    db = session_factory()
+    db.add(Model(id=1, name="m", target="PH", method="SVM", uid=1, date=datetime(2024, 1, 1)))
+    db.commit()
+    db.close()
+    monkeypatch.setattr(Application, "SessionLocal", session_factory)
+    monkeypatch.setattr(Application.model_registry, "get", lambda *args: ConstantTrainer())
+    # 不进入lifespan，不预加载模型
+    return TestClient(Application.app)
+
+
+def test_one_capture_at_a_time(tmp_path):
+    with ProfileCapture("cprofile", "first", str(tmp_path)):
+        with pytest.raises(ProfilerBusy):
+            ProfileCapture("cprofile", "second", str(tmp_path)).__enter__()
+    # 结束（包括异常退出）后释放
+    with pytest.raises(ZeroDivisionError):
+        with ProfileCapture("cprofile", "third", str(tmp_path)):
+            1 / 0
+    with ProfileCapture("cprofile", "fourth", str(tmp_path)) as capture:
+        pass
+    assert capture.path.endswith(".prof")
+
+
+@pytest.mark.parametrize("url", ["/api/prediction?model_id=1&month=3", "/api/forecast?model_id=1&horizon=2"])
+def test_profiled_request_conflict(client, tmp_path, url):
+    with ProfileCapture("cprofile", "running", str(tmp_path)):
+        response = client.get(url + "&profile=cprofile")
+        assert response.status_code == 409
+        # 不分析的请求不受影响
+        assert client.get(url).json()["status"] == "success"
+
+    data = client.get(url + "&profile=cprofile").json()["data"]
+    assert data["profile"].startswith(str(tmp_path / "profiles"))
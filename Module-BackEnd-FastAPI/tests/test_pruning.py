@@ -0,0 +1,49 @@
+import pytest
+
+from tuners.Pruning import SuccessiveHalvingPruner
+
+
+def make_pruner(min_trials=1):
+    return SuccessiveHalvingPruner(min_epochs=10, reduction_factor=3, report_every=10, min_trials=min_trials)
+
+
+def test_pruning_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("TUNER_PRUNING", raising=False)
+    assert SuccessiveHalvingPruner.from_env() is None
+    monkeypatch.setenv("TUNER_PRUNING", "1")
+    assert isinstance(SuccessiveHalvingPruner.from_env(), SuccessiveHalvingPruner)
+
+
+@pytest.mark.parametrize("epoch, rung", [(1, -1), (9, -1), (10, 0), (29, 0), (30, 1), (89, 1), (90, 2), (270, 3)])
+def test_rung_of(epoch, rung):
+    assert make_pruner().rung_of(epoch) == rung
+
+
+def test_keeps_top_fraction():
+    pruner = make_pruner()
+    # 每次与已到达梯级的试验比较，保留前1/3（至少一个）
+    results = [pruner.should_prune(0, rmse) for rmse in [0.5, 0.4, 0.6, 0.3, 0.45, 0.35]]
+    assert results == [False, False, True, False, True, False]
+    assert pruner.rungs[0] == [0.3, 0.35, 0.4, 0.45, 0.5, 0.6]
+
+
+def test_min_trials_per_rung():
+    pruner = make_pruner(min_trials=3)
+    # 前两次试验样本不足，较差的也不剪枝
+    assert [pruner.should_prune(0, rmse) for rmse in [0.4, 0.9]] == [False, False]
+    assert pruner.should_prune(0, 0.8) is True
+    # 其他梯级单独计数
+    assert pruner.should_prune(1, 0.9) is False
+
+
+def test_monitor_checks_each_rung_once():
+    pruner = make_pruner()
+    pruner.should_prune(0, 0.1)
+    pruner.should_prune(1, 0.1)
+    should_stop = pruner.monitor()
+    assert should_stop(5, 1.0) is False
+    assert should_stop(10, 0.05) is False
+    # 同一梯级不再比较
+    assert should_stop(20, 1.0) is False
+    assert should_stop(30, 1.0) is True
+    assert pruner.rungs[0] == [0.05, 0.1]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from features.Resample import bucket_start, resample, resolve_resolution
+
+
+def dates(*values):
+    return np.array(values, dtype='datetime64[us]')
+
+
+def test_weekly_buckets_start_on_monday():
+    # 2024-01-01是周一，2024-01-07是周日
+    starts = bucket_start(dates('2024-01-01T00:00', '2024-01-03T12:00', '2024-01-07T23:59', '2024-01-08T00:00',
+                                '1970-01-01T00:00'), "weekly")
+    np.testing.assert_array_equal(
+        starts, dates('2024-01-01', '2024-01-01', '2024-01-01', '2024-01-08', '1969-12-29')
+    )
+    assert all(start.astype(object).weekday() == 0 for start in starts)
+
+
+def test_hourly_and_daily_buckets():
+    values = dates('2024-01-01T10:45', '2024-01-02T00:00')
+    np.testing.assert_array_equal(bucket_start(values, "hourly"), dates('2024-01-01T10:00', '2024-01-02T00:00'))
+    np.testing.assert_array_equal(bucket_start(values, "daily"), dates('2024-01-01', '2024-01-02'))
+
+
+def test_resample_means_and_nan_buckets():
+    buckets, means = resample(
+        dates('2024-01-01T00:00', '2024-01-01T04:00', '2024-01-02T00:00', '2024-01-03T08:00', '2024-01-03T12:00'),
+        np.array([[1.0, np.nan], [3.0, np.nan], [np.nan, np.nan], [5.0, 2.0], [np.nan, 4.0]]),
+        "daily",
+    )
+    np.testing.assert_array_equal(buckets, dates('2024-01-01', '2024-01-02', '2024-01-03'))
+    # 空值不参与计算；时间桶内全为空值时为NaN
+    np.testing.assert_array_equal(means, np.array([[2.0, np.nan], [np.nan, np.nan], [5.0, 3.0]]))
+
+
+def test_empty_and_raw():
+    empty_dates, empty_values = resample(dates(), np.empty(0), "weekly")
+    assert empty_dates.size == 0 and empty_values.size == 0
+
+    raw_dates, raw_values = dates('2024-01-01T04:00'), np.array([1.0])
+    assert resample(raw_dates, raw_values, "raw") == (raw_dates, raw_values)
+
+
+def test_resolve_resolution(monkeypatch):
+    monkeypatch.delenv("TRAINING_RESOLUTION", raising=False)
+    assert resolve_resolution() == "raw"
+    monkeypatch.setenv("TRAINING_RESOLUTION", "daily")
+    assert resolve_resolution() == "daily"
+    assert resolve_resolution("weekly") == "weekly"
+    with pytest.raises(ValueError):
+        resolve_resolution("monthly")
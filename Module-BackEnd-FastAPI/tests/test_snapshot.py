@@ -0,0 +1,102 @@
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from benchmarks import Synthetic
+from db import Snapshot
+
+
+def refresh_worker(db_path, snapshot_dir):
+    """ 子进程：打开独立的数据库连接并刷新快照 """
+    _, session_factory = Synthetic.create_standin(db_path)
+    session = session_factory()
+    try:
+        return Snapshot.refresh(session, snapshot_dir)
+    finally:
+        session.close()
+
+
+def create_database(tmp_path):
+    db_path = str(tmp_path / "water.db")
+    engine, session_factory = Synthetic.create_standin(db_path)
+    Synthetic.load(engine, Synthetic.generate(stations=2, rows_per_station=500))
+    return db_path, engine, session_factory
+
+
+def test_concurrent_refresh(tmp_path):
+    db_path, engine, session_factory = create_database(tmp_path)
+    snapshot_dir = str(tmp_path / "snapshot")
+    session = session_factory()
+    Snapshot.export(session, snapshot_dir)
+
+    # 新增其他站点的数据后由多个进程同时刷新
+    extra = Synthetic.generate(stations=2, rows_per_station=300, seed=7)
+    extra["station"] += 2
+    Synthetic.load(engine, extra)
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        added = pool.starmap(refresh_worker, [(db_path, snapshot_dir)] * 4)
+
+    snapshot = Snapshot.Snapshot.open(snapshot_dir)
+    assert sum(added) == 600
+    assert snapshot.rows == 1600
+    assert snapshot.meta['generation'] == 2
+    assert np.unique(snapshot.columns['id']).size == 1600
+    assert all(snapshot.columns[name].size == 1600 for name in Snapshot.COLUMNS)
+    assert not [name for name in os.listdir(snapshot_dir) if name.endswith(".tmp")]
+    session.close()
+
+
+def test_open_retries_after_generation_removed(tmp_path, monkeypatch):
+    _, engine, session_factory = create_database(tmp_path)
+    snapshot_dir = str(tmp_path / "snapshot")
+    session = session_factory()
+    Snapshot.export(session, snapshot_dir)
+    with open(os.path.join(snapshot_dir, Snapshot.META_FILE), encoding='utf-8') as f:
+        stale_meta = json.load(f)
+    extra = Synthetic.generate(stations=1, rows_per_station=100, seed=7)
+    extra["station"] += 2
+    Synthetic.load(engine, extra)
+    Snapshot.refresh(session, snapshot_dir)
+
+    # 第一次读取到的meta指向已被删除的上一代文件
+    loads = []
+    real_load = json.load
+
+    def load_stale_first(f):
+        loads.append(f)
+        return stale_meta if len(loads) == 1 else real_load(f)
+
+    monkeypatch.setattr(Snapshot.json, "load", load_stale_first)
+    snapshot = Snapshot.Snapshot.open(snapshot_dir)
+    assert len(loads) == 2
+    assert snapshot.meta['generation'] == 2
+    assert snapshot.rows == 1100
+    session.close()
+
+
+def test_refresh_reexports_after_delete_or_ttl(tmp_path, monkeypatch):
+    _, engine, session_factory = create_database(tmp_path)
+    snapshot_dir = str(tmp_path / "snapshot")
+    session = session_factory()
+    try:
+        Snapshot.export(session, snapshot_dir)
+        # 删除行不改变高水位，行数不一致时改为全量导出
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM waterquality WHERE station = 2")
+        assert Snapshot.refresh(session, snapshot_dir) == 500
+        snapshot = Snapshot.Snapshot.open(snapshot_dir)
+        assert snapshot.rows == 500
+        assert set(np.unique(snapshot.columns['station'])) == {1}
+
+        # 修改已有行时行数不变，超过SNAPSHOT_TTL后全量导出
+        with engine.begin() as connection:
+            connection.exec_driver_sql("UPDATE waterquality SET PH = 1.0")
+        assert Snapshot.refresh(session, snapshot_dir) == 0
+        assert not np.all(Snapshot.Snapshot.open(snapshot_dir).columns['PH'] == 1.0)
+        monkeypatch.setattr(Snapshot, "SNAPSHOT_TTL", 1e-9)
+        Snapshot.refresh(session, snapshot_dir)
+        assert np.all(Snapshot.Snapshot.open(snapshot_dir).columns['PH'] == 1.0)
+    finally:
+        session.close()
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from hyperopt import Trials
+from hyperopt.base import Domain
+
+from tuners.Bayesian.BayesianTuner import BayesianTuner
+from tuners.Bayesian.LSTMBayesianTuner import LSTMBayesianOptimizationTuner
+from tuners import Study as study_module
+from tuners.Study import Study
+
+VALS = [
+    {'hidden_size': [0], 'num_layers': [0], 'learning_rate': [0.001], 'batch_size': [0], 'epochs': [0], 'dropout': [0]},
+    {'hidden_size': [1], 'num_layers': [1], 'learning_rate': [0.002], 'batch_size': [1], 'epochs': [0], 'dropout': [1]},
+]
+
+
+@pytest.fixture(autouse=True)
+def study_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("TUNER_STUDY_DIR", str(tmp_path / "studies"))
+
+
+def make_data(rows):
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(rows, 7)), rng.normal(size=rows)
+
+
+def open_tuner(X, y):
+    tuner = LSTMBayesianOptimizationTuner(1, "PH", None, None)
+    tuner.open_study(X, y)
+    return tuner
+
+
+def record(tuner):
+    space = tuner.get_param_space()
+    for rmse, vals in zip([0.5, 0.4], VALS):
+        tuner.study.add(BayesianTuner.params_from_vals(space, vals), rmse, vals=vals)
+
+
+def test_retune_after_data_change_seeds_previous_trials():
+    X, y = make_data(200)
+    record(open_tuner(X, y))
+
+    # 追加一行数据后重新调优：不复用缓存结果，但先前的试验用于热启动TPE
+    X, y = make_data(201)
+    tuner = open_tuner(X, y)
+    assert tuner.study.trials == []
+    assert tuner.best_params is None
+    assert len(tuner.study.prior_trials) == 2
+    assert tuner.study.lookup(tuner.study.prior_trials[0]["params"]) is None
+
+    space = tuner.get_param_space()
+    trials = Trials()
+    BayesianTuner.warm_start(trials, tuner.study)
+    assert len(trials.trials) == 2
+    assert sorted(trials.losses()) == [0.4, 0.5]
+    doc = BayesianTuner.suggest(Domain(lambda params: 0.0, space), trials, np.random.default_rng(0))
+    assert doc['tid'] == 2
+
+
+def test_same_data_reuses_trials_without_prior():
+    X, y = make_data(200)
+    record(open_tuner(X, y))
+
+    tuner = open_tuner(X, y)
+    assert len(tuner.study.trials) == 2
+    assert tuner.study.prior_trials == []
+    assert tuner.study.lookup(tuner.study.trials[0]["params"])["rmse"] == 0.5
+
+
+def test_concurrent_studies_merge_trials(tmp_path):
+    # 两个任务打开同一研究，各自落盘后不会覆盖对方的试验
+    first = Study.open(1, "a" * 64, str(tmp_path), space="s")
+    second = Study.open(1, "a" * 64, str(tmp_path), space="s")
+    first.add({"x": 1}, 0.5, state_dict={"w": 1})
+    second.add({"x": 2}, 0.3, state_dict={"w": 2})
+    first.add({"x": 3}, 0.4, state_dict={"w": 3})
+
+    study = Study.open(1, "a" * 64, str(tmp_path), space="s")
+    assert sorted(trial["params"]["x"] for trial in study.trials) == [1, 2, 3]
+    assert study.best()["params"] == {"x": 2}
+    assert study.best_state() == {"w": 2}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_old_studies_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(study_module, "STUDY_KEEP", 2)
+    other_space = Study.open(1, "f" * 64, str(tmp_path), space="t")
+    other_space.add({"x": 0}, 1.0)
+    for index, key in enumerate("abc"):
+        Study.open(1, key * 64, str(tmp_path), space="s").add({"x": index}, 1.0, state_dict={"w": index})
+
+    names = sorted(path.name for path in tmp_path.glob("study_*"))
+    assert names == [
+        f"study_1_{'b' * 16}.json", f"study_1_{'b' * 16}_best.pth",
+        f"study_1_{'c' * 16}.json", f"study_1_{'c' * 16}_best.pth",
+        f"study_1_{'f' * 16}.json",
+    ]
@@ -0,0 +1,12 @@
+def artifact_paths(model_id):
+    """
+    旧格式的模型文件与归一化器文件路径
+    不依赖sklearn/torch，模型缓存判断文件版本时无需导入训练器
+    :return: (model_path, scaler_path)
+    """
+    return f"cached_models/model_{model_id}.joblib", f"cached_models/scaler_{model_id}.joblib"
+
+
+def bundle_path(model_id):
+    """ 单文件模型包路径 """
+    return f"cached_models/model_{model_id}.bundle"
@@ -0,0 +1,278 @@
+import copy
+import os
+import time
+from abc import ABC
+
+import joblib
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from monitoring.Metrics import TRAINING_EPOCHS, TRAINING_SECONDS
+from trainers.BaseTrainer import BaseTrainer
+from trainers.MiniBatch import MiniBatchIterator
+
+# 推理模式：eager（原始fp32网络）、script（TorchScript）、quantized（动态int8量化 + TorchScript）
+INFERENCE_MODES = ("eager", "script", "quantized")
+
+
+def export_inference_model(model, mode):
+    """
+    导出CPU推理用网络
+    :param model: 训练好的fp32网络
+    :param mode: 推理模式，见INFERENCE_MODES
+    :return: 推理用网络（eager时返回原网络）
+    """
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"不支持的推理模式: {mode}")
+    if mode == "eager":
+        return model
+
+    model = copy.deepcopy(model).cpu().eval()
+    if mode == "quantized":
+        # LSTM/GRU与全连接层的权重量化为int8，激活值在运行时动态量化；nn.RNN不支持动态量化，保持fp32
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {nn.LSTM, nn.GRU, nn.Linear}, dtype=torch.qint8
+        )
+    return torch.jit.freeze(torch.jit.script(model))
+
+
+def architecture_of(model):
+    """ 网络结构超参数（不含输入维度），用于从模型包重建网络 """
+    rnn = next(module for module in model.modules() if isinstance(module, nn.RNNBase))
+    return {
+        "hidden_size": rnn.hidden_size,
+        "num_layers": rnn.num_layers,
+        "output_size": model.fc.out_features,
+        "dropout": rnn.dropout,
+    }
+
+
+class BaseRNNTrainer(BaseTrainer, ABC):
+    """
+    循环神经网络训练器基类
+    小批量训练，可选基于验证集的早停
+    """
+    def __init__(self, model_id, target_name, scaler=None, inference_mode=None):
+        """
+        :param inference_mode: 推理模式，默认读取环境变量RNN_INFERENCE（eager）
+        """
+        super().__init__(model_id, target_name, scaler)
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.inference_mode = inference_mode or os.getenv("RNN_INFERENCE", "eager")
+        # 推理用网络与其所在设备，由_prepare_inference构建
+        self.inference_model = None
+        self.inference_device = self.device
+
+# private
+    @staticmethod
+    def _reshape(X):
+        """ 转换为RNN输入格式 [samples, time_steps, features] """
+        return X.reshape(X.shape[0], 1, X.shape[1])
+
+    def _evaluate_loss(self, criterion, X, y, batch_size):
+        """ 计算数据集上的平均损失 """
+        self.model.eval()
+        total = 0.0
+        with torch.no_grad():
+            for X_batch, y_batch in MiniBatchIterator(X, y, batch_size=max(batch_size, 1024), shuffle=False):
+                total += criterion(self.model(X_batch), y_batch).item() * X_batch.shape[0]
+        self.model.train()
+        return total / X.shape[0]
+
+    def _prepare_inference(self):
+        """ 按推理模式构建推理用网络，TorchScript与量化网络在CPU上执行 """
+        self.model.eval()
+        self.inference_model = export_inference_model(self.model, self.inference_mode)
+        self.inference_device = self.device if self.inference_mode == "eager" else torch.device('cpu')
+
+    def _infer(self, X_tensor):
+        """ 使用推理用网络计算预测值 """
+        with torch.no_grad():
+            return self.inference_model(X_tensor.to(self.inference_device)).cpu().numpy()
+
+    def _output_model(self, index):
+        """ 联合训练的多输出网络中第index个指标对应的单输出网络（循环层不变，输出层只保留对应的一行） """
+        model = copy.deepcopy(self.model)
+        fc = nn.Linear(model.fc.in_features, 1).to(model.fc.weight.device)
+        with torch.no_grad():
+            fc.weight.copy_(model.fc.weight[index:index + 1])
+            fc.bias.copy_(model.fc.bias[index:index + 1])
+        model.fc = fc
+        return model.eval()
+# public
+    def train(self, X, y, epochs=100, batch_size=32, early_stopping=False, patience=10, validation_split=0.1):
+        """
+        训练模型
+        y为二维标签矩阵[样本数, 指标数]时联合训练全部指标（网络output_size为指标数），
+        此时不保存模型，由save_outputs拆分为各指标的单输出网络后分别保存
+        :param X: 特征向量（未标准化）
+        :param y: 真实标签
+        :param epochs: 最大迭代轮数
+        :param batch_size: 小批量的样本数量
+        :param early_stopping: 是否启用早停：从训练集划出验证集，验证损失连续patience轮未下降时停止，并恢复最佳轮的参数
+        :param patience: 早停容忍轮数
+        :param validation_split: 早停时验证集占训练集的比例
+        :return: rmse（联合训练时为各指标的RMSE列表）, X_test, y_test, y_pred
+        """
+        start_time = time.perf_counter()
+        self.timer.restart()
+
+        # 数据标准化
+        X_scaled = self.scaler.fit_transform(X)
+        joint = y.ndim == 2
+        y = y if joint else y.reshape(-1, 1)
+
+        # 划分训练集和测试集
+        X_train, X_test, y_train, y_test = train_test_split(
+            self._reshape(X_scaled), y, test_size=0.2, random_state=42
+        )
+        X_val = y_val = None
+        if early_stopping:
+            X_train, X_val, y_train, y_val = train_test_split(
+                X_train, y_train, test_size=validation_split, random_state=42
+            )
+
+        # 联合训练时各指标量纲不同，标签按列标准化后训练，避免损失被方差大的指标主导
+        y_mean = y_train.mean(axis=0) if joint else 0.0
+        y_std = np.where(y_train.std(axis=0) > 0, y_train.std(axis=0), 1.0) if joint else 1.0
+        y_train = (y_train - y_mean) / y_std
+        if early_stopping:
+            y_val = (y_val - y_mean) / y_std
+
+        # 转换为张量
+        X_train = torch.FloatTensor(X_train).to(self.device)
+        X_test = torch.FloatTensor(X_test).to(self.device)
+        y_train = torch.FloatTensor(y_train).to(self.device)
+        y_test = torch.FloatTensor(y_test).to(self.device)
+        if early_stopping:
+            X_val = torch.FloatTensor(X_val).to(self.device)
+            y_val = torch.FloatTensor(y_val).to(self.device)
+        self.timer.mark("scale")
+
+        # 初始化模型、损失函数和优化器
+        self.model = self._build_model(output_size=y.shape[1])
+        # 损失函数使用MSE
+        criterion = nn.MSELoss()
+        # Adam优化器 https://blog.fxmarkbrown.top/article/139
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001)
+        batches = MiniBatchIterator(X_train, y_train, batch_size=batch_size)
+
+        # 训练循环
+        best_loss = float('inf')
+        best_state = None
+        best_epoch = epochs
+        epochs_run = 0
+        self.model.train()
+        for epoch in range(epochs):
+            epoch_loss = 0.0
+            for X_batch, y_batch in batches:
+                optimizer.zero_grad()
+                outputs = self.model(X_batch)
+                loss = criterion(outputs, y_batch)
+                loss.backward()
+                optimizer.step()
+                epoch_loss += loss.item() * X_batch.shape[0]
+            epoch_loss /= X_train.shape[0]
+            epochs_run = epoch + 1
+
+            if (epoch + 1) % 10 == 0:
+                print(f'训练: [{epoch + 1}/{epochs}] 轮, 损失: {epoch_loss:.4f}')
+
+            if early_stopping:
+                val_loss = self._evaluate_loss(criterion, X_val, y_val, batch_size)
+                if val_loss < best_loss:
+                    best_loss = val_loss
+                    best_epoch = epoch + 1
+                    best_state = copy.deepcopy(self.model.state_dict())
+                elif epoch + 1 - best_epoch >= patience:
+                    print(f'早停: 验证损失 {patience} 轮未下降, 最佳轮次 {best_epoch}')
+                    break
+
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
+        if joint:
+            # 标签的标准化并入输出层，网络直接输出原始量纲
+            scale = torch.as_tensor(y_std, dtype=torch.float32, device=self.device)
+            shift = torch.as_tensor(y_mean, dtype=torch.float32, device=self.device)
+            with torch.no_grad():
+                self.model.fc.weight.mul_(scale[:, None])
+                self.model.fc.bias.mul_(scale).add_(shift)
+        TRAINING_EPOCHS.inc(epochs_run, trainer=type(self).__name__)
+        self.timer.mark("fit")
+
+        # 评估模型
+        self.model.eval()
+        with torch.no_grad():
+            y_pred = self.model(X_test).cpu().numpy()
+            y_test_np = y_test.cpu().numpy()
+
+        rmse = np.sqrt(mean_squared_error(y_test_np, y_pred, multioutput='raw_values'))
+        rmse = rmse.tolist() if joint else float(rmse[0])
+        self.timer.mark("evaluate")
+        self.training_stats = {
+            "rmse": rmse,
+            "epochs": epochs_run,
+            "best_epoch": best_epoch if early_stopping else epochs_run,
+            "train_seconds": round(time.perf_counter() - start_time, 3),
+        }
+        if joint:
+            TRAINING_SECONDS.observe(time.perf_counter() - start_time, trainer=type(self).__name__)
+            return rmse, X_test.cpu().numpy(), y_test_np, y_pred
+        self._save_model()
+        self.timer.mark("save")
+
+        # 记录优化推理模式相对fp32网络的精度变化
+        self._prepare_inference()
+        if self.inference_mode != "eager":
+            inference_rmse = float(np.sqrt(mean_squared_error(y_test_np, self._infer(X_test))))
+            print(f"推理模式 {self.inference_mode}: RMSE {inference_rmse:.4f} (fp32: {rmse:.4f})")
+            self.training_stats.update({
+                "inference_mode": self.inference_mode,
+                "inference_rmse": inference_rmse,
+                "inference_rmse_delta": inference_rmse - rmse,
+            })
+            self.timer.mark("export")
+        TRAINING_SECONDS.observe(time.perf_counter() - start_time, trainer=type(self).__name__)
+        return rmse, X_test.cpu().numpy().flatten(), y_test_np.flatten(), y_pred.flatten()
+
+    def predict(self, X):
+        """预测接口"""
+        if self.inference_model is None:
+            self._prepare_inference()
+        X_scaled = self.scaler.transform(X)
+        X_tensor = torch.FloatTensor(self._reshape(X_scaled))
+        return self._infer(X_tensor).flatten()
+
+    def _bundle_contents(self):
+        """ 模型包内容：网络权重与结构超参数 """
+        arrays, blobs = self._scaler_arrays()
+        for name, tensor in self.model.state_dict().items():
+            arrays[f"weights/{name}"] = tensor.detach().cpu().numpy()
+        return arrays, blobs, {"torch_version": torch.__version__, "architecture": architecture_of(self.model)}
+
+    def _load_bundle(self, bundle):
+        """ 按结构超参数重建网络并加载权重 """
+        self.model = self._build_model(**bundle.metadata["architecture"])
+        state_dict = {
+            name[len("weights/"):]: torch.from_numpy(bundle.array(name))
+            for name in bundle.names() if name.startswith("weights/")
+        }
+        # CPU上直接以映射内存作为参数（不复制），float32存储时多个工作进程共享页缓存
+        self.model.load_state_dict(state_dict, assign=self.device.type == 'cpu')
+        self.model.eval()
+
+    def _load_legacy(self):
+        """ 加载旧格式的网络参数与归一化器 """
+        self.model = self._build_model()
+        self.model.load_state_dict(torch.load(self.model_path, map_location=self.device))
+        self.scaler = joblib.load(self.scaler_path)
+
+    def load_model(self):
+        """ 加载网络参数与归一化器，并构建推理用网络 """
+        if not super().load_model():
+            return False
+        self._prepare_inference()
+        return True
@@ -1,10 +1,20 @@
 import os
+import pickle
+import time
 from abc import ABC, abstractmethod
 
 import joblib
 import numpy as np
+import sklearn
 from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import train_test_split
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.preprocessing import StandardScaler
+
+from monitoring.Metrics import TRAINING_SECONDS, TRAINING_STAGE_SECONDS
+from monitoring.Profiling import StageTimer
+from trainers.Artifacts import artifact_paths, bundle_path
+from trainers.Bundle import Bundle, write_bundle
 
 
 class BaseTrainer(ABC):
@@ -12,9 +22,21 @@ class BaseTrainer(ABC):
         self.model_id = model_id
         self.target_name = target_name
         self.model = None
-        self.scaler = scaler
-        self.model_path = f"cached_models/model_{model_id}.joblib"
-        self.scaler_path = f"cached_models/scaler_{model_id}.joblib"
+        self.scaler = scaler or StandardScaler()
+        # 最近一次训练的统计信息（轮数、耗时等）
+        self.training_stats = {}
+        # 训练各阶段计时：fetch / featurize（由TrainingService读取数据时记录）/ scale / fit / evaluate / save
+        self.timer = StageTimer(TRAINING_STAGE_SECONDS, trainer=type(self).__name__)
+        self.model_path, self.scaler_path = self.artifact_paths(model_id)
+        self.bundle_path = bundle_path(model_id)
+
+    @staticmethod
+    def artifact_paths(model_id):
+        """
+        模型文件与归一化器文件路径
+        :return: (model_path, scaler_path)
+        """
+        return artifact_paths(model_id)
 
 # private
     @abstractmethod
@@ -24,49 +46,149 @@ class BaseTrainer(ABC):
         """
         pass
 
+    def _scaler_arrays(self):
+        """ 归一化器参数（StandardScaler以数组保存，其他归一化器序列化为二进制块） """
+        if type(self.scaler) is StandardScaler:
+            return {
+                "scaler/mean": self.scaler.mean_,
+                "scaler/scale": self.scaler.scale_,
+                "scaler/var": self.scaler.var_,
+                "scaler/n_samples_seen": np.asarray(self.scaler.n_samples_seen_),
+            }, {}
+        return {}, {"scaler": pickle.dumps(self.scaler, protocol=pickle.HIGHEST_PROTOCOL)}
+
+    def _load_scaler(self, bundle):
+        """ 从模型包恢复归一化器 """
+        if "scaler" in bundle.header["blobs"]:
+            self.scaler = pickle.loads(bundle.blob("scaler"))
+            return
+        self.scaler = StandardScaler()
+        self.scaler.mean_ = np.array(bundle.array("scaler/mean"))
+        self.scaler.scale_ = np.array(bundle.array("scaler/scale"))
+        self.scaler.var_ = np.array(bundle.array("scaler/var"))
+        self.scaler.n_samples_seen_ = np.array(bundle.array("scaler/n_samples_seen"))
+        self.scaler.n_features_in_ = self.scaler.mean_.shape[0]
+
+    def _bundle_contents(self):
+        """
+        模型包内容
+        :return: (数组, 二进制块, 元数据)
+        """
+        arrays, blobs = self._scaler_arrays()
+        blobs["model"] = pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)
+        return arrays, blobs, {"sklearn_version": sklearn.__version__}
+
+    def _load_bundle(self, bundle):
+        """ 从模型包恢复模型 """
+        self.model = pickle.loads(bundle.blob("model"))
+
     def _save_model(self):
-        """ 保存模型 """
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.scaler, self.scaler_path)
+        """
+        保存为单文件模型包（网络权重/模型、归一化器参数、结构超参数与训练信息）
+        环境变量MODEL_BUNDLE_FP16为1时float32权重以float16存储
+        """
+        arrays, blobs, metadata = self._bundle_contents()
+        metadata.update({
+            "trainer": type(self).__name__,
+            "model_id": self.model_id,
+            "target": self.target_name,
+            "training": self.training_stats,
+        })
+        write_bundle(
+            self.bundle_path, arrays, metadata, blobs,
+            fp16=os.getenv("MODEL_BUNDLE_FP16") == "1"
+        )
+
+    def _load_legacy(self):
+        """ 加载旧格式的模型文件与归一化器文件 """
+        self.model = joblib.load(self.model_path)
+        self.scaler = joblib.load(self.scaler_path)
+
+    def _output_model(self, index):
+        """ 联合训练的多输出模型中第index个指标对应的单输出模型 """
+        return self.model.estimators_[index]
 # public
     def train(self, X, y):
         """
         训练模型
-        :param X: 特征向量
+        y为二维标签矩阵[样本数, 指标数]时联合训练全部指标（以MultiOutputRegressor包装），
+        此时不保存模型，由save_outputs拆分为各指标的单输出模型后分别保存
+        :param X: 特征向量（未标准化）
         :param y: 真实标签
-        :return:
+        :return: rmse（联合训练时为各指标的RMSE列表）, X_test, y_test, y_pred
         """
+        start_time = time.perf_counter()
+        self.timer.restart()
+
+        # 数据标准化
+        X_scaled = self.scaler.fit_transform(X)
+
         # 划分训练集和测试集
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X_scaled, y, test_size=0.2, random_state=42
         )
+        self.timer.mark("scale")
 
         # 训练模型
-        self.model = self._build_model()
+        joint = y.ndim == 2
+        self.model = MultiOutputRegressor(self._build_model()) if joint else self._build_model()
         self.model.fit(X_train, y_train)
+        self.timer.mark("fit")
 
         # 评估模型
-        y_pred = self.predict(X_test)
-        rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+        y_pred = self.model.predict(X_test)
+        rmse = np.sqrt(mean_squared_error(y_test, y_pred, multioutput='raw_values'))
+        rmse = rmse.tolist() if joint else float(rmse[0])
+        self.timer.mark("evaluate")
 
         # 保存模型
-        self._save_model()
+        self.training_stats = {"rmse": rmse, "train_seconds": round(time.perf_counter() - start_time, 3)}
+        if not joint:
+            self._save_model()
+            self.timer.mark("save")
+        TRAINING_SECONDS.observe(time.perf_counter() - start_time, trainer=type(self).__name__)
         return rmse, X_test, y_test, y_pred
 
+    def save_outputs(self, model_ids, target_names):
+        """
+        将联合训练的模型拆分为每个指标一个单输出模型（共用归一化器）并分别保存
+        拆分后的模型包与单指标训练的格式一致，预测时无需区分
+        :param model_ids: 各指标的模型ID，顺序与训练时y的列一致
+        :param target_names: 各指标名
+        :return: 各指标的训练器
+        """
+        trainers = []
+        for index, (model_id, target_name) in enumerate(zip(model_ids, target_names)):
+            trainer = type(self)(model_id, target_name, self.scaler)
+            trainer.model = self._output_model(index)
+            trainer.training_stats = {
+                **self.training_stats,
+                "rmse": self.training_stats["rmse"][index],
+                "joint_targets": list(target_names),
+            }
+            trainer._save_model()
+            trainers.append(trainer)
+        self.timer.mark("save")
+        return trainers
+
     def predict(self, X):
         """
         预测接口
-        :param X: 待预测数据
+        :param X: 待预测数据（未标准化，形状为[样本数, 7]）
         """
-        return self.model.predict(X)
+        return self.model.predict(self.scaler.transform(X))
 
     def load_model(self):
         """
-        加载模型
+        加载模型：优先读取单文件模型包，不存在时读取旧格式文件
+        环境变量MODEL_BUNDLE_MMAP为0时不使用内存映射
         """
+        if os.path.exists(self.bundle_path):
+            bundle = Bundle.open(self.bundle_path, mmap=os.getenv("MODEL_BUNDLE_MMAP", "1") != "0")
+            self._load_scaler(bundle)
+            self._load_bundle(bundle)
+            return True
         if not os.path.exists(self.model_path) or not os.path.exists(self.scaler_path):
             return False
-        self.model = joblib.load(self.model_path)
-        self.scaler = joblib.load(self.scaler_path)
+        self._load_legacy()
         return True
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+import os
+import struct
+import time
+import uuid
+
+import numpy as np
+
+# 文件格式
+# MAGIC(8字节) | 头部长度(uint32, 小端) | 头部JSON(UTF-8) | 按ALIGNMENT对齐的数组与二进制块
+MAGIC = b"WQBUNDLE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sI")
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_bundle(path, arrays, metadata, blobs=None, fp16=False):
+    """
+    写入单文件模型包（先写临时文件再替换，已打开旧文件的进程不受影响）
+    :param arrays: 名称 -> numpy数组（网络权重、归一化器参数）
+    :param metadata: 可JSON序列化的元数据（结构超参数、训练信息等）
+    :param blobs: 名称 -> bytes（无法表示为数组的对象，如sklearn模型）
+    :param fp16: 是否以float16存储float32数组
+    """
+    blobs = blobs or {}
+    entries = []
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        stored = array.astype(np.float16) if fp16 and array.dtype == np.float32 else array
+        entries.append(("arrays", name, stored.tobytes(), {
+            "dtype": array.dtype.str,
+            "stored_dtype": stored.dtype.str,
+            "shape": list(array.shape),
+        }))
+    for name, data in blobs.items():
+        entries.append(("blobs", name, bytes(data), {}))
+
+    # 头部记录每个数据块的偏移，偏移依赖头部长度，因此先用占位偏移计算头部大小
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "metadata": metadata,
+        "arrays": {},
+        "blobs": {},
+    }
+    for section, name, data, info in entries:
+        header[section][name] = {**info, "offset": 0, "nbytes": len(data)}
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    # 偏移数字变长，预留足够的空间
+    data_start = _align(_PREFIX.size + len(header_bytes) + 32 * len(entries))
+
+    offset = data_start
+    for section, name, data, _ in entries:
+        header[section][name]["offset"] = offset
+        offset = _align(offset + len(data))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # 同一模型可能被多个进程同时训练，各自写入唯一的临时文件
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            for section, name, data, _ in entries:
+                f.write(b"\0" * (header[section][name]["offset"] - f.tell()))
+                f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class Bundle:
+    """
+    单文件模型包
+    默认以写时复制方式内存映射，数组按需分页读取，多个工作进程打开同一文件时共享页缓存
+    """
+    def __init__(self, path, header, buffer):
+        self.path = path
+        self.header = header
+        self._buffer = buffer
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """
+        打开模型包
+        :param mmap: 是否内存映射，为False时整体读入内存
+        :raise ValueError: 文件格式错误或版本过高
+        """
+        with open(path, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size or prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"不是模型包文件: {path}")
+            _, header_length = _PREFIX.unpack(prefix)
+            try:
+                header = json.loads(f.read(header_length).decode("utf-8"))
+            except ValueError:
+                # 文件被截断或头部损坏（JSON与UTF-8解码错误均为ValueError）
+                raise ValueError(f"模型包头部损坏: {path}") from None
+            file_size = os.fstat(f.fileno()).st_size
+        if header["format_version"] > FORMAT_VERSION:
+            raise ValueError(f"模型包版本 {header['format_version']} 高于支持的版本 {FORMAT_VERSION}: {path}")
+        for section in ("arrays", "blobs"):
+            for info in header[section].values():
+                if info["offset"] + info["nbytes"] > file_size:
+                    raise ValueError(f"模型包数据不完整: {path}")
+
+        if mmap:
+            buffer = np.memmap(path, dtype=np.uint8, mode="c")
+        else:
+            buffer = np.fromfile(path, dtype=np.uint8)
+        return cls(path, header, buffer)
+
+    @property
+    def metadata(self):
+        return self.header["metadata"]
+
+    def names(self):
+        """ 数组名称 """
+        return list(self.header["arrays"])
+
+    def array(self, name):
+        """
+        读取数组，以原始精度返回
+        float32以原精度存储时直接返回映射视图（不复制）；以float16存储时转换回float32
+        """
+        info = self.header["arrays"][name]
+        stored = self._buffer[info["offset"]:info["offset"] + info["nbytes"]]
+        stored = stored.view(np.dtype(info["stored_dtype"])).reshape(info["shape"])
+        if info["stored_dtype"] != info["dtype"]:
+            return stored.astype(np.dtype(info["dtype"]))
+        return stored
+
+    def blob(self, name):
+        """ 读取二进制块 """
+        info = self.header["blobs"][name]
+        return self._buffer[info["offset"]:info["offset"] + info["nbytes"]].tobytes()
@@ -0,0 +1,29 @@
+import torch
+
+
+class MiniBatchIterator:
+    """
+    张量小批量迭代器
+    每轮只生成一次随机排列并整体重排一次，各批次是重排后张量的连续切片（视图），不逐批拷贝
+    """
+    def __init__(self, *tensors, batch_size=32, shuffle=True):
+        """
+        :param tensors: 第一维长度相同的张量（如X, y）
+        :param batch_size: 每批样本数
+        :param shuffle: 每轮是否打乱顺序
+        """
+        self.tensors = tensors
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.size = tensors[0].shape[0]
+
+    def __len__(self):
+        return (self.size + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        tensors = self.tensors
+        if self.shuffle:
+            perm = torch.randperm(self.size, device=tensors[0].device)
+            tensors = [tensor[perm] for tensor in tensors]
+        for start in range(0, self.size, self.batch_size):
+            yield tuple(tensor[start:start + self.batch_size] for tensor in tensors)
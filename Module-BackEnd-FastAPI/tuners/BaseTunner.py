@@ -1,12 +1,94 @@
+import json
 import os
+import time
 from abc import ABC, abstractmethod
 
 import joblib
 import numpy as np
 import torch
 import torch.nn as nn
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
 from sqlalchemy.orm import Session
 
+from db.Model import Model
+from monitoring.Metrics import TUNING_STAGE_SECONDS, TUNING_TRIALS
+from monitoring.Profiling import StageTimer
+from trainers.MiniBatch import MiniBatchIterator
+from tuners.Pruning import SuccessiveHalvingPruner
+from tuners.Study import Study, fingerprint, space_fingerprint
+
+
+def build_model(model_class, params, device):
+    """
+    按参数组合创建网络
+    :param model_class: 网络类（LSTMModel / GRUModel / BiRNNModel）
+    """
+    return model_class(
+        input_size=7,
+        hidden_size=params['hidden_size'],
+        num_layers=params['num_layers'],
+        dropout=params['dropout']
+    ).to(device)
+
+
+def rmse_of(model, X_test, y_test):
+    """ 计算模型在测试集上的RMSE """
+    model.eval()
+    with torch.no_grad():
+        y_pred = model(X_test).cpu().numpy()
+        y_test_np = y_test.cpu().numpy()
+
+    return float(np.sqrt(np.mean((y_test_np - y_pred) ** 2)))
+
+
+class TrialTimeout(Exception):
+    """ 调优时间预算耗尽，试验被中断 """
+    pass
+
+
+def train_and_score(model, X_train, X_test, y_train, y_test, params, pruner=None, deadline=None):
+    """
+    训练模型并返回测试集RMSE
+    不依赖调优器状态，可在调优进程或并行试验的工作进程中执行
+    :param pruner: 剪枝器，为None时训练完整轮数
+    :param deadline: 截止时间（time.time()），超过后在当前轮结束时抛出TrialTimeout
+    :return: (rmse, 是否被提前停止)
+    """
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=params['learning_rate'])
+
+    # 小批量迭代器只构建一次，每轮按随机排列重排后切片
+    batches = MiniBatchIterator(X_train, y_train, batch_size=params['batch_size'])
+    should_stop = pruner.monitor() if pruner is not None else None
+
+    # 训练模型
+    model.train()
+    for epoch in range(params['epochs']):
+        if deadline is not None and time.time() >= deadline:
+            raise TrialTimeout(f"时间预算耗尽，试验在第{epoch}轮中断")
+
+        for X_batch, y_batch in batches:
+            optimizer.zero_grad()
+            outputs = model(X_batch)
+            loss = criterion(outputs, y_batch)
+            loss.backward()
+            optimizer.step()
+
+        if (epoch + 1) % 20 == 0:
+            print(f"  轮次 [{epoch + 1}/{params['epochs']}], 损失: {loss.item():.4f}")
+
+        # 定期上报中间RMSE，没有希望的参数组合提前停止
+        if should_stop is not None and (epoch + 1) % pruner.report_every == 0 and epoch + 1 < params['epochs']:
+            rmse = rmse_of(model, X_test, y_test)
+            if should_stop(epoch + 1, rmse):
+                print(f"  轮次 [{epoch + 1}/{params['epochs']}] 中间RMSE: {rmse:.4f}，提前停止")
+                return rmse, True
+            model.train()
+
+    # 评估模型
+    return rmse_of(model, X_test, y_test), False
+
 
 class BaseTuner(ABC):
     """
@@ -21,24 +103,104 @@ class BaseTuner(ABC):
     epochs: 迭代轮数
     dropout: 随机丢弃概率
     """
-    def __init__(self, model_id, target_name, scaler, db_session: Session):
+    # 待调优的网络类，由子类指定
+    model_class = None
+    # 网络名称，用于日志
+    model_name = None
+
+    def __init__(self, model_id, target_name, scaler, db_session: Session, n_jobs=None, time_budget=None):
+        """
+        :param scaler: 归一化器，为None时使用StandardScaler
+        :param n_jobs: 并行执行试验的进程数，默认读取环境变量TUNER_N_JOBS，1表示在当前进程中串行执行
+        :param time_budget: 调优时间预算（秒），默认读取环境变量TUNER_TIME_BUDGET，0表示不限
+        """
         self.model_id = model_id
         self.target_name = target_name
-        self.scaler = scaler
+        self.scaler = scaler or StandardScaler()
         self.db_session = db_session
         self.best_rmse = float('inf')
         self.best_params = None
+        # 进度回调 progress_callback(已完成的参数组合数)
+        self.progress_callback = None
+        self.n_trials_done = 0
+        self.n_trials_pruned = 0
+        # 剪枝器，为None时每组参数训练完整轮数
+        self.pruner = SuccessiveHalvingPruner.from_env()
+        # 持久化的调优研究，在tune中按数据集与搜索空间打开
+        self.study = None
+        self.time_budget = time_budget or float(os.getenv("TUNER_TIME_BUDGET", "0")) or None
+        self.deadline = None
+        self.budget_exhausted = False
+        # 调优各阶段计时：fetch / featurize（由TrainingService读取数据时记录）/ prepare / study / search / save
+        self.timer = StageTimer(TUNING_STAGE_SECONDS, tuner=type(self).__name__)
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.n_jobs = n_jobs or int(os.getenv("TUNER_N_JOBS", "1"))
+        # 每个工作进程的torch线程数，0表示按n_jobs平分CPU核心
+        self.threads_per_job = int(os.getenv("TUNER_THREADS_PER_JOB", "0")) or None
+        if self.device.type != 'cpu':
+            # 多进程共享张量只用于CPU训练，GPU上串行执行
+            self.n_jobs = 1
 
     @abstractmethod
     def get_param_space(self):
         """ 定义超参数搜索空间 """
         pass
 
-    @abstractmethod
+    def describe_space(self):
+        """ 搜索空间的描述，作为调优研究指纹的一部分 """
+        return json.dumps(self.get_param_space(), sort_keys=True)
+
+    def open_study(self, X, y):
+        """
+        按(模型ID, 数据集与搜索空间指纹)打开调优研究，并以历史最佳结果作为起点
+        数据更新后没有完全相同的研究时，同一模型与搜索空间最近的研究作为先验试验热启动TPE
+        """
+        parts = (
+            type(self).__name__,
+            self.describe_space(),
+            self.pruner.describe() if self.pruner is not None else "no pruning"
+        )
+        self.study = Study.open(self.model_id, fingerprint(X, y, *parts), space=space_fingerprint(*parts))
+        self.timer.mark("study")
+
+        best = self.study.best()
+        if best is not None:
+            self.best_rmse = best["rmse"]
+            self.best_params = best["params"]
+            state_dict = self.study.best_state()
+            if state_dict is not None:
+                self.save_best_model(state_dict)
+        if self.study.trials:
+            print(f"继续调优研究 {self.study.path}: 已有{len(self.study.trials)}次试验, 历史最佳RMSE: {self.best_rmse:.4f}")
+        if self.study.prior_trials:
+            print(f"数据更新前的调优研究: {len(self.study.prior_trials)}次试验, 用于热启动")
+        return self.study
+
+    def start_clock(self):
+        """ 开始计时，按时间预算确定截止时间 """
+        self.deadline = time.time() + self.time_budget if self.time_budget else None
+        self.budget_exhausted = False
+        self.timer.restart()
+
+    def out_of_time(self):
+        """ 是否已超过截止时间 """
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.budget_exhausted = True
+        return self.budget_exhausted
+
+    def result(self):
+        """ 调优结果：目前为止的最佳参数 """
+        return {
+            "best_rmse": self.best_rmse,
+            "best_params": self.best_params,
+            "trials": self.n_trials_done,
+            "pruned_trials": self.n_trials_pruned,
+            "budget_exhausted": self.budget_exhausted,
+        }
+
     def create_model(self, params):
         """ 创建模型 """
-        pass
+        return build_model(self.model_class, params, self.device)
 
     def preprocess_data(self, X, y):
         """ 预处理数据 """
@@ -47,57 +209,80 @@ class BaseTuner(ABC):
         X_reshaped = X_scaled.reshape(X_scaled.shape[0], 1, X_scaled.shape[1])
         return X_reshaped, y_reshaped
 
+    def prepare_tensors(self, X, y):
+        """
+        预处理数据并划分训练集和测试集
+        :return: (X_train, X_test, y_train, y_test) 张量
+        """
+        X_reshaped, y_reshaped = self.preprocess_data(X, y)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_reshaped, y_reshaped, test_size=0.2, random_state=42
+        )
+        tensors = tuple(
+            torch.FloatTensor(data).to(self.device) for data in (X_train, X_test, y_train, y_test)
+        )
+        self.timer.mark("prepare")
+        return tensors
+
     def evaluate_model(self, model, X_train, X_test, y_train, y_test, params):
         """ 训练并评估模型 """
-        criterion = nn.MSELoss()
-        optimizer = torch.optim.Adam(model.parameters(), lr=params['learning_rate'])
-
-        # 训练模型
-        model.train()
-        for epoch in range(params['epochs']):
-            # 创建数据加载器
-            train_dataset = torch.utils.data.TensorDataset(X_train, y_train)
-            train_loader = torch.utils.data.DataLoader(
-                train_dataset, batch_size=params['batch_size'], shuffle=True
-            )
-
-            for X_batch, y_batch in train_loader:
-                optimizer.zero_grad()
-                outputs = model(X_batch)
-                loss = criterion(outputs, y_batch)
-                loss.backward()
-                optimizer.step()
-
-            if (epoch + 1) % 20 == 0:
-                print(f"  轮次 [{epoch + 1}/{params['epochs']}], 损失: {loss.item():.4f}")
-
-        # 评估模型
-        model.eval()
-        with torch.no_grad():
-            y_pred = model(X_test).cpu().numpy()
-            y_test_np = y_test.cpu().numpy()
-
-        rmse = float(np.sqrt(np.mean((y_test_np - y_pred) ** 2)))
-        print(f"  参数组合RMSE: {rmse:.4f}\n")
+        rmse, pruned = train_and_score(
+            model, X_train, X_test, y_train, y_test, params, self.pruner, self.deadline
+        )
+        self.record_trial(params, rmse, model.state_dict(), pruned)
+        return rmse
+
+    def record_trial(self, params, rmse, state_dict, pruned=False, vals=None, cached=False):
+        """
+        记录一次试验结果，更新最佳参数并上报进度
+        :param state_dict: 该试验训练出的网络参数
+        :param pruned: 是否被提前停止，提前停止的试验不参与最佳参数的比较
+        :param vals: hyperopt的原始取值，随试验写入调优研究
+        :param cached: 是否直接复用调优研究中的历史结果
+        """
+        if cached:
+            print(f"  参数组合{params} 已在相同数据上评估过, RMSE: {rmse:.4f}\n")
+        elif self.study is not None:
+            self.study.add(params, rmse, pruned, vals, state_dict)
+
+        TUNING_TRIALS.inc(tuner=type(self).__name__, state="cached" if cached else "pruned" if pruned else "completed")
+        if pruned:
+            self.n_trials_pruned += 1
+            print(f"  参数组合{params} 已剪枝, 中间RMSE: {rmse:.4f}\n")
+        else:
+            print(f"  参数组合{params} RMSE: {rmse:.4f}\n")
 
         # 更新最佳参数
-        if rmse < self.best_rmse:
+        if not pruned and state_dict is not None and rmse < self.best_rmse:
             self.best_rmse = rmse
             self.best_params = params
             # 保存最佳模型
-            self.save_best_model(model)
+            self.save_best_model(state_dict)
 
-        return rmse
+        # 上报进度
+        self.n_trials_done += 1
+        if self.progress_callback is not None:
+            self.progress_callback(self.n_trials_done)
 
-    def save_best_model(self, model):
+    def save_best_model(self, state_dict):
         """ 保存最佳模型 """
         model_path = f"cached_models/model_{self.model_id}_tuned.pth"
         scaler_path = f"cached_models/scaler_{self.model_id}_tuned.pth"
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
-        torch.save(model.state_dict(), model_path)
+        torch.save(state_dict, model_path)
         joblib.dump(self.scaler, scaler_path)
 
+    def save_best_rmse(self):
+        """ 更新数据库中的最佳RMSE（在搜索结束后调用） """
+        self.timer.mark("search")
+        # noinspection PyTypeChecker
+        model_info = self.db_session.query(Model).filter(Model.id == self.model_id).first()
+        if model_info and self.best_params is not None:
+            model_info.rmse = self.best_rmse
+            self.db_session.commit()
+        self.timer.mark("save")
+
     @abstractmethod
     def tune(self, X, y):
         """执行超参数搜索 """
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,157 @@
+import numpy as np
+from hyperopt import Trials, hp, pyll, space_eval, tpe, JOB_STATE_DONE, STATUS_OK
+from hyperopt.base import Domain
+
+from tuners.BaseTunner import BaseTuner, TrialTimeout
+from tuners.Parallel import TrialRunner
+
+
+class BayesianTuner(BaseTuner):
+    """
+    贝叶斯优化调优
+    以询问/告知的方式驱动TPE：同时保持n_jobs个建议在评估中，任一试验完成即回填结果并请求下一个建议
+    """
+    def __init__(self, model_id, target_name, scaler, db_session, max_evals=20, n_jobs=None, time_budget=None):
+        super().__init__(model_id, target_name, scaler, db_session, n_jobs=n_jobs, time_budget=time_budget)
+        self.max_evals = max_evals  # 本次评估的参数组合数上限
+        self.hidden_size_options = [32, 64, 128, 256]
+        self.num_layers_options = [1, 2, 3]
+        self.batch_size_options = [16, 32, 64, 128]
+        self.epochs_options = [50, 100, 150, 200]
+        self.dropout_options = [0.1, 0.2, 0.3]
+
+    def get_param_space(self):
+        """ 定义贝叶斯优化参数空间 """
+        return {
+            'hidden_size': hp.choice('hidden_size', self.hidden_size_options),
+            'num_layers': hp.choice('num_layers', self.num_layers_options),
+            'learning_rate': hp.loguniform('learning_rate', np.log(0.0005), np.log(0.01)),
+            'batch_size': hp.choice('batch_size', self.batch_size_options),
+            'epochs': hp.choice('epochs', self.epochs_options),
+            'dropout': hp.choice('dropout', self.dropout_options)
+        }
+
+    def describe_space(self):
+        """ 搜索空间的描述，作为调优研究指纹的一部分 """
+        return str(pyll.as_apply(self.get_param_space()))
+
+    @staticmethod
+    def warm_start(trials, study):
+        """ 将调优研究中的历史试验（含数据更新前的先验试验）写入Trials，TPE从已有结果开始建议 """
+        history = [trial for trial in study.warm_start_trials() if trial["vals"] is not None]
+        if not history:
+            return
+        trial_ids = trials.new_trial_ids(len(history))
+        miscs = [
+            {
+                'tid': tid,
+                'cmd': ('domain_attachment', 'FMinIter_Domain'),
+                'workdir': None,
+                'idxs': {name: [tid] if values else [] for name, values in trial["vals"].items()},
+                'vals': trial["vals"]
+            }
+            for tid, trial in zip(trial_ids, history)
+        ]
+        results = [{'loss': trial["rmse"], 'status': STATUS_OK} for trial in history]
+        docs = trials.new_trial_docs(trial_ids, [None] * len(history), results, miscs)
+        for doc in docs:
+            doc['state'] = JOB_STATE_DONE
+        trials.insert_trial_docs(docs)
+        trials.refresh()
+
+    @staticmethod
+    def suggest(domain, trials, rng):
+        """ 向TPE请求一个新的参数组合，并登记为评估中的试验 """
+        trial_ids = trials.new_trial_ids(1)
+        trials.refresh()
+        docs = tpe.suggest(trial_ids, domain, trials, int(rng.integers(2 ** 31 - 1)))
+        trials.insert_trial_docs(docs)
+        trials.refresh()
+        return docs[0]
+
+    @staticmethod
+    def vals_from_doc(doc):
+        """ 试验记录中的原始取值（choice为索引） """
+        return {
+            name: [value.item() if hasattr(value, 'item') else value for value in values]
+            for name, values in doc['misc']['vals'].items()
+        }
+
+    @staticmethod
+    def params_from_vals(space, vals):
+        """ 将原始取值还原为实际参数 """
+        return space_eval(space, {name: values[0] for name, values in vals.items() if values})
+
+    @staticmethod
+    def complete(trials, doc, rmse):
+        """ 将试验标记为完成并回填损失 """
+        doc['state'] = JOB_STATE_DONE
+        doc['result'] = {'loss': rmse, 'status': STATUS_OK}
+        trials.refresh()
+
+    def tune(self, X, y):
+        """ 执行贝叶斯优化 """
+        print(f"开始{self.model_name}贝叶斯优化调优（最大评估{self.max_evals}次）")
+        self.start_clock()
+
+        # 预处理数据并转换为张量
+        tensors = self.prepare_tensors(X, y)
+        study = self.open_study(X, y)
+
+        # 获取参数空间，目标函数由试验执行器代为评估
+        param_space = self.get_param_space()
+        domain = Domain(lambda params: 0.0, param_space)
+        trials = Trials()
+        rng = np.random.default_rng()
+
+        # 从历史试验热启动，本次再评估max_evals组参数
+        self.warm_start(trials, study)
+        total_evals = len(trials.trials) + self.max_evals
+
+        runner = TrialRunner(
+            self.model_class,
+            tensors,
+            n_jobs=self.n_jobs,
+            threads_per_job=self.threads_per_job,
+            device=self.device,
+            pruner=self.pruner,
+            deadline=self.deadline
+        )
+        with runner:
+            pending = {}
+            while True:
+                # 补足评估中的建议，超过截止时间后不再请求新的建议
+                while len(pending) < runner.n_jobs and len(trials.trials) < total_evals and not self.out_of_time():
+                    doc = self.suggest(domain, trials, rng)
+                    vals = self.vals_from_doc(doc)
+                    params = self.params_from_vals(param_space, vals)
+                    print(f"尝试参数组合: {params}")
+
+                    # 相同数据上评估过的参数组合直接复用历史结果
+                    trial = study.lookup(params)
+                    if trial is not None:
+                        self.complete(trials, doc, trial["rmse"])
+                        self.record_trial(params, trial["rmse"], None, trial["pruned"], cached=True)
+                        continue
+                    pending[runner.submit(params)] = (doc, vals, params)
+
+                if not pending:
+                    break
+
+                # 回填已完成的试验，供TPE下一次建议使用（提前停止的试验以中间RMSE作为损失）
+                for future in runner.wait_any(pending):
+                    doc, vals, params = pending.pop(future)
+                    try:
+                        rmse, state_dict, pruned = future.result()
+                    except TrialTimeout as e:
+                        # 未训练完成的试验不记录，也不回填给TPE
+                        self.budget_exhausted = True
+                        print(f"  参数组合{params} {e}")
+                        continue
+                    self.complete(trials, doc, rmse)
+                    self.record_trial(params, rmse, state_dict, pruned, vals)
+
+        # 更新数据库中的最佳RMSE
+        self.save_best_rmse()
+
+        return self.result()
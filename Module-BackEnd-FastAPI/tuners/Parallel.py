@@ -0,0 +1,100 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import torch
+import torch.multiprocessing
+
+from tuners.BaseTunner import build_model, train_and_score
+
+# 工作进程内共享的训练/测试张量、剪枝器与截止时间
+_worker_tensors = None
+_worker_pruner = None
+_worker_deadline = None
+
+
+def _init_worker(tensors, num_threads, pruner, deadline):
+    """ 工作进程初始化：限定计算线程数，保存共享内存中的张量（不复制） """
+    global _worker_tensors, _worker_pruner, _worker_deadline
+    torch.set_num_threads(num_threads)
+    _worker_tensors = tensors
+    _worker_pruner = pruner
+    _worker_deadline = deadline
+
+
+def _run_trial(model_class, params):
+    """ 在工作进程中执行一次试验 """
+    model = build_model(model_class, params, torch.device('cpu'))
+    rmse, pruned = train_and_score(model, *_worker_tensors, params, _worker_pruner, _worker_deadline)
+    return rmse, model.state_dict(), pruned
+
+
+class TrialRunner:
+    """
+    试验执行器
+    n_jobs为1时在当前进程中同步执行；否则将张量移入共享内存，在多个工作进程中并发执行试验
+    """
+    def __init__(self, model_class, tensors, n_jobs=1, threads_per_job=None, device=None, pruner=None, deadline=None):
+        """
+        :param model_class: 网络类
+        :param tensors: (X_train, X_test, y_train, y_test)
+        :param n_jobs: 并发试验数
+        :param threads_per_job: 每个工作进程的torch线程数，默认平分CPU核心
+        :param pruner: 剪枝器，并行时梯级记录由各工作进程共享
+        :param deadline: 截止时间（time.time()），超过后正在执行的试验抛出TrialTimeout
+        """
+        self.model_class = model_class
+        self.tensors = tensors
+        self.pruner = pruner
+        self.deadline = deadline
+        self.n_jobs = max(1, n_jobs)
+        self.threads_per_job = threads_per_job or max(1, torch.get_num_threads() // self.n_jobs)
+        self.device = device or torch.device('cpu')
+        self._pool = None
+        self._manager = None
+
+    def __enter__(self):
+        if self.n_jobs > 1:
+            context = torch.multiprocessing.get_context('spawn')
+            for tensor in self.tensors:
+                tensor.share_memory_()
+            if self.pruner is not None:
+                self._manager = context.Manager()
+                self.pruner.share(self._manager)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.n_jobs,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.tensors, self.threads_per_job, self.pruner, self.deadline)
+            )
+            print(f"并行调优: {self.n_jobs} 个工作进程, 每个进程 {self.threads_per_job} 个线程")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def submit(self, params):
+        """
+        提交一次试验
+        :return: Future，结果为(rmse, state_dict, 是否被提前停止)
+        """
+        if self._pool is not None:
+            return self._pool.submit(_run_trial, self.model_class, params)
+
+        future = Future()
+        try:
+            model = build_model(self.model_class, params, self.device)
+            rmse, pruned = train_and_score(model, *self.tensors, params, self.pruner, self.deadline)
+            future.set_result((rmse, model.state_dict(), pruned))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    @staticmethod
+    def wait_any(futures):
+        """ 等待至少一个试验完成，返回已完成的Future集合 """
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        return done
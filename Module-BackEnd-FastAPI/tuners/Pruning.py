@@ -0,0 +1,82 @@
+import math
+import os
+from contextlib import nullcontext
+
+
+class SuccessiveHalvingPruner:
+    """
+    异步连续减半（ASHA）剪枝
+    试验每report_every轮在测试集上计算一次中间RMSE；训练轮数达到第k个梯级 min_epochs × reduction_factor^k 时，
+    与所有已到达该梯级的试验比较，不在前1/reduction_factor的试验提前停止。
+    不需要等待同一批试验全部到达梯级，适用于串行与多进程并行执行；
+    到达梯级的试验少于min_trials时不剪枝，避免最初的随机试验只与一两个样本比较就被停止。
+    """
+    def __init__(self, min_epochs=None, reduction_factor=None, report_every=None, min_trials=None):
+        """
+        :param min_epochs: 第一个梯级的轮数，默认读取环境变量TUNER_MIN_EPOCHS（10）
+        :param reduction_factor: 每个梯级保留的比例的倒数，默认读取环境变量TUNER_REDUCTION_FACTOR（3）
+        :param report_every: 中间RMSE的计算间隔（轮），默认读取环境变量TUNER_REPORT_EVERY（10）
+        :param min_trials: 梯级允许剪枝所需的最少试验数（含本次），默认读取环境变量TUNER_MIN_TRIALS（5）
+        """
+        self.min_epochs = min_epochs or int(os.getenv("TUNER_MIN_EPOCHS", "10"))
+        self.reduction_factor = reduction_factor or int(os.getenv("TUNER_REDUCTION_FACTOR", "3"))
+        self.report_every = report_every or int(os.getenv("TUNER_REPORT_EVERY", "10"))
+        self.min_trials = min_trials or int(os.getenv("TUNER_MIN_TRIALS", "5"))
+        # 梯级 -> 到达该梯级的中间RMSE列表
+        self.rungs = {}
+        self.lock = None
+
+    @classmethod
+    def from_env(cls):
+        """ 按环境变量TUNER_PRUNING创建剪枝器，默认不剪枝，为1时开启 """
+        if os.getenv("TUNER_PRUNING", "0") != "1":
+            return None
+        return cls()
+
+    def describe(self):
+        """ 剪枝配置的描述，作为调优研究指纹的一部分 """
+        return (
+            f"asha(min_epochs={self.min_epochs}, reduction_factor={self.reduction_factor}, "
+            f"report_every={self.report_every}, min_trials={self.min_trials})"
+        )
+
+    def share(self, manager):
+        """ 将梯级记录移入Manager，供多个工作进程共同比较 """
+        self.rungs = manager.dict(self.rungs)
+        self.lock = manager.Lock()
+
+    def rung_of(self, epoch):
+        """ 训练轮数所达到的最高梯级，未到达第一个梯级时为-1 """
+        if epoch < self.min_epochs:
+            return -1
+        return int(math.floor(math.log(epoch / self.min_epochs, self.reduction_factor) + 1e-9))
+
+    def should_prune(self, rung, rmse):
+        """
+        记录中间RMSE并判断是否停止
+        :return: 不在该梯级前1/reduction_factor时为True；该梯级的试验少于min_trials时为False
+        """
+        with self.lock or nullcontext():
+            values = sorted(self.rungs.get(rung, []) + [rmse])
+            self.rungs[rung] = values
+
+        if len(values) < self.min_trials:
+            return False
+        # 至少保留最好的一个
+        keep = max(len(values) // self.reduction_factor, 1)
+        return rmse > values[keep - 1]
+
+    def monitor(self):
+        """
+        创建单次试验的检查回调 should_stop(epoch, rmse)，每个梯级只比较一次
+        """
+        state = {"rung": -1}
+
+        def should_stop(epoch, rmse):
+            rung = self.rung_of(epoch)
+            if rung <= state["rung"]:
+                return False
+            state["rung"] = rung
+            return self.should_prune(rung, rmse)
+
+        return should_stop
@@ -0,0 +1,86 @@
+import random
+
+from tuners.BaseTunner import BaseTuner, TrialTimeout
+from tuners.Parallel import TrialRunner
+
+
+class RandomSearchTuner(BaseTuner):
+    """
+    随机搜索调优
+    参数组合事先全部生成，n_jobs大于1时由多个工作进程并发评估
+    """
+    def __init__(self, model_id, target_name, scaler, db_session, n_iter=20, n_jobs=None, time_budget=None):
+        super().__init__(model_id, target_name, scaler, db_session, n_jobs=n_jobs, time_budget=time_budget)
+        self.n_iter = n_iter  # 随机搜索迭代次数（试验数上限）
+
+    def get_param_space(self):
+        """ 定义随机搜索参数空间 """
+        return {
+            'hidden_size': [32, 64, 128, 256],
+            'num_layers': [1, 2, 3],
+            'learning_rate': [0.0005, 0.001, 0.005, 0.01],
+            'batch_size': [16, 32, 64, 128],
+            'epochs': [50, 100, 150, 200],
+            'dropout': [0.0, 0.1, 0.2, 0.3]
+        }
+
+    def tune(self, X, y):
+        """ 执行随机搜索 """
+        print(f"开始{self.model_name}随机搜索调优（尝试{self.n_iter}次）")
+        self.start_clock()
+
+        # 预处理数据并转换为张量
+        tensors = self.prepare_tensors(X, y)
+        study = self.open_study(X, y)
+
+        # 随机生成全部参数组合
+        param_space = self.get_param_space()
+        candidates = [
+            {name: random.choice(options) for name, options in param_space.items()}
+            for _ in range(self.n_iter)
+        ]
+
+        runner = TrialRunner(
+            self.model_class,
+            tensors,
+            n_jobs=self.n_jobs,
+            threads_per_job=self.threads_per_job,
+            device=self.device,
+            pruner=self.pruner,
+            deadline=self.deadline
+        )
+        with runner:
+            pending = {}
+            candidates = enumerate(candidates)
+            while True:
+                # 补足执行中的试验，超过截止时间后不再开始新的试验
+                while len(pending) < runner.n_jobs and not self.out_of_time():
+                    i, params = next(candidates, (None, None))
+                    if params is None:
+                        break
+                    print(f"尝试参数组合 {i + 1}/{self.n_iter}")
+                    # 相同数据上评估过的参数组合直接复用历史结果
+                    trial = study.lookup(params)
+                    if trial is not None:
+                        self.record_trial(params, trial["rmse"], None, trial["pruned"], cached=True)
+                        continue
+                    pending[runner.submit(params)] = params
+
+                if not pending:
+                    break
+
+                for future in runner.wait_any(pending):
+                    params = pending.pop(future)
+                    try:
+                        rmse, state_dict, pruned = future.result()
+                    except TrialTimeout as e:
+                        # 未训练完成的试验不记录
+                        self.budget_exhausted = True
+                        print(f"  参数组合{params} {e}")
+                        continue
+                    self.record_trial(params, rmse, state_dict, pruned)
+
+        # 更新数据库中的最佳RMSE
+        self.save_best_rmse()
+
+        return self.result()
@@ -0,0 +1,196 @@
+import glob
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+import torch
+
+from db.Snapshot import exclusive
+
+# 同一模型与搜索空间保留的研究数（每个数据集指纹一个研究）
+STUDY_KEEP = int(os.getenv("TUNER_STUDY_KEEP", "5"))
+
+
+def fingerprint(X, y, *parts):
+    """
+    数据集与搜索空间的指纹
+    :param parts: 搜索空间描述、调优器名称等影响试验结果的字符串
+    """
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode())
+        digest.update(array.tobytes())
+    for part in parts:
+        digest.update(str(part).encode())
+    return digest.hexdigest()
+
+
+def space_fingerprint(*parts):
+    """
+    搜索空间的指纹（不含数据集），数据更新后仍保持不变
+    :param parts: 搜索空间描述、调优器名称等
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode())
+    return digest.hexdigest()
+
+
+def _builtin(value):
+    """ numpy标量转换为Python内置类型，供json序列化 """
+    return value.item()
+
+
+def params_key(params):
+    """ 参数组合的规范化键，用于判断是否已经评估过 """
+    return json.dumps(params, sort_keys=True, default=_builtin)
+
+
+class Study:
+    """
+    持久化的调优研究
+    以(模型ID, 指纹)为键保存在本地目录，每完成一次试验立即落盘，中断后可继续；
+    同时保存最佳试验的网络参数，复用历史最佳结果时无需重新训练。
+    数据更新后指纹改变，同一模型与搜索空间最近的研究作为先验试验，只用于TPE热启动，
+    只保留同一模型与搜索空间最近的STUDY_KEEP个研究。
+    多个进程可同时调优同一模型：落盘时持有研究目录的排他锁，先合并其他进程已写入的试验。
+    """
+    def __init__(self, model_id, key, directory=None, space=None):
+        """
+        :param key: 数据集与搜索空间的指纹
+        :param directory: 存放目录，默认读取环境变量TUNER_STUDY_DIR（cached_models/studies）
+        :param space: 搜索空间的指纹，用于查找数据更新前的研究
+        """
+        self.model_id = model_id
+        self.key = key
+        self.space = space
+        self.directory = directory or os.getenv("TUNER_STUDY_DIR", "cached_models/studies")
+        self.path = os.path.join(self.directory, f"study_{model_id}_{key[:16]}.json")
+        self.state_path = os.path.join(self.directory, f"study_{model_id}_{key[:16]}_best.pth")
+        self.trials = []
+        self._index = {}
+        # 同一模型与搜索空间在其他数据集上的历史试验（不参与复用与最佳结果的比较）
+        self.prior_trials = []
+
+    @classmethod
+    def open(cls, model_id, key, directory=None, space=None):
+        """ 打开已有研究，不存在时创建空研究；指定space时同时读取最近的先验研究 """
+        study = cls(model_id, key, directory, space)
+        study._merge()
+        if space is not None:
+            study.prior_trials = study._load_prior()
+        return study
+
+    def _load_prior(self):
+        """ 同一模型ID与搜索空间下最近更新的其他研究中的试验 """
+        paths = glob.glob(os.path.join(self.directory, f"study_{self.model_id}_*.json"))
+        for path in sorted((path for path in paths if path != self.path), key=os.path.getmtime, reverse=True):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get("space") == self.space:
+                return data["trials"]
+        return []
+
+    def _merge(self):
+        """ 读取研究文件中本对象尚未记录的试验（包括其他进程写入的试验） """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("key") != self.key:
+            return
+        for trial in data["trials"]:
+            if params_key(trial["params"]) not in self._index:
+                self._add(trial)
+
+    def _prune(self):
+        """ 删除同一模型与搜索空间下较早的研究，连同本研究只保留最近的STUDY_KEEP个（调用方持有锁） """
+        if self.space is None:
+            return
+        others = []
+        for path in glob.glob(os.path.join(self.directory, f"study_{self.model_id}_*.json")):
+            if path == self.path:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("space") == self.space:
+                    others.append((os.path.getmtime(path), path))
+            except (OSError, ValueError):
+                continue
+        for _, path in sorted(others, reverse=True)[max(STUDY_KEEP - 1, 0):]:
+            for stale in (path, path[:-len(".json")] + "_best.pth"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    def _add(self, trial):
+        self.trials.append(trial)
+        self._index[params_key(trial["params"])] = trial
+
+    def lookup(self, params):
+        """ 查找相同参数组合的历史试验，未评估过时返回None """
+        return self._index.get(params_key(params))
+
+    def warm_start_trials(self):
+        """ TPE热启动用的试验：本研究的试验，加上先验研究中本研究尚未评估过的参数组合 """
+        prior = [trial for trial in self.prior_trials if params_key(trial["params"]) not in self._index]
+        return prior + self.trials
+
+    def best(self):
+        """ 未被剪枝的历史试验中RMSE最低的一次 """
+        completed = [trial for trial in self.trials if not trial["pruned"]]
+        return min(completed, key=lambda trial: trial["rmse"]) if completed else None
+
+    def best_state(self):
+        """ 历史最佳试验的网络参数，不存在时返回None """
+        if not os.path.exists(self.state_path):
+            return None
+        return torch.load(self.state_path, map_location="cpu")
+
+    def add(self, params, rmse, pruned=False, vals=None, state_dict=None):
+        """
+        记录一次试验并落盘
+        :param vals: hyperopt的原始取值（choice为索引），用于TPE热启动
+        :param state_dict: 该试验成为历史最佳时保存其网络参数
+        """
+        with exclusive(self.directory):
+            # 其他进程可能在本研究打开后写入了试验，合并后再比较最佳结果并落盘
+            self._merge()
+            best = self.best()
+            self._add({
+                "params": params,
+                "rmse": rmse,
+                "pruned": pruned,
+                "vals": vals,
+                "finished_at": time.time()
+            })
+
+            if state_dict is not None and not pruned and (best is None or rmse < best["rmse"]):
+                self._replace(self.state_path, lambda f: torch.save(state_dict, f))
+            self._replace(self.path, lambda f: f.write(json.dumps(
+                {"model_id": self.model_id, "key": self.key, "space": self.space, "trials": self.trials},
+                ensure_ascii=False, default=_builtin
+            ).encode("utf-8")))
+            self._prune()
+
+    @staticmethod
+    def _replace(path, write):
+        """ 先写唯一的临时文件再替换，避免中断时留下不完整的文件 """
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                write(f)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise